@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import recommendations, questions, neural_recommendations, minimal_recommendations
+from app.core.config import settings
+
+from app.api.endpoints import recommendations, questions, neural_recommendations, minimal_recommendations, health, debug
  
 api_router = APIRouter()
 api_router.include_router(recommendations.router, prefix="/api/recommendations", tags=["recommendations"])
@@ -8,8 +10,9 @@ api_router.include_router(questions.router, prefix="/api/questions", tags=["ques
 api_router.include_router(neural_recommendations.router, prefix="/api/neural", tags=["neural_recommendations"])
 api_router.include_router(minimal_recommendations.router, prefix="/api/minimal", tags=["minimal_recommendations"]) 
 
-# Añadir endpoint de health check directamente en el router principal
-@api_router.get("/health", tags=["health"])
-async def health_check():
-    """Endpoint para verificar que la API está funcionando."""
-    return {"status": "ok"} 
\ No newline at end of file
+# Endpoints de health check (liveness, readiness y estado de los modelos)
+api_router.include_router(health.router, tags=["health"])
+
+# Diagnóstico (perfil del arranque y memoria del worker), solo si se habilita explícitamente
+if settings.DEBUG_ENDPOINTS:
+    api_router.include_router(debug.router, tags=["debug"])
@@ -0,0 +1,65 @@
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, Query
+
+from app.core.config import settings
+from app.models.facet_index import parse_facet_values
+from app.schemas.personality import BatchProfilesRequest
+from app.services.model_registry import ModelRegistry, model_registry
+from app.services.neural_service import NeuralCareerService
+from app.services.minimal_service import MinimalNeuralService, MinimalRecommendationService
+from app.services.recommendation_service import RecommendationService
+
+# Dependencias de FastAPI que entregan los servicios compartidos del registro de modelos.
+# Son funciones síncronas para que FastAPI las ejecute en el threadpool: la primera
+# carga de un modelo no bloquea el event loop.
+
+def get_model_registry() -> ModelRegistry:
+    return model_registry
+
+def get_neural_service() -> NeuralCareerService:
+    return model_registry.neural_service()
+
+def get_minimal_neural_service() -> MinimalNeuralService:
+    return model_registry.minimal_neural_service()
+
+def get_minimal_recommendation_service() -> MinimalRecommendationService:
+    return model_registry.minimal_recommendation_service()
+
+def get_recommendation_service() -> RecommendationService:
+    return model_registry.recommendation_service()
+
+def career_filters(
+    university_filter: Optional[str] = Query(None, description="Filter by university (comma-separated values are ORed)"),
+    filter_mode: str = Query("and", regex="^(and|or)$", description="Combine the filters with AND or OR")
+) -> Dict[str, Any]:
+    """
+    Filtros por faceta del catálogo, en el formato de los argumentos `filters` y
+    `filter_mode` de RecommendationService.
+    """
+    return {
+        "filters": {
+            "universidad": parse_facet_values(university_filter)
+        },
+        "filter_mode": filter_mode
+    }
+
+def batch_profiles(request: BatchProfilesRequest) -> List[Dict[str, Any]]:
+    """
+    Convierte el cuerpo de un endpoint /batch en la lista de perfiles que reciben los
+    servicios, validando el tamaño máximo del lote.
+    """
+    if len(request.profiles) > settings.BATCH_MAX_PROFILES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El lote tiene {len(request.profiles)} perfiles; el máximo es {settings.BATCH_MAX_PROFILES}"
+        )
+    return [
+        {
+            "mbti_code": profile.mbti_result.MBTI_code,
+            "mbti_vector": profile.mbti_result.MBTI_vector,
+            "mbti_weights": profile.mbti_result.MBTI_weights,
+            "mi_scores": profile.mi_result.MI_scores
+        }
+        for profile in request.profiles
+    ]
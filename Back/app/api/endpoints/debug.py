@@ -0,0 +1,27 @@
+import os
+
+from fastapi import APIRouter
+
+from app.utils.memory import memory_breakdown
+from app.utils.startup_profiler import startup_profiler
+
+router = APIRouter()
+
+@router.get("/debug/startup")
+async def startup_report(top_imports: int = 50):
+    """
+    Perfil del arranque del worker: spans de cada fase (importaciones, base de datos,
+    carga y warmup de modelos), hitos y las importaciones más lentas.
+
+    Args:
+        top_imports: Número de importaciones a incluir, de mayor a menor tiempo acumulado
+    """
+    return startup_profiler.report(top_imports=top_imports)
+
+@router.get("/health/memory")
+async def worker_memory():
+    """
+    Memoria del worker que atiende la petición, separando la compartida por copy-on-write
+    con el maestro (modelos precargados) de la privada.
+    """
+    return {"pid": os.getpid(), **memory_breakdown()}
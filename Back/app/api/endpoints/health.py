@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from app.api.deps import get_model_registry
+from app.services.model_registry import ModelRegistry
+
+router = APIRouter()
+
+@router.get("/health")
+async def health_check():
+    """Endpoint para verificar que la API está funcionando."""
+    return {"status": "ok"}
+
+@router.get("/health/live")
+async def liveness():
+    """
+    Liveness: el proceso responde. No depende del estado de los modelos.
+    """
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness(registry: ModelRegistry = Depends(get_model_registry)):
+    """
+    Readiness: devuelve 200 cuando terminó el warmup de los modelos (o de inmediato si
+    WARMUP_ON_STARTUP está desactivado y los motores se cargan bajo demanda), y 503
+    mientras siguen cargando. Incluye el estado y la latencia de warmup de cada motor.
+    """
+    state = registry.readiness()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+@router.get("/health/models")
+async def models_status(registry: ModelRegistry = Depends(get_model_registry)):
+    """Tiempo de carga y memoria de cada modelo compartido del proceso."""
+    return registry.report()
@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
 from typing import Dict, List, Optional, Any
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
+from app.api.deps import (
+    batch_profiles, get_minimal_neural_service, get_minimal_recommendation_service, get_model_registry
+)
 from app.schemas.personality import MBTIResult, MIResult, CareerMatch
 from app.services.minimal_service import MinimalNeuralService, MinimalRecommendationService
-from app.scripts.train_with_riasec import train_model_with_riasec
+from app.services.model_registry import ModelRegistry
 
 router = APIRouter()
-minimal_service = MinimalRecommendationService()
 
 class TrainingData(BaseModel):
     training_data: List[Dict[str, Any]]
@@ -16,25 +19,36 @@ class TrainingData(BaseModel):
 class TrainingResponse(BaseModel):
     message: str
     accuracy: float
+    version: Optional[int] = None
 
 class RIASECTrainingParams(BaseModel):
     sample_size: Optional[int] = 5000
     save_training_data: Optional[bool] = False
 
 @router.post("/train", response_model=TrainingResponse)
-async def train_model(training_data: TrainingData):
+async def train_model(
+    training_data: TrainingData,
+    registry: ModelRegistry = Depends(get_model_registry)
+):
     try:
-        # Extraer datos de entrenamiento
-        result = minimal_service.train_model(training_data.training_data, training_data.career_names)
+        # Entrena y publica un modelo nuevo fuera del event loop y lo activa en caliente
+        result = await run_in_threadpool(
+            registry.train_minimal_model, training_data.training_data, training_data.career_names
+        )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error entrenando modelo: {str(e)}")
 
 @router.post("/train_with_riasec", response_model=TrainingResponse)
-async def train_with_riasec_data(params: RIASECTrainingParams, background_tasks: BackgroundTasks):
+async def train_with_riasec_data(
+    params: RIASECTrainingParams,
+    background_tasks: BackgroundTasks,
+    registry: ModelRegistry = Depends(get_model_registry)
+):
     try:
         # Usar muestra más pequeña para respuesta rápida
-        result = minimal_service.train_with_riasec(
+        result = await run_in_threadpool(
+            registry.train_minimal_with_riasec,
             sample_size=1000,  # Muestra inicial pequeña para respuesta rápida
             verbose=False
         )
@@ -42,7 +56,7 @@ async def train_with_riasec_data(params: RIASECTrainingParams, background_tasks:
         # Continuar entrenamiento en segundo plano con muestra completa si se solicita
         if params.sample_size != 1000:
             background_tasks.add_task(
-                minimal_service.train_with_riasec,
+                registry.train_minimal_with_riasec,
                 sample_size=params.sample_size,
                 save_training_data=params.save_training_data,
                 verbose=True
@@ -50,7 +64,8 @@ async def train_with_riasec_data(params: RIASECTrainingParams, background_tasks:
             
             return {
                 "message": f"Modelo inicializado con 1000 muestras. Continuando entrenamiento en segundo plano con {params.sample_size if params.sample_size else 'todas las'} muestras.",
-                "accuracy": result["accuracy"]
+                "accuracy": result["accuracy"],
+                "version": result["version"]
             }
         
         return result
@@ -60,23 +75,41 @@ async def train_with_riasec_data(params: RIASECTrainingParams, background_tasks:
 @router.post("/predict", response_model=List[CareerMatch])
 async def predict_minimal(
     mbti_result: MBTIResult,
-    mi_result: MIResult
+    mi_result: MIResult,
+    top_n: Optional[int] = Query(3, description="Número de recomendaciones a devolver"),
+    minimal_service: MinimalRecommendationService = Depends(get_minimal_recommendation_service)
 ):
     """
     Predice carreras recomendadas basadas en perfiles MBTI e inteligencias múltiples
     usando el modelo RandomForest.
     """
     try:
-        predictions = minimal_service.predict(mbti_result, mi_result)
+        predictions = minimal_service.predict(mbti_result, mi_result, top_n)
         return predictions
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en la predicción: {str(e)}")
 
+@router.post("/predict/batch", response_model=List[List[CareerMatch]])
+async def predict_minimal_batch(
+    profiles: List[Dict[str, Any]] = Depends(batch_profiles),
+    top_n: Optional[int] = Query(3, description="Número de recomendaciones por perfil"),
+    minimal_service: MinimalNeuralService = Depends(get_minimal_neural_service)
+):
+    """
+    Predice carreras para varios perfiles con una sola pasada del modelo RandomForest.
+    Devuelve una lista de recomendaciones por perfil, en el mismo orden de entrada.
+    """
+    try:
+        return await run_in_threadpool(minimal_service.predict_careers_batch, profiles, top_n)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en la predicción en batch: {str(e)}")
+
 @router.get("/compare", response_model=Dict[str, Any])
 async def compare_with_original(
     mbti_result: MBTIResult,
     mi_result: MIResult,
-    top_n: Optional[int] = Query(3, description="Número de recomendaciones a devolver")
+    top_n: Optional[int] = Query(3, description="Número de recomendaciones a devolver"),
+    minimal_service: MinimalNeuralService = Depends(get_minimal_neural_service)
 ):
     """
     Compara las recomendaciones del modelo RandomForest con el modelo basado en similitud coseno
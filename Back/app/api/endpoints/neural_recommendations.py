@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
 from typing import Dict, List, Optional, Any
 import asyncio
 
+from app.api.deps import batch_profiles, get_model_registry, get_neural_service
 from app.schemas.personality import MBTIResult, MIResult, CareerMatch
+from app.services.model_registry import ModelRegistry
 from app.services.neural_service import NeuralCareerService
 from app.services.llm_api_service import LLMApiService
 from app.services.llm_service import LLMService
 
 router = APIRouter()
-neural_service = NeuralCareerService()
 llm_api_service = LLMApiService()
 llm_service = LLMService()
 
@@ -17,13 +19,14 @@ async def get_neural_recommendations_with_analysis(
     mbti_result: MBTIResult,
     mi_result: MIResult,
     top_n: Optional[int] = Query(5, description="Número de recomendaciones a devolver"),
-    llm_provider: Optional[str] = Query(None, description="Proveedor LLM a utilizar")
+    llm_provider: Optional[str] = Query(None, description="Proveedor LLM a utilizar"),
+    neural_service: NeuralCareerService = Depends(get_neural_service)
 ):
     """
     Obtiene recomendaciones de carrera usando el modelo CNN entrenado junto con un análisis detallado generado por un LLM
     """
     try:
-        recommendations = neural_service.predict_careers(
+        recommendations = await neural_service.predict_careers_async(
             mbti_code=mbti_result.MBTI_code,
             mbti_vector=mbti_result.MBTI_vector,
             mbti_weights=mbti_result.MBTI_weights,
@@ -51,16 +54,20 @@ async def get_neural_recommendations_with_analysis(
         raise HTTPException(status_code=500, detail=f"Error generando recomendaciones con análisis: {str(e)}")
 
 @router.post("/reset", response_model=Dict[str, Any])
-async def reset_neural_models():
+async def reset_neural_models(registry: ModelRegistry = Depends(get_model_registry)):
     """
-    Reinicia los modelos neurales para un nuevo entrenamiento
+    Recarga el modelo neural desde disco y lo publica para todos los routers.
+    
+    La versión nueva se construye y valida fuera del event loop; las peticiones en curso
+    terminan con la versión anterior.
     """
     try:
-        # Crear una nueva instancia del servicio
-        global neural_service
-        neural_service = NeuralCareerService()
+        new_version = await run_in_threadpool(registry.reload_neural_model)
         
-        return {"message": "Modelos neurales reiniciados correctamente"}
+        return {
+            "message": "Modelos neurales reiniciados correctamente",
+            "version": new_version.version
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reiniciando modelos: {str(e)}")
 
@@ -68,13 +75,18 @@ async def reset_neural_models():
 async def train_neural_models(
     num_samples: Optional[int] = Query(1000, description="Número de muestras para entrenamiento"),
     epochs: Optional[int] = Query(50, description="Número de epochs para entrenamiento"),
-    batch_size: Optional[int] = Query(32, description="Tamaño del batch")
+    batch_size: Optional[int] = Query(32, description="Tamaño del batch"),
+    registry: ModelRegistry = Depends(get_model_registry)
 ):
     """
-    Entrena los modelos neurales FNN y CNN con datos sintéticos
+    Entrena una CNN nueva con datos sintéticos, la publica y la activa en caliente.
+    
+    El modelo en uso sigue sirviendo hasta que la versión nueva pasa la validación.
     """
     try:
-        result = neural_service.train_models(
+        # El entrenamiento es bloqueante: se ejecuta fuera del event loop
+        result = await run_in_threadpool(
+            registry.train_neural_model,
             num_samples=num_samples,
             epochs=epochs,
             batch_size=batch_size
@@ -87,13 +99,14 @@ async def train_neural_models(
 async def get_neural_recommendations(
     mbti_result: MBTIResult,
     mi_result: MIResult,
-    top_n: Optional[int] = Query(3, description="Número de recomendaciones a devolver")
+    top_n: Optional[int] = Query(3, description="Número de recomendaciones a devolver"),
+    neural_service: NeuralCareerService = Depends(get_neural_service)
 ):
     """
     Obtiene recomendaciones de carrera usando el modelo CNN entrenado
     """
     try:
-        recommendations = neural_service.predict_careers(
+        recommendations = await neural_service.predict_careers_async(
             mbti_code=mbti_result.MBTI_code,
             mbti_vector=mbti_result.MBTI_vector,
             mbti_weights=mbti_result.MBTI_weights,
@@ -102,4 +115,20 @@ async def get_neural_recommendations(
         )
         return recommendations
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generando recomendaciones: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generando recomendaciones: {str(e)}") 
+
+@router.post("/recommendations/batch", response_model=List[List[CareerMatch]])
+async def get_neural_recommendations_batch(
+    profiles: List[Dict[str, Any]] = Depends(batch_profiles),
+    top_n: Optional[int] = Query(3, description="Número de recomendaciones por perfil"),
+    neural_service: NeuralCareerService = Depends(get_neural_service)
+):
+    """
+    Obtiene recomendaciones de carrera para varios perfiles (ej. un grupo escolar) con un
+    solo forward pass de la CNN. Devuelve una lista de recomendaciones por perfil, en el
+    mismo orden de entrada.
+    """
+    try:
+        return await run_in_threadpool(neural_service.predict_careers_batch, profiles, top_n)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generando recomendaciones en batch: {str(e)}")
@@ -35,7 +35,7 @@ async def recommend_careers(
         
         # Realizar predicción con la RED NEURONAL (siempre)
         logger.info("Realizando predicción con red neuronal...")
-        recommendations = neural_service.predict_careers(
+        recommendations = await neural_service.predict_careers_async(
             mbti_code=profile_data.mbti_result.MBTI_code,
             mbti_vector=mbti_vector,
             mbti_weights=mbti_weights,
@@ -1,175 +1,101 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 import json
 from pathlib import Path
 import os
 import logging
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from app.api.deps import get_model_registry, get_neural_service
 from app.db.session import get_db
+from app.core.config import settings
+from app.models.career_catalog import CATALOG_PATH, get_catalog
 from app.services.llm_service import LLMService
 from app.services.llm_api_service import LLMApiService
+from app.services.model_registry import ModelRegistry
 from app.services.neural_service import NeuralCareerService
 from app.services.llm_profile_interpreter import LLMProfileInterpreter
 from app.schemas.personality import QuestionResponse, UserResponseCreate, LLMResponse, MBTIResult, MIResult
 
 from app.db.models import UserResponse
+from app.utils.http_cache import FilePayloadCache, payload_response
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("questions_api")
 
 router = APIRouter()
+DATA_DIR = Path(os.path.dirname(os.path.abspath(__file__))) / "../.." / "data"
 llm_service = LLMService()
 llm_api_service = LLMApiService()
-neural_service = NeuralCareerService()
+
+def _load_json(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _catalog_payload(build):
+    """Payload de un endpoint del catálogo, construido desde el catálogo compartido"""
+    return FilePayloadCache(CATALOG_PATH, lambda path: build(get_catalog(refresh=True)))
+
+# Payloads pre-serializados (JSON y gzip, con ETag), recalculados solo si cambia su archivo
+mbti_payload = FilePayloadCache(DATA_DIR / "mbti_questions.json", lambda path: {"mbti_questions": _load_json(path)})
+mi_payload = FilePayloadCache(DATA_DIR / "mi_questions.json", lambda path: {"mi_questions": _load_json(path)})
+careers_payload = _catalog_payload(lambda catalog: {"careers": list(catalog.records)})
+locations_payload = _catalog_payload(lambda catalog: {"locations": catalog.unique("ubicacion")})
+universities_payload = _catalog_payload(lambda catalog: {"universities": catalog.unique("universidad")})
+names_payload = _catalog_payload(lambda catalog: {"career_names": catalog.unique("nombre")})
+
+def _cached_response(request: Request, cache: FilePayloadCache, not_found: str, error: str) -> Response:
+    """Respuesta (200 o 304) de un payload cacheado, con los errores de los endpoints originales"""
+    try:
+        return payload_response(request, cache.get(), settings.QUESTIONS_CACHE_CONTROL)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=not_found)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"{error}: {str(e)}")
 
 @router.get("/mbti")
-async def get_mbti_questions():
+async def get_mbti_questions(request: Request):
     """
     Get all MBTI questions
     """
-    try:
-        # Path to the questions data
-        data_path = Path(os.path.dirname(os.path.abspath(__file__))) / "../.." / "data" / "mbti_questions.json"
-        
-        # Check if file exists
-        if not data_path.exists():
-            raise HTTPException(status_code=404, detail="MBTI questions file not found")
-            
-        # Read the questions
-        with open(data_path, "r", encoding="utf-8") as f:
-            questions = json.load(f)
-            
-        return {"mbti_questions": questions}
-    except Exception as e:
-        if isinstance(e, HTTPException):
-            raise e
-        raise HTTPException(status_code=500, detail=f"Error loading MBTI questions: {str(e)}")
+    return _cached_response(request, mbti_payload, "MBTI questions file not found", "Error loading MBTI questions")
 
 @router.get("/multiple-intelligence")
-async def get_mi_questions():
+async def get_mi_questions(request: Request):
     """
     Get all Multiple Intelligence questions
     """
-    try:
-        # Path to the questions data
-        data_path = Path(os.path.dirname(os.path.abspath(__file__))) / "../.." / "data" / "mi_questions.json"
-        
-        # Check if file exists
-        if not data_path.exists():
-            raise HTTPException(status_code=404, detail="MI questions file not found")
-            
-        # Read the questions
-        with open(data_path, "r", encoding="utf-8") as f:
-            questions = json.load(f)
-            
-        return {"mi_questions": questions}
-    except Exception as e:
-        if isinstance(e, HTTPException):
-            raise e
-        raise HTTPException(status_code=500, detail=f"Error loading MI questions: {str(e)}")
+    return _cached_response(request, mi_payload, "MI questions file not found", "Error loading MI questions")
 
 @router.get("/careers")
-async def get_careers():
+async def get_careers(request: Request):
     """
     Get all careers
     """
-    try:
-        # Path to the career data
-        data_path = Path(os.path.dirname(os.path.abspath(__file__))) / "../.." / "data" / "careers.json"
-        
-        # Check if file exists
-        if not data_path.exists():
-            raise HTTPException(status_code=404, detail="Careers file not found")
-            
-        # Read the careers
-        with open(data_path, "r", encoding="utf-8") as f:
-            careers = json.load(f)
-            
-        return {"careers": careers}
-    except Exception as e:
-        if isinstance(e, HTTPException):
-            raise e
-        raise HTTPException(status_code=500, detail=f"Error loading careers: {str(e)}")
+    return _cached_response(request, careers_payload, "Careers file not found", "Error loading careers")
 
 @router.get("/careers/locations")
-async def get_career_locations():
+async def get_career_locations(request: Request):
     """
     Get all unique locations from careers
     """
-    try:
-        # Path to the career data
-        data_path = Path(os.path.dirname(os.path.abspath(__file__))) / "../.." / "data" / "careers.json"
-        
-        # Check if file exists
-        if not data_path.exists():
-            raise HTTPException(status_code=404, detail="Careers file not found")
-            
-        # Read the careers
-        with open(data_path, "r", encoding="utf-8") as f:
-            careers = json.load(f)
-        
-        # Extract unique locations
-        locations = sorted(list(set(career["ubicacion"] for career in careers)))
-            
-        return {"locations": locations}
-    except Exception as e:
-        if isinstance(e, HTTPException):
-            raise e
-        raise HTTPException(status_code=500, detail=f"Error loading career locations: {str(e)}")
+    return _cached_response(request, locations_payload, "Careers file not found", "Error loading career locations")
 
 @router.get("/careers/universities")
-async def get_career_universities():
+async def get_career_universities(request: Request):
     """
     Get all unique universities from careers
     """
-    try:
-        # Path to the career data
-        data_path = Path(os.path.dirname(os.path.abspath(__file__))) / "../.." / "data" / "careers.json"
-        
-        # Check if file exists
-        if not data_path.exists():
-            raise HTTPException(status_code=404, detail="Careers file not found")
-            
-        # Read the careers
-        with open(data_path, "r", encoding="utf-8") as f:
-            careers = json.load(f)
-        
-        # Extract unique universities
-        universities = sorted(list(set(career["universidad"] for career in careers)))
-            
-        return {"universities": universities}
-    except Exception as e:
-        if isinstance(e, HTTPException):
-            raise e
-        raise HTTPException(status_code=500, detail=f"Error loading career universities: {str(e)}")
+    return _cached_response(request, universities_payload, "Careers file not found", "Error loading career universities")
 
 @router.get("/careers/names")
-async def get_career_names():
+async def get_career_names(request: Request):
     """
     Get all unique career names
     """
-    try:
-        # Path to the career data
-        data_path = Path(os.path.dirname(os.path.abspath(__file__))) / "../.." / "data" / "careers.json"
-        
-        # Check if file exists
-        if not data_path.exists():
-            raise HTTPException(status_code=404, detail="Careers file not found")
-            
-        # Read the careers
-        with open(data_path, "r", encoding="utf-8") as f:
-            careers = json.load(f)
-        
-        # Extract career names
-        names = sorted(list(set(career["nombre"] for career in careers)))
-            
-        return {"career_names": names}
-    except Exception as e:
-        if isinstance(e, HTTPException):
-            raise e
-        raise HTTPException(status_code=500, detail=f"Error loading career names: {str(e)}")
+    return _cached_response(request, names_payload, "Careers file not found", "Error loading career names")
 
 @router.post("/combined-questions")
 async def process_combined_questions(questions_responses: List[Dict[str, str]]):
@@ -220,7 +146,8 @@ async def process_complete_flow(
     user_id: Optional[int] = None,
     session_id: Optional[str] = None,
     llm_provider: Optional[str] = Query("openai", description="Proveedor LLM a utilizar: openai, anthropic o mock"),
-    include_analysis: Optional[bool] = Query(False, description="Incluir análisis detallado de las recomendaciones")
+    include_analysis: Optional[bool] = Query(False, description="Incluir análisis detallado de las recomendaciones"),
+    neural_service: NeuralCareerService = Depends(get_neural_service)
 ):
     """
     Procesa el flujo completo:
@@ -305,7 +232,7 @@ async def process_complete_flow(
         
         # 6. Usar la red neuronal para obtener recomendaciones de carreras
         logger.info("Paso 5: Obteniendo recomendaciones de carreras con la red neuronal")
-        recommendations = neural_service.predict_careers(
+        recommendations = await neural_service.predict_careers_async(
             mbti_code=mbti_result.MBTI_code,
             mbti_vector=mbti_vector,
             mbti_weights=mbti_weights,
@@ -384,10 +311,12 @@ async def train_neural_models(
     num_samples: int = Query(1000, description="Número de muestras a generar para entrenamiento"),
     epochs: int = Query(50, description="Número de epochs para entrenamiento"),
     batch_size: int = Query(32, description="Tamaño del batch para entrenamiento"),
-    validation: bool = Query(True, description="Si se debe realizar validación cruzada")
+    validation: bool = Query(True, description="Si se debe realizar validación cruzada"),
+    registry: ModelRegistry = Depends(get_model_registry)
 ):
     """
-    Entrena los modelos neuronales con datos sintéticos
+    Entrena una CNN nueva con datos sintéticos, la publica y la activa en caliente
+    (el modelo en uso sigue sirviendo mientras tanto)
     
     Args:
         num_samples: Número de muestras para entrenamiento
@@ -397,7 +326,9 @@ async def train_neural_models(
     """
     try:
         logger.info(f"Iniciando entrenamiento de modelos con {num_samples} muestras")
-        result = neural_service.train_models(
+        # El entrenamiento es bloqueante: se ejecuta fuera del event loop
+        result = await run_in_threadpool(
+            registry.train_neural_model,
             num_samples=num_samples,
             epochs=epochs,
             batch_size=batch_size,
@@ -413,7 +344,8 @@ async def train_neural_models(
 
 @router.get("/evaluate-models")
 async def evaluate_neural_models(
-    num_samples: int = Query(500, description="Número de muestras a generar para evaluación")
+    num_samples: int = Query(500, description="Número de muestras a generar para evaluación"),
+    neural_service: NeuralCareerService = Depends(get_neural_service)
 ):
     """
     Evalúa los modelos neuronales con datos sintéticos
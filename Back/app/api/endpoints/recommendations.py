@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Dict, List, Optional
 
+from app.api.deps import batch_profiles, career_filters, get_recommendation_service
 from app.schemas.personality import MBTIQuestion, MIResult, MBTIResult, UserProfile, CareerMatch
 from app.services.recommendation_service import RecommendationService
 
 router = APIRouter()
-recommendation_service = RecommendationService()
 
 @router.post("/mbti", response_model=MBTIResult)
-async def process_mbti(mbti_questions: List[MBTIQuestion]):
+async def process_mbti(
+    mbti_questions: List[MBTIQuestion],
+    recommendation_service: RecommendationService = Depends(get_recommendation_service)
+):
     """
     Process MBTI questions and return MBTI profile
     """
@@ -21,7 +25,10 @@ async def process_mbti(mbti_questions: List[MBTIQuestion]):
         raise HTTPException(status_code=400, detail=f"Error processing MBTI questions: {str(e)}")
 
 @router.post("/multiple-intelligence", response_model=MIResult)
-async def process_mi(mi_responses: List[dict]):
+async def process_mi(
+    mi_responses: List[dict],
+    recommendation_service: RecommendationService = Depends(get_recommendation_service)
+):
     """
     Process multiple intelligence responses and return MI profile
     """
@@ -36,7 +43,9 @@ async def get_recommendations(
     mbti_questions: List[MBTIQuestion],
     mi_responses: List[dict],
     top_n: Optional[int] = Query(3, description="Number of recommendations to return"),
-    location_filter: Optional[str] = Query(None, description="Filter results by location")
+    location_filter: Optional[str] = Query(None, description="Filter results by location"),
+    facet_filters: Dict[str, Any] = Depends(career_filters),
+    recommendation_service: RecommendationService = Depends(get_recommendation_service)
 ):
     """
     Get full user profile with career recommendations based on MBTI and MI profiles
@@ -47,7 +56,7 @@ async def get_recommendations(
         
         # Get full profile
         profile = recommendation_service.get_full_profile(
-            mbti_data, mi_responses, top_n, location_filter
+            mbti_data, mi_responses, top_n, location_filter, **facet_filters
         )
         return profile
     except Exception as e:
@@ -58,24 +67,47 @@ async def get_filtered_recommendations(
     mbti_result: MBTIResult,
     mi_result: MIResult,
     top_n: Optional[int] = Query(3, description="Number of recommendations to return"),
-    location_filter: Optional[str] = Query(None, description="Filter results by location")
+    location_filter: Optional[str] = Query(None, description="Filter results by location"),
+    facet_filters: Dict[str, Any] = Depends(career_filters),
+    recommendation_service: RecommendationService = Depends(get_recommendation_service)
 ):
     """
     Get career recommendations with optional filtering based on already processed MBTI and MI profiles
     """
     try:
         recommendations = recommendation_service.get_career_recommendations(
-            mbti_result.model_dump(), mi_result.model_dump(), top_n, location_filter
+            mbti_result.model_dump(), mi_result.model_dump(), top_n, location_filter, **facet_filters
         )
         return recommendations["career_recommendations"]
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error generating filtered recommendations: {str(e)}")
 
+@router.post("/filtered-recommendations/batch", response_model=List[List[CareerMatch]])
+async def get_filtered_recommendations_batch(
+    profiles: List[Dict[str, Any]] = Depends(batch_profiles),
+    top_n: Optional[int] = Query(3, description="Number of recommendations per profile"),
+    location_filter: Optional[str] = Query(None, description="Filter results by location"),
+    facet_filters: Dict[str, Any] = Depends(career_filters),
+    recommendation_service: RecommendationService = Depends(get_recommendation_service)
+):
+    """
+    Get career recommendations for many already processed MBTI and MI profiles in one call.
+    Returns one list of recommendations per profile, in input order.
+    """
+    try:
+        return await run_in_threadpool(
+            recommendation_service.get_career_recommendations_batch, profiles, top_n, location_filter,
+            **facet_filters
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error generating batch recommendations: {str(e)}")
+
 @router.get("/profile-description")
 async def get_profile_description(
     mbti_code: str,
     mbti_weights: dict,
-    mi_scores: dict
+    mi_scores: dict,
+    recommendation_service: RecommendationService = Depends(get_recommendation_service)
 ):
     """
     Generate a personalized STEM profile description based on MBTI and MI results
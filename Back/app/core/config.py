@@ -29,6 +29,135 @@ class Settings:
     # Configuración general
     DEBUG: bool = os.getenv("DEBUG", "True").lower() in ('true', '1', 't')
     
+    # Registro versionado de artefactos de modelos. Si no se fija una versión,
+    # se carga la publicada en el archivo CURRENT de cada tipo de modelo
+    MODEL_REGISTRY_DIR: str = os.getenv(
+        "MODEL_REGISTRY_DIR",
+        str(Path(__file__).resolve().parent.parent / "data" / "model_registry")
+    )
+    NEURAL_MODEL_VERSION: str = os.getenv("NEURAL_MODEL_VERSION", "")
+    MINIMAL_MODEL_VERSION: str = os.getenv("MINIMAL_MODEL_VERSION", "")
+    
+    # Motor de inferencia de la CNN: "numpy" (forward pass en NumPy con los pesos exportados,
+    # sin TensorFlow en las peticiones), "lattice" (retícula precalculada) o "tensorflow".
+    # Los pesos NumPy solo se publican si sus probabilidades difieren de las de TensorFlow
+    # en menos de CNN_PARITY_ATOL
+    CNN_ENGINE: str = os.getenv("CNN_ENGINE", "numpy").lower()
+    CNN_PARITY_ATOL: float = float(os.getenv("CNN_PARITY_ATOL", "1e-4"))
+    
+    # Retícula precalculada de la CNN (CNN_ENGINE="lattice"): probabilidades evaluadas sobre
+    # una rejilla de LATTICE_WEIGHT_POINTS puntos por peso MBTI y LATTICE_MI_POINTS por score MI.
+    # Solo se sirve si su error máximo medido frente al modelo es <= LATTICE_MAX_ERROR;
+    # si no, se usa el motor NumPy. LATTICE_MODE: "snap" (punto más cercano), "simplex"
+    # (13 vértices por fila) o "interpolate" (multilineal, 4096 vértices: más lento que la CNN)
+    LATTICE_DIR: str = os.getenv(
+        "LATTICE_DIR",
+        str(Path(__file__).resolve().parent.parent / "data" / "lattice")
+    )
+    LATTICE_MODE: str = os.getenv("LATTICE_MODE", "snap").lower()
+    LATTICE_WEIGHT_POINTS: int = int(os.getenv("LATTICE_WEIGHT_POINTS", "2"))
+    LATTICE_MI_POINTS: int = int(os.getenv("LATTICE_MI_POINTS", "3"))
+    LATTICE_MAX_ERROR: float = float(os.getenv("LATTICE_MAX_ERROR", "0.05"))
+    
+    # Motor del RandomForest: "flat" (bosque aplanado en arrays NumPy, idéntico a scikit-learn
+    # y sin su costo fijo por llamada) o "sklearn"
+    RF_ENGINE: str = os.getenv("RF_ENGINE", "flat").lower()
+    # Abrir los arrays del bosque aplanado con memory-map (una copia compartida por nodo)
+    RF_MMAP: bool = os.getenv("RF_MMAP", "True").lower() in ('true', '1', 't')
+    
+    # Micro-batching de la CNN: las predicciones concurrentes se agrupan durante
+    # BATCH_WINDOW_MS o hasta juntar BATCH_MAX_SIZE y se ejecutan en un solo forward pass
+    MICRO_BATCHING: bool = os.getenv("MICRO_BATCHING", "True").lower() in ('true', '1', 't')
+    BATCH_WINDOW_MS: float = float(os.getenv("BATCH_WINDOW_MS", "3"))
+    BATCH_MAX_SIZE: int = int(os.getenv("BATCH_MAX_SIZE", "32"))
+    
+    # Caché LRU+TTL de predicciones por perfil: los pesos MBTI y scores MI se redondean al
+    # múltiplo de PREDICTION_CACHE_STEP. PREDICTION_CACHE_SIZE=0 la desactiva
+    PREDICTION_CACHE_SIZE: int = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+    PREDICTION_CACHE_TTL: float = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+    PREDICTION_CACHE_STEP: float = float(os.getenv("PREDICTION_CACHE_STEP", "0.01"))
+    
+    # Caché LRU de embeddings de perfiles del recomendador por embeddings (0 la desactiva).
+    # Con PROFILE_EMBEDDING_CACHE_PERSIST se guarda al apagar y se precarga al arrancar
+    PROFILE_EMBEDDING_CACHE_SIZE: int = int(os.getenv("PROFILE_EMBEDDING_CACHE_SIZE", "2048"))
+    PROFILE_EMBEDDING_CACHE_PERSIST: bool = os.getenv("PROFILE_EMBEDDING_CACHE_PERSIST", "True").lower() in ('true', '1', 't')
+    
+    # Encoder de frases del recomendador por embeddings: "fp32" o "int8" (capas lineales
+    # cuantizadas con la cuantización dinámica de PyTorch; menos latencia y memoria en CPU)
+    ENCODER_QUANTIZATION: str = os.getenv("ENCODER_QUANTIZATION", "fp32").lower()
+    
+    # Bundle local del encoder (ver app/scripts/fetch_encoder.py). Con ENCODER_OFFLINE el
+    # encoder solo se carga desde el bundle y nunca consulta el hub de Hugging Face;
+    # ENCODER_VERIFY_BUNDLE comprueba los checksums del bundle antes de cargarlo
+    ENCODER_BUNDLE_DIR: str = os.getenv(
+        "ENCODER_BUNDLE_DIR",
+        str(Path(__file__).resolve().parent.parent / "data" / "encoder")
+    )
+    ENCODER_OFFLINE: bool = os.getenv("ENCODER_OFFLINE", "True").lower() in ('true', '1', 't')
+    ENCODER_VERIFY_BUNDLE: bool = os.getenv("ENCODER_VERIFY_BUNDLE", "True").lower() in ('true', '1', 't')
+    
+    # Índice ANN (IVF) del recomendador por embeddings: se usa con catálogos de al menos
+    # ANN_MIN_CATALOG carreras (0 lo desactiva). ANN_LISTS=0 usa la raíz cuadrada del
+    # catálogo; ANN_NPROBE es la perilla recall/latencia (listas recorridas por consulta)
+    ANN_MIN_CATALOG: int = int(os.getenv("ANN_MIN_CATALOG", "5000"))
+    ANN_LISTS: int = int(os.getenv("ANN_LISTS", "0"))
+    ANN_NPROBE: int = int(os.getenv("ANN_NPROBE", "8"))
+    
+    # Matriz de embeddings del catálogo para la búsqueda exacta, compartida por los workers
+    # con memory-map: EMBEDDING_STORE_DTYPE (float16 o float32), reducción PCA opcional
+    # (EMBEDDING_STORE_PCA_DIMS, 0 = sin reducción) y acuerdo mínimo del top-10 con la
+    # matriz float32 completa; por debajo de él se usa float32 sin PCA
+    EMBEDDING_STORE_DTYPE: str = os.getenv("EMBEDDING_STORE_DTYPE", "float16").lower()
+    EMBEDDING_STORE_PCA_DIMS: int = int(os.getenv("EMBEDDING_STORE_PCA_DIMS", "0"))
+    EMBEDDING_STORE_MIN_AGREEMENT: float = float(os.getenv("EMBEDDING_STORE_MIN_AGREEMENT", "0.95"))
+    
+    # Cache-Control de los endpoints del banco de preguntas y del catálogo. Con "no-cache"
+    # los clientes revalidan en cada uso y reciben 304 sin cuerpo si el ETag no cambió
+    QUESTIONS_CACHE_CONTROL: str = os.getenv("QUESTIONS_CACHE_CONTROL", "no-cache")
+    
+    # Entrenamiento en segundo plano: si no hay modelo CNN o RandomForest publicado, las
+    # peticiones se sirven con el recomendador por embeddings (o reglas) y el modelo se entrena
+    # en un hilo de fondo, con los tamaños indicados. Tras un fallo se espera
+    # TRAINING_RETRY_SECONDS antes de reintentar. Solo un worker por nodo entrena cada modelo
+    # (lock en MODEL_REGISTRY_DIR); los demás revisan CURRENT cada TRAINING_POLL_SECONDS y
+    # cargan la versión que publique
+    BACKGROUND_TRAINING: bool = os.getenv("BACKGROUND_TRAINING", "True").lower() in ('true', '1', 't')
+    CNN_TRAINING_SAMPLES: int = int(os.getenv("CNN_TRAINING_SAMPLES", "5000"))
+    CNN_TRAINING_EPOCHS: int = int(os.getenv("CNN_TRAINING_EPOCHS", "50"))
+    RF_TRAINING_SAMPLES: int = int(os.getenv("RF_TRAINING_SAMPLES", "1000"))
+    TRAINING_RETRY_SECONDS: float = float(os.getenv("TRAINING_RETRY_SECONDS", "600"))
+    TRAINING_POLL_SECONDS: float = float(os.getenv("TRAINING_POLL_SECONDS", "5"))
+    
+    # Cada MODEL_WATCH_SECONDS cada worker revisa CURRENT y carga en caliente las versiones
+    # de la CNN y del RandomForest que publique otro worker (0 lo desactiva)
+    MODEL_WATCH_SECONDS: float = float(os.getenv("MODEL_WATCH_SECONDS", "30"))
+    
+    # Máximo de perfiles por petición en los endpoints /batch
+    BATCH_MAX_PROFILES: int = int(os.getenv("BATCH_MAX_PROFILES", "1000"))
+    
+    # Cargar y calentar los modelos en segundo plano al arrancar (ver /health/ready)
+    WARMUP_ON_STARTUP: bool = os.getenv("WARMUP_ON_STARTUP", "True").lower() in ('true', '1', 't')
+    
+    # Modo pre-fork (gunicorn_conf.py): número de workers (0 = automático) y memoria
+    # privada estimada por worker para el cálculo automático
+    WORKERS: int = int(os.getenv("WORKERS", "0"))
+    WORKER_PRIVATE_MEMORY_MB: int = int(os.getenv("WORKER_PRIVATE_MEMORY_MB", "400"))
+    
+    # Importar TensorFlow, sentence-transformers y matplotlib al arrancar en lugar de en el primer uso
+    PRELOAD_ML_MODULES: bool = os.getenv("PRELOAD_ML_MODULES", "False").lower() in ('true', '1', 't')
+    
+    # Perfil del arranque (/debug/startup): medir cada importación hasta que termina el
+    # arranque, descartando las de menos de STARTUP_IMPORT_MIN_MS, y escribir el reporte
+    # en STARTUP_REPORT_PATH si está definido
+    STARTUP_PROFILE_IMPORTS: bool = os.getenv("STARTUP_PROFILE_IMPORTS", "True").lower() in ('true', '1', 't')
+    STARTUP_IMPORT_MIN_MS: float = float(os.getenv("STARTUP_IMPORT_MIN_MS", "1.0"))
+    STARTUP_REPORT_PATH: str = os.getenv("STARTUP_REPORT_PATH", "")
+    
+    # Montar los endpoints de diagnóstico (/debug/startup, /health/memory). Exponen el PID, los
+    # tiempos de importación y la memoria del worker, así que están desactivados por defecto
+    # (DEBUG vale True por defecto)
+    DEBUG_ENDPOINTS: bool = os.getenv("DEBUG_ENDPOINTS", "False").lower() in ('true', '1', 't')
+    
     # CORS
     CORS_ORIGINS: list = ["*"]  # Permitir cualquier origen en desarrollo
     CORS_CREDENTIALS: bool = True
@@ -0,0 +1,85 @@
+"""
+Modo de producción pre-fork.
+
+El proceso maestro de gunicorn importa la aplicación y carga los modelos una sola vez
+antes de crear los workers; los workers heredan los pesos por copy-on-write en lugar
+de tener cada uno su propia copia. La configuración de gunicorn está en gunicorn_conf.py.
+"""
+
+import gc
+import importlib.util
+import logging
+import multiprocessing
+import os
+
+from uvicorn.workers import UvicornWorker
+
+from app.core.config import settings
+from app.utils.memory import available_memory_mb, current_rss_mb
+from app.utils.startup_profiler import startup_profiler
+
+logger = logging.getLogger("server")
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+class FastUvicornWorker(UvicornWorker):
+    """Worker de uvicorn que usa uvloop y httptools cuando están instalados."""
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop" if _has_module("uvloop") else "asyncio",
+        "http": "httptools" if _has_module("httptools") else "h11"
+    }
+
+def autotune_workers(reserved_mb: float = 0.0) -> int:
+    """
+    Calcula el número de workers.
+
+    Si WORKERS está definido se respeta. Si no, se usa el mínimo entre el número de
+    CPUs y los workers que caben en la memoria libre, suponiendo que cada worker
+    añade WORKER_PRIVATE_MEMORY_MB de memoria privada sobre los modelos compartidos.
+
+    Args:
+        reserved_mb: Memoria que aún no está ocupada pero se ocupará antes del fork (ej. los
+            modelos, si se mide antes de cargarlos). Después de `preload_models` es 0: la
+            memoria del maestro ya no aparece como libre
+    """
+    if settings.WORKERS > 0:
+        return settings.WORKERS
+
+    cpu_workers = multiprocessing.cpu_count()
+    available = available_memory_mb()
+    if available <= 0:
+        return cpu_workers
+
+    memory_workers = int((available - reserved_mb) // settings.WORKER_PRIVATE_MEMORY_MB)
+    return max(1, min(cpu_workers, memory_workers))
+
+def preload_models() -> float:
+    """
+    Carga los modelos en el proceso maestro y congela el GC antes del fork.
+
+    Solo se cargan los modelos, sin ejecutar inferencias: los pools de hilos de
+    TensorFlow/PyTorch no sobreviven al fork, así que el warmup de inferencia lo hace
+    cada worker al arrancar (ver ModelRegistry.start_warmup).
+
+    Returns:
+        RSS del maestro en MB después de cargar los modelos
+    """
+    # Importación local: el registro importa los modelos, que no hacen falta para configurar gunicorn
+    from app.services.model_registry import model_registry
+
+    model_registry.load_all()
+    # El maestro no pasa por el evento de startup: se deja de medir importaciones aquí para
+    # no dejar el hook de __import__ instalado durante toda su vida (y heredado por los workers)
+    startup_profiler.finish("master_preloaded")
+
+    # Mover todos los objetos existentes a la generación permanente: el GC de los workers
+    # ya no los recorre ni escribe en sus cabeceras, así que sus páginas siguen compartidas
+    gc.collect()
+    gc.freeze()
+
+    rss = current_rss_mb()
+    logger.info(f"Modelos precargados en el maestro (pid {os.getpid()}): {rss:.0f} MB RSS, "
+                f"{gc.get_freeze_count()} objetos congelados")
+    return rss
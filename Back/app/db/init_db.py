@@ -1,47 +1,44 @@
 import logging
-import json
-from pathlib import Path
-import os
 from sqlalchemy.orm import Session
 
 from app.db.session import Base, engine
 from app.db import crud
 from app.db.models import User, Career
+from app.models.career_catalog import get_catalog
+from app.utils.startup_profiler import startup_profiler
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def init_db(db: Session) -> None:
     """Inicializar la base de datos con datos iniciales"""
-    # Importar carreras desde el archivo JSON
-    careers_path = Path(os.path.dirname(os.path.abspath(__file__))) / ".." / "data" / "careers.json"
+    # Importar carreras desde el catálogo compartido (se carga una sola vez por proceso)
+    with startup_profiler.span("db.load_catalog"):
+        catalog = get_catalog()
     
-    if careers_path.exists():
-        with open(careers_path, "r", encoding="utf-8") as f:
-            careers_data = json.load(f)
-        
-        logger.info(f"Importando {len(careers_data)} carreras desde {careers_path}")
-        imported_careers = crud.import_careers_from_json(db, careers_data)
-        logger.info(f"Se importaron {len(imported_careers)} carreras nuevas")
-    else:
-        logger.warning(f"No se encontró el archivo de carreras en: {careers_path}")
+    logger.info(f"Importando {len(catalog)} carreras desde {catalog.path}")
+    with startup_profiler.span("db.import_careers"):
+        imported_careers = crud.import_careers_from_json(db, list(catalog.records))
+    logger.info(f"Se importaron {len(imported_careers)} carreras nuevas")
     
     # Crear usuario de prueba si no existe
-    test_user = crud.get_user_by_email(db, "test@example.com")
-    if not test_user:
-        logger.info("Creando usuario de prueba")
-        user_data = {
-            "username": "testuser",
-            "email": "test@example.com",
-            "hashed_password": "testpassword",  # En producción, esto debe ser hash
-            "is_active": True
-        }
-        test_user = crud.create_user(db, user_data)
+    with startup_profiler.span("db.test_user"):
+        test_user = crud.get_user_by_email(db, "test@example.com")
+        if not test_user:
+            logger.info("Creando usuario de prueba")
+            user_data = {
+                "username": "testuser",
+                "email": "test@example.com",
+                "hashed_password": "testpassword",  # En producción, esto debe ser hash
+                "is_active": True
+            }
+            test_user = crud.create_user(db, user_data)
 
 def create_tables() -> None:
     """Crear todas las tablas en la base de datos"""
     logger.info("Creando tablas en la base de datos...")
-    Base.metadata.create_all(bind=engine)
+    with startup_profiler.span("db.create_tables"):
+        Base.metadata.create_all(bind=engine)
     logger.info("¡Tablas creadas!")
 
 def init() -> None:
@@ -0,0 +1,250 @@
+"""
+Índice aproximado de vecinos más cercanos (IVF) para catálogos de carreras grandes.
+
+Los embeddings normalizados se agrupan con k-means esférico en `n_lists` listas
+(celdas de Voronoi por similitud coseno). Una consulta puntúa primero los centroides y
+solo recorre las `nprobe` listas más cercanas, así que el costo por consulta crece con
+el tamaño de esas listas y no con el del catálogo. `nprobe` es la perilla entre recall
+y latencia: con `nprobe == n_lists` la búsqueda es exacta.
+
+Las filas se guardan reordenadas por lista (cada lista es un bloque contiguo) y el
+índice se persiste como arrays `.npy` que se abren con memory-map.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.models.embedding_cache import replace_directory
+from app.models.retrieval import normalize_rows, top_k_indices
+
+logger = logging.getLogger("ann_index")
+
+_ARRAYS = ("centroids", "vectors", "ids", "offsets")
+
+def matrix_hash(matrix: np.ndarray) -> str:
+    """Hash del contenido de una matriz, para detectar un índice construido con otro catálogo."""
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    digest = hashlib.sha256(str(matrix.shape).encode("utf-8"))
+    digest.update(matrix.tobytes())
+    return digest.hexdigest()
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, block: int = 8192) -> np.ndarray:
+    """Lista (centroide más similar) de cada fila, por bloques para acotar la memoria."""
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block):
+        labels[start:start + block] = np.argmax(vectors[start:start + block] @ centroids.T, axis=1)
+    return labels
+
+class IVFIndex:
+    """Índice de listas invertidas sobre embeddings normalizados."""
+
+    def __init__(self, centroids: np.ndarray, vectors: np.ndarray, ids: np.ndarray,
+                 offsets: np.ndarray, nprobe: int = 8, source_hash: Optional[str] = None):
+        """
+        Args:
+            centroids: Matriz n_lists x D de centroides normalizados
+            vectors: Matriz N x D de embeddings normalizados, agrupados por lista
+            ids: Fila original del catálogo de cada fila de `vectors`
+            offsets: n_lists + 1 posiciones; la lista l ocupa vectors[offsets[l]:offsets[l + 1]]
+            nprobe: Listas recorridas por consulta
+            source_hash: `matrix_hash` de la matriz con la que se construyó
+        """
+        self.centroids = centroids
+        self.vectors = vectors
+        self.ids = ids
+        self.offsets = offsets
+        self.nprobe = nprobe
+        self.source_hash = source_hash
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, n_lists: int = 0, nprobe: int = 8,
+              iterations: int = 20, seed: int = 0) -> "IVFIndex":
+        """
+        Construye el índice con k-means esférico.
+
+        Args:
+            matrix: Embeddings N x D (se normalizan)
+            n_lists: Número de listas (0 = raíz cuadrada de N)
+            nprobe: Listas recorridas por consulta
+            iterations: Iteraciones de k-means
+            seed: Semilla de la inicialización
+
+        Returns:
+            Índice construido
+        """
+        vectors = normalize_rows(matrix)
+        n = len(vectors)
+        if n == 0:
+            raise ValueError("No se puede construir un índice sobre un catálogo vacío")
+        n_lists = min(n, n_lists or max(1, int(round(np.sqrt(n)))))
+
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(n, n_lists, replace=False)].copy()
+        labels = _assign(vectors, centroids)
+        for _ in range(iterations):
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, vectors)
+            counts = np.bincount(labels, minlength=n_lists)
+            # Las listas vacías se reinician con filas al azar
+            empty = np.flatnonzero(counts == 0)
+            sums[empty] = vectors[rng.choice(n, len(empty), replace=False)]
+            centroids = normalize_rows(sums)
+            new_labels = _assign(vectors, centroids)
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+
+        order = np.argsort(labels, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=n_lists), out=offsets[1:])
+        return cls(centroids, np.ascontiguousarray(vectors[order]), order.astype(np.int64),
+                   offsets, nprobe, matrix_hash(vectors))
+
+    def _rows(self, lists: np.ndarray) -> np.ndarray:
+        """Posiciones en `vectors` de las filas de las listas indicadas."""
+        return np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists])
+
+    def search(self, queries: np.ndarray, k: int, mask: Optional[np.ndarray] = None,
+               nprobe: Optional[int] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Los k vecinos más similares de cada consulta.
+
+        Args:
+            queries: Vector de D o matriz Q x D (se normalizan)
+            k: Vecinos por consulta
+            mask: Vector booleano sobre las filas originales; las filas en False se descartan.
+                Si las listas recorridas no tienen k filas válidas, se busca de forma exacta
+                entre las filas válidas
+            nprobe: Listas recorridas (por defecto self.nprobe)
+
+        Returns:
+            Por consulta, (filas originales, similitudes), de mayor a menor similitud
+        """
+        queries = normalize_rows(queries)
+        if queries.ndim == 1:
+            queries = queries[np.newaxis, :]
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        probes = top_k_indices(queries @ self.centroids.T, nprobe)
+
+        results = []
+        for query, lists in zip(queries, probes):
+            rows = self._rows(lists)
+            ids = self.ids[rows]
+            valid = mask[ids] if mask is not None else None
+            if valid is not None and np.count_nonzero(valid) < k:
+                # Filtro muy restrictivo: búsqueda exacta entre las filas que lo cumplen
+                rows = np.flatnonzero(mask[self.ids])
+                ids, valid = self.ids[rows], None
+            scores = self.vectors[rows] @ query
+            top = top_k_indices(scores, k, valid)
+            results.append((ids[top], scores[top]))
+        return results
+
+    def recall(self, matrix: np.ndarray, queries: np.ndarray, k: int = 10,
+               nprobe: Optional[int] = None) -> float:
+        """
+        Recall@k frente a la búsqueda exacta: fracción de los k vecinos exactos que
+        devuelve el índice.
+        """
+        exact = top_k_indices(normalize_rows(queries) @ normalize_rows(matrix).T, k)
+        found = self.search(queries, k, nprobe=nprobe)
+        hits = sum(len(np.intersect1d(ids, truth)) for (ids, _), truth in zip(found, exact))
+        return hits / exact.size if exact.size else 1.0
+
+    def save(self, directory: Path) -> bool:
+        """
+        Guarda el índice en `directory` (arrays `.npy` y metadata JSON), de forma atómica.
+
+        Si `directory` ya tiene un índice con el mismo `source_hash` y número de listas
+        (otro worker lo guardó), se conserva.
+
+        Returns:
+            True si se escribió el índice, False si se conservó el existente
+        """
+        def write(staging: Path):
+            for name in _ARRAYS:
+                np.save(str(staging / f"{name}.npy"), getattr(self, name), allow_pickle=False)
+            with open(staging / "index.json", "w", encoding="utf-8") as f:
+                json.dump({
+                    "size": self.size,
+                    "dim": int(self.vectors.shape[1]),
+                    "n_lists": self.n_lists,
+                    "source_hash": self.source_hash
+                }, f, indent=2)
+
+        def same_index(existing: Path) -> bool:
+            try:
+                with open(existing / "index.json", "r", encoding="utf-8") as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                return False
+            return metadata.get("source_hash") == self.source_hash and metadata.get("n_lists") == self.n_lists
+
+        return replace_directory(Path(directory), write, same_index)
+
+    @classmethod
+    def load(cls, directory: Path, nprobe: int = 8, mmap: bool = True) -> "IVFIndex":
+        """
+        Carga un índice guardado con `save`.
+
+        Raises:
+            OSError, ValueError: si el índice no existe o está incompleto
+        """
+        directory = Path(directory)
+        with open(directory / "index.json", "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        mmap_mode = "r" if mmap else None
+        arrays = {name: np.load(str(directory / f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+                  for name in _ARRAYS}
+        if len(arrays["ids"]) != metadata["size"] or len(arrays["centroids"]) != metadata["n_lists"]:
+            raise ValueError(f"Índice ANN incompleto en {directory}")
+        return cls(nprobe=nprobe, source_hash=metadata.get("source_hash"), **arrays)
+
+    def stats(self) -> Dict[str, Any]:
+        sizes = np.diff(self.offsets)
+        return {
+            "size": self.size,
+            "n_lists": self.n_lists,
+            "nprobe": self.nprobe,
+            "mean_list_size": round(float(sizes.mean()), 1) if len(sizes) else 0.0,
+            "max_list_size": int(sizes.max()) if len(sizes) else 0
+        }
+
+def load_or_build(matrix: np.ndarray, directory: Path, n_lists: int = 0, nprobe: int = 8) -> IVFIndex:
+    """
+    Carga el índice guardado en `directory` si se construyó con `matrix`; si no, lo
+    construye y lo guarda.
+    """
+    source_hash = matrix_hash(normalize_rows(matrix))
+    try:
+        index = IVFIndex.load(directory, nprobe)
+        if index.source_hash == source_hash and (not n_lists or index.n_lists == n_lists):
+            logger.info(f"Índice ANN cargado desde {directory} ({index.size} carreras, {index.n_lists} listas)")
+            return index
+        logger.info("El índice ANN guardado no corresponde al catálogo; se reconstruye")
+    except (OSError, ValueError, KeyError) as e:
+        logger.info(f"No hay índice ANN utilizable en {directory}: {e}")
+
+    start = time.perf_counter()
+    index = IVFIndex.build(matrix, n_lists, nprobe)
+    logger.info(f"Índice ANN construido en {time.perf_counter() - start:.1f}s "
+                f"({index.size} carreras, {index.n_lists} listas)")
+    try:
+        index.save(directory)
+    except OSError as e:
+        logger.warning(f"No se pudo guardar el índice ANN: {e}")
+    return index
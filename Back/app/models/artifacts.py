@@ -0,0 +1,251 @@
+"""
+Registro versionado de artefactos de modelos.
+
+Estructura en disco (por defecto en app/data/model_registry):
+
+    <tipo>/
+        CURRENT              -> nombre de la versión publicada (ej. "v3")
+        .training.lock       -> lock del proceso que entrena este tipo en el nodo
+        v1/
+            manifest.json
+            <archivos del modelo>
+        v2/
+            ...
+
+Cada versión es inmutable. El manifiesto registra las clases (en el orden de las columnas
+de probabilidad del modelo), el orden de las 16 características, el hash de los datos de
+entrenamiento, las métricas y el sha256 de cada archivo. Los loaders verifican el
+manifiesto antes de usar una versión.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos, cada proceso entrena por su cuenta
+    fcntl = None
+
+from app.core.config import settings
+from app.models.features import FEATURE_NAMES
+
+logger = logging.getLogger("artifacts")
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+TRAINING_LOCK_FILE = ".training.lock"
+
+class ArtifactError(Exception):
+    """El artefacto no existe o no coincide con su manifiesto."""
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def training_data_hash(X: np.ndarray, y: np.ndarray) -> str:
+    """Hash de los datos de entrenamiento, para saber con qué datos se entrenó cada versión."""
+    digest = hashlib.sha256()
+    for array in (X, y):
+        array = np.ascontiguousarray(array)
+        digest.update(str(array.dtype).encode())
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+def directory_checksums(directory: Path, manifest_name: str = MANIFEST_FILE) -> Dict[str, str]:
+    """sha256 de todos los archivos de un directorio (rutas relativas, sin su manifiesto)."""
+    checksums = {}
+    for path in sorted(directory.rglob("*")):
+        if path.is_file() and path.name != manifest_name:
+            checksums[path.relative_to(directory).as_posix()] = file_sha256(path)
+    return checksums
+
+def verify_checksums(directory: Path, manifest: Dict[str, Any], label: str) -> None:
+    """
+    Verifica los archivos de un directorio contra los sha256 de su manifiesto.
+
+    Args:
+        directory: Directorio verificado (versión del registro o bundle)
+        manifest: Manifiesto con "files": ruta relativa -> sha256
+        label: Prefijo de los mensajes de error
+
+    Raises:
+        ArtifactError: si falta un archivo o un checksum no coincide
+    """
+    for relative_path, expected in manifest.get("files", {}).items():
+        path = Path(directory) / relative_path
+        if not path.exists():
+            raise ArtifactError(f"{label}: falta el archivo {relative_path}")
+        if file_sha256(path) != expected:
+            raise ArtifactError(f"{label}: checksum inválido para {relative_path}")
+
+class ArtifactStore:
+    """Versiones publicadas de un tipo de modelo ("neural" o "minimal")."""
+
+    def __init__(self, kind: str, root: Optional[Path] = None):
+        self.kind = kind
+        self.root = Path(root or settings.MODEL_REGISTRY_DIR) / kind
+
+    def list_versions(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        versions = [p.name for p in self.root.iterdir()
+                    if p.is_dir() and p.name.startswith("v") and p.name[1:].isdigit()]
+        return sorted(versions, key=lambda v: int(v[1:]))
+
+    def current_version(self) -> Optional[str]:
+        current_file = self.root / CURRENT_FILE
+        if not current_file.exists():
+            return None
+        return current_file.read_text(encoding="utf-8").strip() or None
+
+    def resolve(self, version: Optional[str] = None) -> Optional[str]:
+        """Devuelve la versión pedida o, si no se indica, la publicada en CURRENT."""
+        return version or self.current_version()
+
+    def version_dir(self, version: str) -> Path:
+        return self.root / version
+
+    def load_manifest(self, version: str) -> Dict[str, Any]:
+        manifest_path = self.version_dir(version) / MANIFEST_FILE
+        if not manifest_path.exists():
+            raise ArtifactError(f"La versión {self.kind}/{version} no tiene manifiesto")
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def verify(self, version: str) -> Dict[str, Any]:
+        """
+        Verifica una versión contra su manifiesto y lo devuelve.
+
+        Raises:
+            ArtifactError: si falta un archivo, un checksum no coincide o el orden de
+                características no es el que usa prepare_input_features
+        """
+        manifest = self.load_manifest(version)
+        directory = self.version_dir(version)
+
+        if manifest.get("feature_order") != FEATURE_NAMES:
+            raise ArtifactError(f"{self.kind}/{version}: el orden de características no coincide")
+
+        verify_checksums(directory, manifest, f"{self.kind}/{version}")
+        return manifest
+
+    def publish(self, write: Callable[[Path], None], classes: List[str],
+                training_hash: Optional[str] = None, metrics: Optional[Dict[str, Any]] = None,
+                make_current: bool = True) -> str:
+        """
+        Publica una versión nueva.
+
+        Args:
+            write: Función que escribe los archivos del modelo en el directorio recibido
+            classes: Nombres de las clases, en el orden de las columnas de probabilidad
+            training_hash: Hash de los datos de entrenamiento (ver training_data_hash)
+            metrics: Métricas de entrenamiento/validación
+            make_current: Si la versión nueva pasa a ser la publicada en CURRENT
+
+        Returns:
+            Nombre de la versión creada
+        """
+        os.makedirs(self.root, exist_ok=True)
+
+        # Escribir en un directorio temporal y renombrarlo: una versión nunca queda a medias
+        staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=self.root))
+        try:
+            write(staging)
+            manifest = {
+                "kind": self.kind,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "classes": [str(c) for c in classes],
+                "feature_order": FEATURE_NAMES,
+                "training_data_hash": training_hash,
+                "metrics": metrics or {},
+                "files": directory_checksums(staging)
+            }
+
+            version = self._rename_to_next_version(staging, manifest)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if make_current:
+            self.set_current(version)
+        logger.info(f"Artefacto {self.kind}/{version} publicado")
+        return version
+
+    def _rename_to_next_version(self, staging: Path, manifest: Dict[str, Any], attempts: int = 100) -> str:
+        """
+        Renombra `staging` a la siguiente versión libre y devuelve su nombre.
+
+        El rename es la reserva: si otro proceso publicó la misma versión entre la
+        numeración y el rename, el rename falla porque el destino existe y no está vacío,
+        y se reintenta con el número siguiente.
+        """
+        for _ in range(attempts):
+            versions = self.list_versions()
+            next_number = int(versions[-1][1:]) + 1 if versions else 1
+            version = f"v{next_number}"
+            manifest["version"] = version
+            with open(staging / MANIFEST_FILE, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            try:
+                os.rename(staging, self.version_dir(version))
+                return version
+            except OSError:
+                if not self.version_dir(version).exists():
+                    raise
+                logger.info(f"{self.kind}/{version} ya fue publicada por otro proceso; se usa el número siguiente")
+        raise ArtifactError(f"No se pudo reservar una versión nueva de {self.kind}")
+
+    def set_current(self, version: str) -> None:
+        """Marca `version` como la publicada (escritura atómica del archivo CURRENT)."""
+        if not self.version_dir(version).exists():
+            raise ArtifactError(f"La versión {self.kind}/{version} no existe")
+        # Archivo temporal propio del proceso: dos publicadores no comparten el temporal
+        fd, tmp = tempfile.mkstemp(prefix=f".{CURRENT_FILE}.", suffix=".tmp", dir=self.root)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(version)
+            os.replace(tmp, self.root / CURRENT_FILE)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    @contextmanager
+    def training_lock(self) -> Iterator[bool]:
+        """
+        Lock exclusivo (flock, sin esperar) para entrenar este tipo de modelo en el nodo.
+
+        Devuelve True al proceso que lo obtiene, que entrena y publica; los demás reciben
+        False y deben esperar a que cambie CURRENT. El sistema operativo libera el lock si
+        el proceso muere a mitad del entrenamiento.
+        """
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.root / TRAINING_LOCK_FILE, "a") as lock_file:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
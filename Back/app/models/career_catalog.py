@@ -0,0 +1,192 @@
+"""
+Catálogo de carreras en memoria, cargado una sola vez y compartido por todo el servidor.
+
+`get_catalog()` lee `app/data/careers.json` la primera vez que se usa y devuelve
+siempre el mismo `CareerCatalog`. El recomendador, los servicios neuronales y los
+endpoints del catálogo consultan este objeto en lugar de releer el JSON o recorrer la
+lista de carreras en cada petición:
+
+    catalog.get("Ciencia de Datos")      -> registro por nombre, O(1)
+    catalog.by_id(3)                     -> registro por id (fila del catálogo), O(1)
+    catalog.names_containing("Datos")    -> filas cuyo nombre contiene el texto (memoizado)
+    catalog.columns["universidad"]       -> columna precalculada (arreglo de NumPy)
+    catalog.unique("ubicacion")          -> valores distintos, ordenados
+    catalog.facets                       -> FacetIndex para los filtros
+
+El catálogo es inmutable: las filas están en el mismo orden que las filas de los
+embeddings, así que no se deben modificar los registros que devuelve.
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.facet_index import FacetIndex
+
+logger = logging.getLogger("career_catalog")
+
+CATALOG_PATH = Path(os.path.dirname(os.path.abspath(__file__))) / ".." / "data" / "careers.json"
+
+# Columnas precalculadas
+COLUMNS = ("nombre", "universidad", "ubicacion", "descripcion")
+
+# Catálogo mínimo de carreras STEM cuando no existe careers.json
+DEFAULT_CAREERS = [
+    {
+        "nombre": "Ingeniería en Biotecnología",
+        "universidad": "Tec de Monterrey",
+        "descripcion": "Carrera que combina biología y tecnología para el desarrollo de soluciones en salud, alimentos y medio ambiente.",
+        "ubicacion": "Querétaro"
+    },
+    {
+        "nombre": "Ciencia de Datos",
+        "universidad": "UNAM",
+        "descripcion": "Carrera enfocada en el análisis de grandes volúmenes de datos, aprendizaje automático y estadística aplicada.",
+        "ubicacion": "Ciudad de México"
+    },
+    {
+        "nombre": "Ingeniería Mecatrónica",
+        "universidad": "IPN",
+        "descripcion": "Combina mecánica, electrónica, control y programación para crear sistemas robotizados y automatizados.",
+        "ubicacion": "Ciudad de México"
+    },
+    {
+        "nombre": "Diseño UX",
+        "universidad": "IBERO",
+        "descripcion": "Enfocada en crear experiencias digitales centradas en el usuario, combinando diseño e investigación.",
+        "ubicacion": "Ciudad de México"
+    },
+    {
+        "nombre": "Ingeniería Ambiental",
+        "universidad": "UAEM",
+        "descripcion": "Carrera enfocada en el desarrollo de soluciones para problemas ambientales y sustentabilidad.",
+        "ubicacion": "Toluca"
+    }
+]
+
+class CareerCatalog:
+    """Catálogo inmutable de carreras con índices por nombre, id y faceta."""
+
+    def __init__(self, careers: Sequence[Mapping], path: Optional[Path] = None):
+        """
+        Args:
+            careers: Registros de carreras, en el orden de las filas de sus embeddings
+            path: Archivo del que se leyó el catálogo
+        """
+        self.path = Path(path) if path else None
+        # (mtime, tamaño, inodo) del archivo al cargarlo (ver get_catalog)
+        self.signature: Optional[Tuple[int, int, int]] = None
+        self.records: Tuple[Dict, ...] = tuple(dict(career) for career in careers)
+
+        # Nombre -> fila (si un nombre se repite, gana la primera aparición)
+        self._rows_by_name: Dict[str, int] = {}
+        # Id -> fila: el campo "id" del registro si existe, si no la posición en el catálogo
+        self._rows_by_id: Dict[int, int] = {}
+        for row, career in enumerate(self.records):
+            self._rows_by_name.setdefault(career["nombre"], row)
+            self._rows_by_id.setdefault(career.get("id", row), row)
+
+        self.columns: Dict[str, np.ndarray] = {
+            field: np.array([career.get(field, "") for career in self.records], dtype=object)
+            for field in COLUMNS
+        }
+        # Nombres en el orden del catálogo (lista para los servicios que la esperan)
+        self.names: List[str] = [career["nombre"] for career in self.records]
+        self.facets = FacetIndex(self.records)
+        self._unique: Dict[str, List[str]] = {}
+        self._name_matches: Dict[str, Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.records)
+
+    def __getitem__(self, row: int) -> Dict:
+        return self.records[row]
+
+    def get(self, name: str) -> Optional[Dict]:
+        """Registro de una carrera por nombre exacto, o None si no está en el catálogo."""
+        row = self._rows_by_name.get(name)
+        return self.records[row] if row is not None else None
+
+    def index_of(self, name: str) -> Optional[int]:
+        """Fila de una carrera por nombre exacto, o None si no está en el catálogo."""
+        return self._rows_by_name.get(name)
+
+    def by_id(self, career_id: int) -> Optional[Dict]:
+        """Registro de una carrera por id, o None si no existe."""
+        row = self._rows_by_id.get(career_id)
+        return self.records[row] if row is not None else None
+
+    def names_containing(self, fragment: str) -> Tuple[int, ...]:
+        """
+        Filas cuyo nombre contiene `fragment` (distingue mayúsculas y acentos).
+
+        El resultado se memoiza: las reglas de afinidad consultan siempre los mismos textos.
+        """
+        rows = self._name_matches.get(fragment)
+        if rows is None:
+            rows = tuple(row for row, name in enumerate(self.names) if fragment in name)
+            self._name_matches[fragment] = rows
+        return rows
+
+    def unique(self, field: str) -> List[str]:
+        """Valores distintos de un campo, ordenados (los registros sin el campo se omiten)."""
+        values = self._unique.get(field)
+        if values is None:
+            values = sorted(set(career[field] for career in self.records if field in career))
+            self._unique[field] = values
+        return values
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    """(mtime, tamaño, inodo) del archivo, o None si no existe."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+def load_catalog(path: Path = CATALOG_PATH) -> CareerCatalog:
+    """
+    Lee el catálogo desde `path`. Si el archivo no existe se escribe el catálogo por
+    defecto y se usa ese.
+    """
+    path = Path(path)
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            careers = json.load(f)
+    else:
+        careers = DEFAULT_CAREERS
+        os.makedirs(path.parent, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(careers, f, ensure_ascii=False, indent=2)
+        logger.warning(f"No se encontró {path}; se escribió el catálogo por defecto")
+    catalog = CareerCatalog(careers, path)
+    catalog.signature = _file_signature(path)
+    logger.info(f"Catálogo de carreras cargado: {len(catalog)} carreras desde {path}")
+    return catalog
+
+_catalog: Optional[CareerCatalog] = None
+_catalog_lock = threading.Lock()
+
+def get_catalog(refresh: bool = False) -> CareerCatalog:
+    """
+    Catálogo compartido del proceso (se carga en la primera llamada).
+
+    Args:
+        refresh: Volver a leer careers.json si cambió desde que se cargó. Los objetos
+            que ya tienen el catálogo anterior (el recomendador y sus embeddings) lo
+            conservan hasta reiniciar.
+    """
+    global _catalog
+    if _catalog is None or (refresh and _file_signature(_catalog.path) != _catalog.signature):
+        with _catalog_lock:
+            if _catalog is None or (refresh and _file_signature(_catalog.path) != _catalog.signature):
+                _catalog = load_catalog()
+    return _catalog
@@ -1,91 +1,130 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import numpy as np
-import json
-from pathlib import Path
-import os
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 
+from app.core.config import settings
+from app.models import ann_index, embedding_store
+from app.models.ann_index import IVFIndex, matrix_hash
+from app.models.career_catalog import get_catalog
+from app.models.embedding_cache import CareerEmbeddingCache, ProfileEmbeddingCache, cache_stem
+from app.models.embedding_store import EmbeddingStore
+from app.models.encoder import encoder_id, load_encoder
+from app.models.retrieval import top_k_indices
 class CareerRecommender:
+    MODEL_NAME = 'all-MiniLM-L6-v2'
+
     def __init__(self):
-        # Path to the career data
-        self.data_path = Path(os.path.dirname(os.path.abspath(__file__))) / ".." / "data" / "careers.json"
-        
-        # Load the career data if exists, otherwise use a default set
-        if self.data_path.exists():
-            with open(self.data_path, "r", encoding="utf-8") as f:
-                self.careers = json.load(f)
-        else:
-            # Default career data if file doesn't exist
-            self.careers = self._get_default_careers()
-            
-            # Save the default careers to file
-            os.makedirs(self.data_path.parent, exist_ok=True)
-            with open(self.data_path, "w", encoding="utf-8") as f:
-                json.dump(self.careers, f, ensure_ascii=False, indent=2)
+        # Shared in-memory catalog (name/id lookups, facet indexes, column arrays)
+        self.catalog = get_catalog()
+        self.careers = self.catalog.records
+        self.facet_index = self.catalog.facets
+        self.data_path = self.catalog.path
+        
+        # Embedding caches, keyed by encoder (model name and quantization variant)
+        self._init_embedding_caches(encoder_id(self.MODEL_NAME, settings.ENCODER_QUANTIZATION))
         
         # Initialize the sentence transformer model for text embeddings
         # In a production environment, you would want to load this once and reuse
         try:
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.model, variant = load_encoder(self.MODEL_NAME, settings.ENCODER_QUANTIZATION)
+            if encoder_id(self.MODEL_NAME, variant) != self.encoder_name:
+                # Quantization was requested but is not available: cache fp32 embeddings separately
+                self._init_embedding_caches(encoder_id(self.MODEL_NAME, variant))
             # Pre-compute embeddings for all career descriptions
             self.career_embeddings = self._compute_career_embeddings()
+            # L2-normalized (float16 by default) and memory-mapped, so all workers share one copy
+            self.career_store = self._load_career_store()
+            # Large catalogs are searched through an approximate (IVF) index
+            self.ann_index = self._load_ann_index()
+            # Warm the profile cache with the most frequent profiles from previous runs
+            self.profile_cache.load()
         except Exception as e:
             print(f"Error loading sentence transformer model: {e}")
             self.model = None
             self.career_embeddings = []
+            self.career_store = EmbeddingStore(np.zeros((0, 0), dtype=np.float32))
+            self.ann_index = None
     
-    def _get_default_careers(self) -> List[Dict]:
-        """Return a default set of STEM careers"""
-        return [
-            {
-                "nombre": "Ingeniería en Biotecnología",
-                "universidad": "Tec de Monterrey",
-                "descripcion": "Carrera que combina biología y tecnología para el desarrollo de soluciones en salud, alimentos y medio ambiente.",
-                "ubicacion": "Querétaro"
-            },
-            {
-                "nombre": "Ciencia de Datos",
-                "universidad": "UNAM",
-                "descripcion": "Carrera enfocada en el análisis de grandes volúmenes de datos, aprendizaje automático y estadística aplicada.",
-                "ubicacion": "Ciudad de México"
-            },
-            {
-                "nombre": "Ingeniería Mecatrónica",
-                "universidad": "IPN",
-                "descripcion": "Combina mecánica, electrónica, control y programación para crear sistemas robotizados y automatizados.",
-                "ubicacion": "Ciudad de México"
-            },
-            {
-                "nombre": "Diseño UX",
-                "universidad": "IBERO",
-                "descripcion": "Enfocada en crear experiencias digitales centradas en el usuario, combinando diseño e investigación.",
-                "ubicacion": "Ciudad de México"
-            },
-            {
-                "nombre": "Ingeniería Ambiental",
-                "universidad": "UAEM",
-                "descripcion": "Carrera enfocada en el desarrollo de soluciones para problemas ambientales y sustentabilidad.",
-                "ubicacion": "Toluca"
-            }
-        ]
+    def _init_embedding_caches(self, encoder_name: str) -> None:
+        """Create the career and profile embedding caches for one encoder variant"""
+        self.encoder_name = encoder_name
+        
+        # On-disk cache of career embeddings, keyed by encoder name and description hash
+        self.embedding_cache = CareerEmbeddingCache(self.data_path.parent / "embeddings", encoder_name)
+        
+        # Bounded LRU of profile text -> embedding, optionally persisted next to the career embeddings
+        self.profile_cache = ProfileEmbeddingCache(
+            encoder_name,
+            settings.PROFILE_EMBEDDING_CACHE_SIZE,
+            self.data_path.parent / "embeddings" if settings.PROFILE_EMBEDDING_CACHE_PERSIST else None
+        )
     
     def _compute_career_embeddings(self) -> np.ndarray:
-        """Compute embeddings for all career descriptions"""
+        """
+        Compute embeddings for all career descriptions.
+        
+        Only careers whose description is new or changed since the last run are
+        encoded; the rest are reused from the on-disk cache.
+        """
         if not self.model:
             return np.array([])
             
         descriptions = [career["descripcion"] for career in self.careers]
-        return self.model.encode(descriptions)
+        return self.embedding_cache.get_embeddings(descriptions, self.model.encode)
     
-    def _generate_profile_embedding(self, mbti_code: str, mbti_weights: Dict[str, float], 
-                                   mi_scores: Dict[str, float]) -> np.ndarray:
+    def _load_career_store(self) -> EmbeddingStore:
         """
-        Generate a text representation of the user profile and convert to embedding
+        Load (or build and persist) the serving matrix used for exact search:
+        normalized career embeddings in EMBEDDING_STORE_DTYPE, optionally PCA-reduced
+        to EMBEDDING_STORE_PCA_DIMS, opened read-only with a memory map
         """
-        if not self.model:
-            return np.array([])
+        directory = self.data_path.parent / "embeddings" / cache_stem("career_store", self.encoder_name)
+        return embedding_store.load_or_build(
+            self.career_embeddings,
+            directory,
+            matrix_hash(self.career_embeddings),
+            settings.EMBEDDING_STORE_DTYPE,
+            settings.EMBEDDING_STORE_PCA_DIMS,
+            settings.EMBEDDING_STORE_MIN_AGREEMENT
+        )
+    
+    def _load_ann_index(self) -> Optional[IVFIndex]:
+        """
+        Load (or build and persist) the ANN index when the catalog has at least
+        ANN_MIN_CATALOG careers; smaller catalogs use exact search
+        """
+        if settings.ANN_MIN_CATALOG <= 0 or len(self.career_embeddings) < settings.ANN_MIN_CATALOG:
+            return None
+        directory = self.data_path.parent / "embeddings" / cache_stem("ann_index", self.encoder_name)
+        return ann_index.load_or_build(self.career_embeddings, directory, settings.ANN_LISTS, settings.ANN_NPROBE)
+    
+    def get_career(self, name: str) -> Optional[Dict]:
+        """Return the catalog entry for a career name, or None if it is not in the catalog"""
+        return self.catalog.get(name)
+    
+    def _filter_mask(self, location_filter: str = None, filters: Optional[Dict[str, List[str]]] = None,
+                     filter_mode: str = "and") -> Optional[np.ndarray]:
+        """
+        Combine the location filter and the facet filters into a mask over the catalog
+        
+        A location_filter that matches no career is ignored, as it was before the facet
+        filters existed; any other facet that matches nothing leaves no career under AND.
+        
+        Returns:
+            Boolean vector over self.careers, or None when no filter was given
             
+        Raises:
+            ValueError: for a facet the catalog does not index (see FacetIndex.mask)
+        """
+        facets = {field: list(values) for field, values in (filters or {}).items()}
+        if location_filter and self.facet_index.match("ubicacion", location_filter).any():
+            facets.setdefault("ubicacion", []).append(location_filter)
+        return self.facet_index.mask(facets, filter_mode)
+    
+    def _profile_text(self, mbti_code: str, mbti_weights: Dict[str, float], 
+                      mi_scores: Dict[str, float]) -> str:
+        """
+        Build the textual description of a user profile that gets embedded
+        """
         # Create a textual profile description
         profile_text = f"Perfil MBTI: {mbti_code}. "
         
@@ -99,12 +138,27 @@ class CareerRecommender:
         if strong_dimensions:
             profile_text += f"Preferencias fuertes en dimensiones: {', '.join(strong_dimensions)}."
         
+        return profile_text
+    
+    def _generate_profile_embedding(self, mbti_code: str, mbti_weights: Dict[str, float], 
+                                   mi_scores: Dict[str, float]) -> np.ndarray:
+        """
+        Generate a text representation of the user profile and convert to embedding
+        
+        Repeated profiles are served from the profile cache without running the transformer.
+        """
+        if not self.model:
+            return np.array([])
+        
         # Convert to embedding
-        return self.model.encode([profile_text])[0]
+        text = self._profile_text(mbti_code, mbti_weights, mi_scores)
+        return self.profile_cache.get_embeddings([text], self.model.encode)[0]
     
     def recommend_careers(self, mbti_code: str, mbti_vector: List[int], 
                          mbti_weights: Dict[str, float], mi_scores: Dict[str, float], 
-                         top_n: int = 3, location_filter: str = None) -> List[Dict]:
+                         top_n: int = 3, location_filter: str = None,
+                         filters: Optional[Dict[str, List[str]]] = None,
+                         filter_mode: str = "and") -> List[Dict]:
         """
         Recommend careers based on MBTI and MI profiles.
         
@@ -118,49 +172,102 @@ class CareerRecommender:
             mi_scores: Dictionary of multiple intelligence scores
             top_n: Number of recommendations to return
             location_filter: Optional location to filter results
+            filters: Optional facet filters (ubicacion, universidad) -> values; values of
+                one facet are ORed
+            filter_mode: "and" to require every facet, "or" to accept any of them
             
         Returns:
             List of career recommendations with match scores
         """
+        mask = self._filter_mask(location_filter, filters, filter_mode)
         if not self.model or len(self.career_embeddings) == 0:
             # Fallback if no model is available: rule-based matching
-            return self._rule_based_recommendations(mbti_code, mi_scores, top_n, location_filter)
+            return self._rule_based_recommendations(mbti_code, mi_scores, top_n, mask)
         
         # Generate embedding for the user profile
         profile_embedding = self._generate_profile_embedding(mbti_code, mbti_weights, mi_scores)
         
-        # Calculate similarity scores
-        similarities = cosine_similarity([profile_embedding], self.career_embeddings)[0]
+        # Return top careers with match scores
+        indices, scores = self._top_careers(profile_embedding, top_n, mask)[0]
+        return self._embedding_recommendations(indices, scores)
+    
+    def recommend_careers_batch(self, profiles: List[Tuple[str, List[int], Dict[str, float], Dict[str, float]]],
+                                top_n: int = 3, location_filter: str = None,
+                                filters: Optional[Dict[str, List[str]]] = None,
+                                filter_mode: str = "and") -> List[List[Dict]]:
+        """
+        Recommend careers for many profiles at once.
         
-        # Get indices of top careers
-        if location_filter:
-            # Filter by location if specified
-            location_indices = [i for i, career in enumerate(self.careers) 
-                               if location_filter.lower() in career["ubicacion"].lower()]
-            if location_indices:
-                similarities = [similarities[i] if i in location_indices else -1 for i in range(len(similarities))]
+        Profile texts missing from the profile cache are encoded in a single call to the
+        sentence transformer, and all profiles are scored against the catalog with one
+        similarity matrix.
         
-        # Get top N indices
-        top_indices = np.argsort(similarities)[::-1][:top_n]
+        Args:
+            profiles: List of (mbti_code, mbti_vector, mbti_weights, mi_scores) tuples
+            top_n: Number of recommendations per profile
+            location_filter: Optional location to filter results
+            filters: Optional facet filters, as in recommend_careers
+            filter_mode: "and" or "or", as in recommend_careers
+            
+        Returns:
+            One list of recommendations per profile, in input order, same format as recommend_careers
+        """
+        if not profiles:
+            return []
+        mask = self._filter_mask(location_filter, filters, filter_mode)
+        if not self.model or len(self.career_embeddings) == 0:
+            return [
+                self._rule_based_recommendations(mbti_code, mi_scores, top_n, mask)
+                for mbti_code, _, _, mi_scores in profiles
+            ]
         
-        # Return top careers with match scores
+        texts = [self._profile_text(mbti_code, mbti_weights, mi_scores)
+                 for mbti_code, _, mbti_weights, mi_scores in profiles]
+        profile_embeddings = self.profile_cache.get_embeddings(texts, self.model.encode)
+        return [
+            self._embedding_recommendations(indices, scores)
+            for indices, scores in self._top_careers(profile_embeddings, top_n, mask)
+        ]
+    
+    def _top_careers(self, profile_embeddings: np.ndarray, top_n: int,
+                     mask: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Top N careers for each profile embedding among those allowed by `mask`
+        
+        Uses the ANN index when there is one, otherwise exact search against the
+        memory-mapped career store (argpartition, without sorting the whole catalog).
+        
+        Returns:
+            One (catalog indices, similarities) pair per profile, best first
+        """
+        if self.ann_index is not None:
+            return self.ann_index.search(profile_embeddings, top_n, mask)
+        
+        similarities = np.atleast_2d(self.career_store.scores(profile_embeddings))
+        top = top_k_indices(similarities, top_n, mask)
+        return [(indices, similarities[row, indices]) for row, indices in enumerate(top)]
+    
+    def _embedding_recommendations(self, indices: np.ndarray, scores: np.ndarray) -> List[Dict]:
+        """Format the top careers of one profile, keeping only positive matches"""
         recommendations = []
-        for idx in top_indices:
-            if similarities[idx] > 0:  # Only include positive matches
+        for idx, score in zip(indices, scores):
+            if score > 0:  # Only include positive matches
                 career = self.careers[idx]
                 recommendations.append({
                     "nombre": career["nombre"],
                     "universidad": career["universidad"],
                     "ciudad": career["ubicacion"],
-                    "match_score": float(similarities[idx])
+                    "match_score": float(score),
+                    "engine": "embedding"
                 })
-        
         return recommendations
     
     def _rule_based_recommendations(self, mbti_code: str, mi_scores: Dict[str, float], 
-                                   top_n: int = 3, location_filter: str = None) -> List[Dict]:
+                                   top_n: int = 3, mask: Optional[np.ndarray] = None) -> List[Dict]:
         """
         Simple rule-based career matching as fallback if ML model is not available
+        
+        Only careers allowed by `mask` (see _filter_mask) are recommended.
         """
         matches = []
         
@@ -187,38 +294,42 @@ class CareerRecommender:
         # Get career affinities for the MBTI type
         affinities = mbti_career_affinities.get(mbti_code, ["Ciencia de Datos", "Ingeniería Mecatrónica"])
         
-        # Find the matching careers in our database
+        # Find the matching careers in the catalog (name matches are memoized per affinity)
+        matched_names = set()
         for career_name in affinities:
-            for career in self.careers:
-                if location_filter and location_filter.lower() not in career["ubicacion"].lower():
+            for idx in self.catalog.names_containing(career_name):
+                if mask is not None and not mask[idx]:
                     continue
                     
-                if career_name in career["nombre"]:
-                    # Calculate a synthetic match score based on MI
-                    match_score = 0.7 + (sum(mi_scores.values()) / len(mi_scores)) * 0.2
-                    matches.append({
-                        "nombre": career["nombre"],
-                        "universidad": career["universidad"],
-                        "ciudad": career["ubicacion"],
-                        "match_score": float(match_score)
-                    })
+                career = self.careers[idx]
+                # Calculate a synthetic match score based on MI
+                match_score = 0.7 + (sum(mi_scores.values()) / len(mi_scores)) * 0.2
+                matched_names.add(career["nombre"])
+                matches.append({
+                    "nombre": career["nombre"],
+                    "universidad": career["universidad"],
+                    "ciudad": career["ubicacion"],
+                    "match_score": float(match_score),
+                    "engine": "rules"
+                })
         
         # If we still need more recommendations, add others
-        for career in self.careers:
+        candidates = range(len(self.careers)) if mask is None else np.flatnonzero(mask)
+        for idx in candidates:
             if len(matches) >= top_n:
                 break
                 
-            if location_filter and location_filter.lower() not in career["ubicacion"].lower():
-                continue
-                
+            career = self.careers[idx]
             # Check if career is already in matches
-            if not any(match["nombre"] == career["nombre"] for match in matches):
+            if career["nombre"] not in matched_names:
+                matched_names.add(career["nombre"])
                 match_score = 0.65  # Lower match score for these additional recommendations
                 matches.append({
                     "nombre": career["nombre"],
                     "universidad": career["universidad"],
                     "ciudad": career["ubicacion"],
-                    "match_score": float(match_score)
+                    "match_score": float(match_score),
+                    "engine": "rules"
                 })
         
         # Return top N matches
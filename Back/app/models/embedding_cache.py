@@ -0,0 +1,311 @@
+import errno
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger("embedding_cache")
+
+def content_hash(text: str) -> str:
+    """Hash estable del texto de una carrera, usado como llave de su embedding."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def cache_stem(prefix: str, model_name: str) -> str:
+    return prefix + "__" + re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+
+def write_atomically(path: Path, write: Callable[[Any], None]) -> None:
+    """
+    Escribe `path` con `write(f)` en un archivo temporal propio del proceso (mismo
+    directorio) y lo reemplaza con un solo `os.replace`: los lectores ven el archivo
+    anterior o el nuevo completo, y varios workers pueden guardar a la vez sin pisarse.
+    """
+    os.makedirs(path.parent, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+def replace_directory(directory: Path, write: Callable[[Path], None],
+                      keep_existing: Callable[[Path], bool]) -> bool:
+    """
+    Escribe un directorio con `write(staging)` en un temporal propio del proceso (mismo
+    directorio padre) y lo publica con `os.rename`, sin borrar antes el destino.
+
+    Si `directory` ya existe y `keep_existing(directory)` es True (ej. mismo hash de
+    origen), se conserva y se descarta lo escrito. Si hay que reemplazarlo, el anterior se
+    retira con un rename y se borra después de publicar el nuevo: los workers que ya lo
+    tienen abierto con memory-map conservan sus archivos.
+
+    Returns:
+        True si se publicó el directorio nuevo, False si se conservó el existente
+    """
+    directory = Path(directory)
+    if directory.exists() and keep_existing(directory):
+        return False
+    os.makedirs(directory.parent, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=directory.parent, prefix=f".{directory.name}.", suffix=".tmp"))
+    retired = []
+    try:
+        write(staging)
+        for _ in range(10):
+            try:
+                os.rename(staging, directory)
+                return True
+            except OSError as e:
+                if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                    raise
+            # Otro worker publicó mientras se escribía: se conserva si es equivalente
+            if keep_existing(directory):
+                shutil.rmtree(staging, ignore_errors=True)
+                return False
+            retired.append(Path(tempfile.mkdtemp(dir=directory.parent, prefix=f".{directory.name}.", suffix=".old")))
+            try:
+                os.rename(directory, retired[-1] / directory.name)
+            except FileNotFoundError:
+                pass
+        raise OSError(f"No se pudo publicar {directory}")
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    finally:
+        for path in retired:
+            shutil.rmtree(path, ignore_errors=True)
+
+class CareerEmbeddingCache:
+    """
+    Caché persistente en disco de los embeddings del catálogo de carreras.
+
+    Cada fila del archivo `.npy` (cargado con memory-mapping) guarda juntos el hash del
+    texto de una carrera y su embedding, así que el hash y el vector nunca pueden quedar
+    desalineados. Hay un archivo por modelo (el nombre del modelo va en el nombre del
+    archivo), así que cambiar de modelo nunca reutiliza embeddings de otro. Al arrancar
+    solo se codifican las carreras nuevas o modificadas.
+    """
+
+    def __init__(self, cache_dir: Path, model_name: str):
+        self.cache_dir = Path(cache_dir)
+        self.model_name = model_name
+        stem = cache_stem("career_embeddings", model_name)
+        self.matrix_path = self.cache_dir / f"{stem}.npy"
+
+    def _load(self) -> Tuple[List[str], Optional[np.ndarray]]:
+        """Carga los hashes y la matriz guardados. Devuelve ([], None) si no son válidos."""
+        if not self.matrix_path.exists():
+            return [], None
+        try:
+            rows = np.load(self.matrix_path, mmap_mode="r", allow_pickle=False)
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo leer la caché de embeddings: {e}")
+            return [], None
+
+        if rows.dtype.names != ("hash", "vector") or rows.ndim != 1:
+            logger.warning("Caché de embeddings con formato anterior o inconsistente; se descartará")
+            return [], None
+        return [h.decode("ascii") for h in rows["hash"]], rows["vector"]
+
+    def _save(self, hashes: List[str], matrix: np.ndarray) -> None:
+        """Escribe hashes y matriz en un solo archivo, reemplazado de forma atómica."""
+        rows = np.empty(len(hashes), dtype=[("hash", "S64"), ("vector", "<f4", (matrix.shape[1],))])
+        rows["hash"] = [h.encode("ascii") for h in hashes]
+        rows["vector"] = matrix
+        write_atomically(self.matrix_path, lambda f: np.save(f, rows, allow_pickle=False))
+
+    def get_embeddings(self, texts: List[str],
+                       encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Devuelve los embeddings de `texts`, reutilizando los que ya están en disco.
+
+        Args:
+            texts: Textos de las carreras, en el orden del catálogo
+            encode: Función que codifica una lista de textos (ej. SentenceTransformer.encode)
+
+        Returns:
+            Matriz (len(texts) x dim) de embeddings en float32
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        hashes = [content_hash(text) for text in texts]
+        cached_hashes, cached_matrix = self._load()
+
+        # Mismo catálogo en el mismo orden: se usa directamente la matriz mapeada en memoria
+        if cached_matrix is not None and cached_hashes == hashes:
+            logger.info(f"Embeddings de {len(texts)} carreras cargados desde {self.matrix_path}")
+            return cached_matrix
+
+        cached_rows: Dict[str, int] = {h: i for i, h in enumerate(cached_hashes)}
+        missing = [i for i, h in enumerate(hashes) if h not in cached_rows]
+
+        encoded = None
+        if missing:
+            encoded = np.asarray(encode([texts[i] for i in missing]), dtype=np.float32)
+
+        dim = encoded.shape[1] if encoded is not None else cached_matrix.shape[1]
+        embeddings = np.empty((len(texts), dim), dtype=np.float32)
+        reused = [i for i, h in enumerate(hashes) if h in cached_rows]
+        if reused:
+            embeddings[reused] = cached_matrix[[cached_rows[hashes[i]] for i in reused]]
+        if missing:
+            embeddings[missing] = encoded
+
+        logger.info(f"Embeddings de carreras: {len(reused)} reutilizados, {len(missing)} codificados")
+        try:
+            self._save(hashes, embeddings)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la caché de embeddings: {e}")
+        return embeddings
+
+class ProfileEmbeddingCache:
+    """
+    Caché LRU de texto de perfil -> embedding, con persistencia opcional en disco.
+
+    El texto de un perfil (código MBTI, las 3 inteligencias más fuertes con 2 decimales y
+    las dimensiones fuertes) tiene un espacio de valores pequeño, así que los perfiles
+    repetidos se sirven sin pasar por el transformer. Se cuenta cuántas veces se pide
+    cada texto: `save` guarda los `maxsize` más frecuentes y `load` precarga la caché con
+    ellos al arrancar. Textos, conteos y matriz se guardan juntos en un solo `.npz`.
+    """
+
+    def __init__(self, model_name: str, maxsize: int = 2048, cache_dir: Optional[Path] = None):
+        """
+        Args:
+            model_name: Modelo de embeddings (la caché nunca mezcla embeddings de modelos distintos)
+            maxsize: Número máximo de perfiles en memoria (0 desactiva la caché)
+            cache_dir: Directorio donde persistir la caché (None para no persistir)
+        """
+        self.model_name = model_name
+        self.cache = LRUCache(maxsize, ttl=0)
+        self.cache.bind_version(model_name)
+        self._counts: Counter = Counter()
+        self._counts_lock = threading.Lock()
+        self.warmed = 0
+        if cache_dir is not None:
+            stem = cache_stem("profile_embeddings", model_name)
+            self.matrix_path: Optional[Path] = Path(cache_dir) / f"{stem}.npz"
+        else:
+            self.matrix_path = None
+
+    def _count(self, texts: List[str]) -> None:
+        maxsize = self.cache.maxsize
+        with self._counts_lock:
+            self._counts.update(texts)
+            # Acotar el contador: se conservan los textos más frecuentes
+            if len(self._counts) > 8 * maxsize:
+                self._counts = Counter(dict(self._counts.most_common(4 * maxsize)))
+
+    def get_embeddings(self, texts: List[str],
+                       encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Devuelve los embeddings de `texts`, codificando solo los que no están en caché.
+
+        Args:
+            texts: Textos de los perfiles
+            encode: Función que codifica una lista de textos (ej. SentenceTransformer.encode)
+
+        Returns:
+            Matriz (len(texts) x dim) de embeddings
+        """
+        if not self.cache.enabled:
+            return np.asarray(encode(texts))
+        self._count(texts)
+
+        found = [self.cache.get(text) for text in texts]
+        missing = list(dict.fromkeys(text for text, embedding in zip(texts, found) if embedding is None))
+        if missing:
+            encoded = dict(zip(missing, np.asarray(encode(missing))))
+            for text, embedding in encoded.items():
+                self.cache.set(text, embedding)
+            found = [embedding if embedding is not None else encoded[text]
+                     for text, embedding in zip(texts, found)]
+        return np.stack(found)
+
+    def load(self) -> int:
+        """
+        Precarga la caché con los perfiles guardados por `save`.
+
+        Returns:
+            Número de perfiles cargados
+        """
+        if self.matrix_path is None or not self.cache.enabled:
+            return 0
+        if not self.matrix_path.exists():
+            return 0
+        try:
+            with np.load(self.matrix_path, allow_pickle=False) as data:
+                model_name = str(data["model_name"])
+                texts = data["texts"].tolist()
+                counts = data["counts"].tolist()
+                matrix = data["matrix"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"No se pudo leer la caché de embeddings de perfiles: {e}")
+            return 0
+
+        if (model_name != self.model_name or matrix.ndim != 2
+                or matrix.shape[0] != len(texts) or len(counts) != len(texts)):
+            logger.warning("Caché de embeddings de perfiles inconsistente; se descartará")
+            return 0
+
+        # Guardados del más al menos frecuente: se insertan al revés para que los más
+        # frecuentes queden como los usados más recientemente
+        limit = min(len(texts), self.cache.maxsize)
+        for row in reversed(range(limit)):
+            self.cache.set(texts[row], matrix[row])
+        with self._counts_lock:
+            self._counts.update(dict(zip(texts, counts)))
+        self.warmed = limit
+        logger.info(f"{limit} embeddings de perfiles precargados desde {self.matrix_path}")
+        return limit
+
+    def save(self) -> int:
+        """
+        Guarda los perfiles en caché, del más al menos frecuente, de forma atómica.
+
+        Returns:
+            Número de perfiles guardados
+        """
+        if self.matrix_path is None or not self.cache.enabled:
+            return 0
+        entries = dict(self.cache.items())
+        if not entries:
+            return 0
+        with self._counts_lock:
+            counts = dict(self._counts)
+        texts = sorted(entries, key=lambda text: counts.get(text, 0), reverse=True)
+
+        arrays = {
+            "model_name": np.array(self.model_name),
+            "texts": np.array(texts, dtype=str),
+            "counts": np.array([counts.get(text, 0) for text in texts], dtype=np.int64),
+            "matrix": np.stack([entries[text] for text in texts]).astype(np.float32)
+        }
+        try:
+            write_atomically(self.matrix_path, lambda f: np.savez(f, **arrays))
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la caché de embeddings de perfiles: {e}")
+            return 0
+        return len(texts)
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas de la caché LRU más los perfiles precargados desde disco."""
+        return {
+            **self.cache.stats(),
+            "warmed_from_disk": self.warmed,
+            "path": str(self.matrix_path) if self.matrix_path else None
+        }
@@ -0,0 +1,257 @@
+"""
+Matriz de embeddings del catálogo lista para servir, compartida por todos los workers.
+
+Los embeddings de las carreras se guardan normalizados en float16 (la mitad que float32)
+y, opcionalmente, reducidos con PCA a `pca_dims` dimensiones. Cada worker abre el
+archivo con memory-map de solo lectura, así que el catálogo ocupa una sola copia en la
+caché de páginas del nodo sin importar cuántos workers haya. Las consultas se puntúan por
+bloques de filas, convirtiendo a float32 solo el bloque en curso.
+
+Al construir la matriz se mide cuánto se parece su ranking al de la matriz float32
+completa (`ranking_agreement`); el recomendador la descarta si el acuerdo queda por
+debajo de EMBEDDING_STORE_MIN_AGREEMENT.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.models.embedding_cache import replace_directory
+from app.models.retrieval import normalize_rows, top_k_indices
+
+logger = logging.getLogger("embedding_store")
+
+# 2^(127 - 15): lleva el exponente de float16 (sesgo 15) al de float32 (sesgo 127)
+_HALF_EXPONENT_SCALE = np.float32(2.0 ** 112)
+
+def upcast_half(block: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """
+    Convierte un bloque float16 a float32 en `out`, sin asignar memoria nueva.
+
+    Copia los bits de exponente y mantisa a su posición en float32 y reescala el
+    exponente con una multiplicación, que también resuelve los subnormales; es exacto
+    para valores finitos y unas dos veces más rápido que `astype` en NumPy.
+    """
+    bits = out.view(np.uint32)
+    np.copyto(bits, block.view(np.uint16), casting="unsafe")
+    sign = bits & 0x8000
+    bits &= 0x7fff
+    bits <<= 13
+    out *= _HALF_EXPONENT_SCALE
+    sign <<= 16
+    bits |= sign
+    return out
+
+class EmbeddingStore:
+    """Matriz de embeddings normalizada (float16 o float32, opcionalmente PCA) en memory-map."""
+
+    def __init__(self, matrix: np.ndarray, mean: Optional[np.ndarray] = None,
+                 components: Optional[np.ndarray] = None, metadata: Optional[Dict[str, Any]] = None,
+                 block_rows: int = 2048):
+        """
+        Args:
+            matrix: Matriz N x d de embeddings normalizados (d = D o pca_dims)
+            mean: Media de los embeddings originales (solo con PCA)
+            components: Matriz pca_dims x D de componentes principales (solo con PCA)
+            metadata: Formato, hash de origen y métricas de calidad
+            block_rows: Filas convertidas a float32 por bloque al puntuar
+        """
+        self.matrix = matrix
+        self.mean = mean
+        self.components = components
+        self.metadata = metadata or {}
+        self.block_rows = block_rows
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.matrix.nbytes)
+
+    @classmethod
+    def from_embeddings(cls, embeddings: np.ndarray, dtype: str = "float16",
+                        pca_dims: int = 0, source_hash: Optional[str] = None) -> "EmbeddingStore":
+        """
+        Construye la matriz en memoria a partir de los embeddings originales.
+
+        Args:
+            embeddings: Matriz N x D de embeddings sin normalizar
+            dtype: "float16" o "float32"
+            pca_dims: Dimensiones tras PCA (0 = sin reducción)
+            source_hash: Hash de los embeddings de origen (ver ann_index.matrix_hash)
+        """
+        vectors = normalize_rows(embeddings)
+        mean = components = None
+        if pca_dims and pca_dims < vectors.shape[1] and len(vectors) > pca_dims:
+            mean = vectors.mean(axis=0)
+            # Componentes principales de los embeddings centrados (SVD económica)
+            _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+            components = np.ascontiguousarray(vt[:pca_dims], dtype=np.float32)
+            vectors = normalize_rows((vectors - mean) @ components.T)
+        metadata = {
+            "size": int(len(vectors)),
+            "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+            "dtype": dtype,
+            "pca_dims": int(components.shape[0]) if components is not None else 0,
+            "source_hash": source_hash
+        }
+        return cls(np.ascontiguousarray(vectors, dtype=dtype), mean, components, metadata)
+
+    def project(self, queries: np.ndarray) -> np.ndarray:
+        """Lleva consultas del espacio del encoder al de la matriz, normalizadas en float32."""
+        queries = normalize_rows(queries)
+        if self.components is not None:
+            queries = normalize_rows((queries - self.mean) @ self.components.T)
+        return queries
+
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Similitud coseno de las consultas contra todo el catálogo.
+
+        Args:
+            queries: Vector de D o matriz Q x D de embeddings sin normalizar
+
+        Returns:
+            Vector de N (o matriz Q x N) de similitudes en float32
+        """
+        projected = self.project(queries)
+        single = projected.ndim == 1
+        projected = np.atleast_2d(projected)
+        result = np.empty((len(projected), len(self.matrix)), dtype=np.float32)
+        if self.matrix.dtype == np.float32:
+            np.matmul(projected, self.matrix.T, out=result)
+            return result[0] if single else result
+        buffer = np.empty((min(self.block_rows, len(self.matrix)), self.matrix.shape[1]), dtype=np.float32)
+        for start in range(0, len(self.matrix), self.block_rows):
+            rows = len(self.matrix[start:start + self.block_rows])
+            block = upcast_half(self.matrix[start:start + rows], buffer[:rows])
+            result[:, start:start + rows] = projected @ block.T
+        return result[0] if single else result
+
+    def ranking_agreement(self, embeddings: np.ndarray, queries: np.ndarray, k: int = 10) -> Dict[str, float]:
+        """
+        Compara el ranking de esta matriz con el de la matriz float32 completa.
+
+        Returns:
+            Solapamiento medio del top-k, fracción de consultas con el mismo primer
+            resultado y máxima diferencia absoluta de similitud
+        """
+        exact_scores = np.atleast_2d(normalize_rows(queries) @ normalize_rows(embeddings).T)
+        store_scores = np.atleast_2d(self.scores(queries))
+        k = min(k, exact_scores.shape[1])
+        exact = top_k_indices(exact_scores, k)
+        approx = top_k_indices(store_scores, k)
+        overlap = [len(np.intersect1d(a, b)) / k for a, b in zip(exact, approx)] if k else [1.0]
+        return {
+            "topk_overlap": float(np.mean(overlap)),
+            "top1_agreement": float(np.mean(exact[:, 0] == approx[:, 0])) if k else 1.0,
+            "max_abs_score_diff": float(np.abs(exact_scores - store_scores).max()) if exact_scores.size else 0.0,
+            "k": k
+        }
+
+    def save(self, directory: Path) -> bool:
+        """
+        Guarda la matriz (y la proyección PCA) en `directory`, de forma atómica.
+
+        Si `directory` ya tiene una matriz del mismo `source_hash` y formato pedido (otro
+        worker la guardó), se conserva: los workers que la tienen en memory-map no la pierden.
+
+        Returns:
+            True si se escribió la matriz, False si se conservó la existente
+        """
+        def write(staging: Path):
+            np.save(str(staging / "matrix.npy"), self.matrix, allow_pickle=False)
+            if self.components is not None:
+                np.save(str(staging / "mean.npy"), self.mean, allow_pickle=False)
+                np.save(str(staging / "components.npy"), self.components, allow_pickle=False)
+            with open(staging / "store.json", "w", encoding="utf-8") as f:
+                json.dump(self.metadata, f, indent=2)
+
+        def same_store(existing: Path) -> bool:
+            try:
+                with open(existing / "store.json", "r", encoding="utf-8") as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                return False
+            return (metadata.get("source_hash") == self.metadata.get("source_hash")
+                    and metadata.get("requested") == self.metadata.get("requested"))
+
+        return replace_directory(Path(directory), write, same_store)
+
+    @classmethod
+    def load(cls, directory: Path) -> "EmbeddingStore":
+        """
+        Abre una matriz guardada con `save` (memory-map de solo lectura).
+
+        Raises:
+            OSError, ValueError: si la matriz no existe o está incompleta
+        """
+        directory = Path(directory)
+        with open(directory / "store.json", "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        matrix = np.load(str(directory / "matrix.npy"), mmap_mode="r", allow_pickle=False)
+        mean = components = None
+        if metadata.get("pca_dims"):
+            mean = np.load(str(directory / "mean.npy"), allow_pickle=False)
+            components = np.load(str(directory / "components.npy"), allow_pickle=False)
+        if len(matrix) != metadata.get("size") or str(matrix.dtype) != metadata.get("dtype"):
+            raise ValueError(f"Matriz de embeddings incompleta en {directory}")
+        return cls(matrix, mean, components, metadata)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self),
+            "dtype": str(self.matrix.dtype),
+            "dim": int(self.matrix.shape[1]) if self.matrix.ndim == 2 else 0,
+            "pca_dims": self.metadata.get("pca_dims", 0),
+            "mb": round(self.nbytes / (1024 * 1024), 2),
+            "memory_mapped": isinstance(self.matrix, np.memmap),
+            "quality": self.metadata.get("quality")
+        }
+
+def load_or_build(embeddings: np.ndarray, directory: Path, source_hash: str, dtype: str = "float16",
+                  pca_dims: int = 0, min_agreement: float = 0.0, sample_queries: int = 256) -> EmbeddingStore:
+    """
+    Abre la matriz guardada en `directory` si corresponde a `embeddings` y al formato
+    pedido; si no, la construye, mide su calidad y la guarda.
+
+    Si el acuerdo del top-10 con la matriz float32 completa queda por debajo de
+    `min_agreement`, se construye en float32 sin PCA.
+
+    Returns:
+        Matriz abierta con memory-map
+    """
+    try:
+        store = EmbeddingStore.load(directory)
+        metadata = store.metadata
+        if metadata.get("source_hash") == source_hash and metadata.get("requested") == [dtype, pca_dims]:
+            return store
+        logger.info("La matriz de embeddings guardada no corresponde al catálogo o al formato; se reconstruye")
+    except (OSError, ValueError, KeyError) as e:
+        logger.info(f"No hay matriz de embeddings utilizable en {directory}: {e}")
+
+    store = EmbeddingStore.from_embeddings(embeddings, dtype, pca_dims, source_hash)
+    # Consultas de control: carreras del catálogo con ruido, como perfiles parecidos a una carrera
+    rng = np.random.default_rng(0)
+    queries = normalize_rows(embeddings)[rng.choice(len(embeddings), min(sample_queries, len(embeddings)), replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    quality = store.ranking_agreement(embeddings, queries)
+    if quality["topk_overlap"] < min_agreement and (dtype != "float32" or pca_dims):
+        logger.warning(f"Matriz {dtype}/PCA {pca_dims}: acuerdo del top-{quality['k']} "
+                       f"{quality['topk_overlap']:.3f} < {min_agreement}; se usa float32 completa")
+        store = EmbeddingStore.from_embeddings(embeddings, "float32", 0, source_hash)
+        quality = store.ranking_agreement(embeddings, queries)
+    store.metadata["requested"] = [dtype, pca_dims]
+    store.metadata["quality"] = quality
+    logger.info(f"Matriz de embeddings {store.metadata['dtype']} ({len(store)} carreras, "
+                f"{store.nbytes / (1024 * 1024):.1f} MB): acuerdo del top-{quality['k']} {quality['topk_overlap']:.3f}")
+    try:
+        store.save(directory)
+        return EmbeddingStore.load(directory)
+    except OSError as e:
+        logger.warning(f"No se pudo guardar la matriz de embeddings: {e}")
+        return store
@@ -0,0 +1,201 @@
+"""
+Carga del encoder de frases (sentence-transformers) del recomendador por embeddings.
+
+Con `quantization="int8"` las capas lineales del transformer se cuantizan con la
+cuantización dinámica de PyTorch (pesos en int8, activaciones cuantizadas al vuelo), que
+reduce la latencia y la memoria del encoder en CPU. Los embeddings cambian ligeramente,
+así que cada variante tiene su propio identificador (`encoder_id`) y sus propias cachés
+de embeddings. `encoder_parity` mide cuánto se parecen las recomendaciones de ambas
+variantes.
+
+Los pesos se leen de un bundle local (ENCODER_BUNDLE_DIR/<modelo>/) con un manifiesto
+de checksums, que `fetch_bundle` llena una sola vez. Con ENCODER_OFFLINE (por defecto)
+el encoder nunca consulta el hub de Hugging Face: sin bundle, la carga falla de
+inmediato en lugar de esperar a la red.
+
+    ENCODER_BUNDLE_DIR/
+        all-MiniLM-L6-v2/
+            bundle.json      -> modelo, fecha y sha256 de cada archivo
+            modules.json, config.json, model.safetensors, ...
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.artifacts import ArtifactError, directory_checksums, verify_checksums
+from app.models.retrieval import normalize_rows, top_k_indices
+from app.utils.lazy_imports import lazy_import
+
+if settings.ENCODER_OFFLINE:
+    # huggingface_hub y transformers leen estas variables al importarse, así que se fijan
+    # antes de la importación diferida de sentence-transformers
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+# sentence-transformers (y PyTorch) solo se importan al construir el encoder
+sentence_transformers = lazy_import("sentence_transformers")
+torch = lazy_import("torch")
+
+logger = logging.getLogger("encoder")
+
+ENCODER_VARIANTS = ("fp32", "int8")
+BUNDLE_MANIFEST = "bundle.json"
+
+def bundle_path(model_name: str, root: Optional[Path] = None) -> Path:
+    """Directorio del bundle local de `model_name`."""
+    return Path(root or settings.ENCODER_BUNDLE_DIR) / model_name.replace("/", "__")
+
+def verify_bundle(directory: Path) -> Dict[str, Any]:
+    """
+    Verifica los archivos de un bundle contra su manifiesto y lo devuelve.
+
+    Raises:
+        ArtifactError: si falta el manifiesto o un archivo, o un checksum no coincide
+    """
+    manifest_path = Path(directory) / BUNDLE_MANIFEST
+    if not manifest_path.exists():
+        raise ArtifactError(f"El bundle del encoder en {directory} no tiene manifiesto")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    verify_checksums(directory, manifest, "Bundle del encoder")
+    return manifest
+
+def fetch_bundle(model_name: str, root: Optional[Path] = None, force: bool = False) -> Path:
+    """
+    Descarga el encoder del hub y lo guarda como bundle local con su manifiesto.
+
+    Requiere red (ENCODER_OFFLINE=false o HF_HUB_OFFLINE=0 al ejecutarlo).
+
+    Args:
+        model_name: Nombre del modelo de sentence-transformers
+        root: Directorio de bundles (por defecto ENCODER_BUNDLE_DIR)
+        force: Reemplazar un bundle existente
+
+    Returns:
+        Directorio del bundle
+    """
+    target = bundle_path(model_name, root)
+    if target.exists() and not force:
+        verify_bundle(target)
+        logger.info(f"El bundle de {model_name} ya existe en {target}")
+        return target
+
+    os.makedirs(target.parent, exist_ok=True)
+    # Escribir en un directorio temporal y renombrarlo: un bundle nunca queda a medias
+    staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=target.parent))
+    try:
+        sentence_transformers.SentenceTransformer(model_name, device="cpu").save(str(staging))
+        manifest = {
+            "model_name": model_name,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "files": directory_checksums(staging, BUNDLE_MANIFEST)
+        }
+        with open(staging / BUNDLE_MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        if target.exists():
+            shutil.rmtree(target)
+        os.rename(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    logger.info(f"Bundle de {model_name} guardado en {target} ({len(manifest['files'])} archivos)")
+    return target
+
+def encoder_id(model_name: str, variant: str = "fp32") -> str:
+    """Identificador del encoder usado como llave de las cachés de embeddings."""
+    return model_name if variant == "fp32" else f"{model_name}-{variant}"
+
+def quantize_encoder(model):
+    """
+    Cuantiza en int8, en el mismo objeto, las capas `torch.nn.Linear` del encoder.
+
+    Returns:
+        El mismo encoder, cuantizado
+    """
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+def load_encoder(model_name: str, quantization: str = "fp32") -> Tuple[Any, str]:
+    """
+    Carga el encoder en CPU, cuantizado si se pide.
+
+    Se usa el bundle local si existe (verificado contra su manifiesto si
+    ENCODER_VERIFY_BUNDLE). Sin bundle, el modelo se descarga del hub solo si
+    ENCODER_OFFLINE está desactivado.
+
+    Args:
+        model_name: Nombre del modelo de sentence-transformers
+        quantization: "fp32" o "int8"
+
+    Returns:
+        (encoder, variante cargada). Si la cuantización falla se devuelve el encoder en fp32.
+
+    Raises:
+        ValueError: si la variante no existe
+        ArtifactError: si el bundle no existe (en modo offline) o no coincide con su manifiesto
+    """
+    if quantization not in ENCODER_VARIANTS:
+        raise ValueError(f"Cuantización del encoder desconocida: {quantization}")
+    directory = bundle_path(model_name)
+    if (directory / BUNDLE_MANIFEST).exists():
+        if settings.ENCODER_VERIFY_BUNDLE:
+            verify_bundle(directory)
+        model = sentence_transformers.SentenceTransformer(str(directory), device="cpu")
+    elif settings.ENCODER_OFFLINE:
+        raise ArtifactError(
+            f"No hay bundle del encoder en {directory}; ejecuta app/scripts/fetch_encoder.py"
+        )
+    else:
+        model = sentence_transformers.SentenceTransformer(model_name, device="cpu")
+    if quantization == "int8":
+        try:
+            return quantize_encoder(model), "int8"
+        except Exception as e:
+            logger.warning(f"No se pudo cuantizar el encoder; se usa fp32: {e}")
+    return model, "fp32"
+
+def encoder_parity(reference, candidate, catalog_texts: List[str], profile_texts: List[str],
+                   k: int = 3) -> Dict[str, float]:
+    """
+    Compara dos encoders sobre el catálogo y un conjunto de perfiles.
+
+    Args:
+        reference: Encoder de referencia (fp32)
+        candidate: Encoder a validar (ej. int8)
+        catalog_texts: Descripciones de las carreras
+        profile_texts: Textos de perfil (ver CareerRecommender._profile_text)
+        k: Tamaño del top-k de recomendaciones que se compara
+
+    Returns:
+        Coseno medio y mínimo entre los embeddings de ambos encoders para el mismo texto,
+        solapamiento medio del top-k de recomendaciones y fracción de perfiles con la
+        misma primera recomendación
+    """
+    ref_catalog = normalize_rows(reference.encode(catalog_texts))
+    cand_catalog = normalize_rows(candidate.encode(catalog_texts))
+    ref_profiles = normalize_rows(reference.encode(profile_texts))
+    cand_profiles = normalize_rows(candidate.encode(profile_texts))
+
+    cosines = np.concatenate([
+        np.sum(ref_catalog * cand_catalog, axis=1),
+        np.sum(ref_profiles * cand_profiles, axis=1)
+    ])
+    # Cada encoder puntúa contra su propio catálogo, como en producción
+    ref_top = top_k_indices(ref_profiles @ ref_catalog.T, k)
+    cand_top = top_k_indices(cand_profiles @ cand_catalog.T, k)
+    overlap = [len(np.intersect1d(a, b)) / k for a, b in zip(ref_top, cand_top)]
+    return {
+        "mean_cosine": float(cosines.mean()),
+        "min_cosine": float(cosines.min()),
+        "topk_overlap": float(np.mean(overlap)),
+        "top1_agreement": float(np.mean(ref_top[:, 0] == cand_top[:, 0]))
+    }
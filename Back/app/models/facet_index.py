@@ -0,0 +1,131 @@
+"""
+Índice de facetas del catálogo de carreras para filtrar recomendaciones.
+
+Para cada faceta (ubicación, universidad, área de conocimiento y nivel de estudio) se
+precalcula una máscara booleana sobre el catálogo por cada valor distinto. Un filtro se
+resuelve combinando máscaras (OR entre los valores de una faceta, AND u OR entre
+facetas) en lugar de recorrer el catálogo, y la máscara resultante se pasa directamente
+a `top_k_indices`.
+"""
+
+import unicodedata
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+from app.utils.cache import LRUCache
+
+# Campos del catálogo indexados como facetas
+FACETS = ("ubicacion", "universidad", "area_conocimiento", "nivel_estudio")
+
+def normalize_facet(value: str) -> str:
+    """Minúsculas y sin acentos, para que "Mexico" coincida con "México"."""
+    decomposed = unicodedata.normalize("NFKD", str(value).strip().casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def parse_facet_values(raw: Optional[str]) -> List[str]:
+    """Separa un parámetro de consulta con valores separados por comas."""
+    if not raw:
+        return []
+    return [value.strip() for value in raw.split(",") if value.strip()]
+
+class FacetIndex:
+    """Máscaras booleanas por valor de cada faceta del catálogo."""
+
+    def __init__(self, careers: List[Dict], fields: Iterable[str] = FACETS):
+        """
+        Args:
+            careers: Catálogo de carreras, en el orden de las filas de sus embeddings
+            fields: Campos a indexar (las carreras sin el campo no coinciden con ningún valor)
+        """
+        self.size = len(careers)
+        self.fields = tuple(fields)
+        self._masks: Dict[str, Dict[str, np.ndarray]] = {}
+        self._labels: Dict[str, Dict[str, str]] = {}
+        for field in self.fields:
+            rows: Dict[str, List[int]] = {}
+            labels: Dict[str, str] = {}
+            for row, career in enumerate(careers):
+                value = career.get(field)
+                if value is None or value == "":
+                    continue
+                key = normalize_facet(value)
+                rows.setdefault(key, []).append(row)
+                labels.setdefault(key, str(value))
+            masks = {}
+            for key, indices in rows.items():
+                mask = np.zeros(self.size, dtype=bool)
+                mask[indices] = True
+                masks[key] = mask
+            self._masks[field] = masks
+            self._labels[field] = labels
+        # Máscara de cada consulta ya resuelta (la coincidencia es por subcadena)
+        self._matches = LRUCache(maxsize=1024, ttl=0)
+
+    def values(self, field: str) -> List[str]:
+        """Valores distintos de una faceta, ordenados."""
+        return sorted(self._labels.get(field, {}).values())
+
+    def match(self, field: str, query: str) -> np.ndarray:
+        """
+        Carreras cuyo valor de `field` contiene `query` (sin distinguir mayúsculas ni acentos).
+
+        Raises:
+            KeyError: si `field` no es una faceta indexada
+        """
+        if field not in self._masks:
+            raise KeyError(f"Faceta desconocida: {field}")
+        needle = normalize_facet(query)
+        cached = self._matches.get((field, needle))
+        if cached is not None:
+            return cached
+
+        masks = self._masks[field]
+        exact = masks.get(needle)
+        if exact is not None:
+            result = exact
+        else:
+            # La búsqueda por subcadena recorre los valores distintos, no el catálogo
+            result = np.zeros(self.size, dtype=bool)
+            for key, mask in masks.items():
+                if needle in key:
+                    result |= mask
+        self._matches.set((field, needle), result)
+        return result
+
+    def mask(self, filters: Mapping[str, Iterable[str]], mode: str = "and") -> Optional[np.ndarray]:
+        """
+        Combina los filtros en una máscara sobre el catálogo.
+
+        Una faceta cuyos valores no coinciden con ninguna carrera cuenta como tal: con AND
+        la máscara queda vacía. Una faceta que el catálogo no tiene (ninguna carrera con
+        ese campo) es un error, no un filtro que se pueda cumplir.
+
+        Args:
+            filters: Faceta -> valores buscados; los valores de una misma faceta se combinan con OR
+            mode: "and" (la carrera cumple todas las facetas) u "or" (cumple alguna)
+
+        Returns:
+            Vector booleano del tamaño del catálogo, o None si no se pidió ningún filtro
+
+        Raises:
+            ValueError: si `mode` no es "and" ni "or", o si se filtra por una faceta que el
+                catálogo no indexa
+        """
+        if mode not in ("and", "or"):
+            raise ValueError(f"Modo de filtro desconocido: {mode}")
+        facet_masks = []
+        for field, values in filters.items():
+            values = [value for value in values if value]
+            if not values:
+                continue
+            if not self._masks.get(field):
+                raise ValueError(f"El catálogo no tiene la faceta {field}")
+            facet_mask = np.zeros(self.size, dtype=bool)
+            for value in values:
+                facet_mask |= self.match(field, value)
+            facet_masks.append(facet_mask)
+        if not facet_masks:
+            return None
+        combine = np.logical_and if mode == "and" else np.logical_or
+        return combine.reduce(facet_masks)
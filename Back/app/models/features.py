@@ -0,0 +1,69 @@
+from typing import Dict, List, Tuple
+import numpy as np
+
+# Orden de las dimensiones MBTI y de los tipos de inteligencia múltiple
+MBTI_DIMENSIONS = ["E/I", "S/N", "T/F", "J/P"]
+MI_TYPES = ["Lin", "LogMath", "Spa", "BodKin", "Mus", "Inter", "Intra", "Nat"]
+
+# Orden de las 16 características de entrada de los modelos (4 MBTI + 4 pesos MBTI + 8 MI).
+# Se guarda en el manifiesto de cada artefacto y se verifica al cargarlo.
+FEATURE_NAMES = (
+    [f"mbti:{dim}" for dim in MBTI_DIMENSIONS]
+    + [f"weight:{dim}" for dim in MBTI_DIMENSIONS]
+    + [f"mi:{mi_type}" for mi_type in MI_TYPES]
+)
+
+def prepare_input_features(mbti_vector: List[int], mbti_weights: Dict[str, float],
+                           mi_scores: Dict[str, float]) -> np.ndarray:
+    """
+    Prepara las características de entrada combinando el vector MBTI y los scores MI.
+
+    Args:
+        mbti_vector: Vector binario de MBTI (ej. [0, 1, 0, 1])
+        mbti_weights: Pesos de las dimensiones MBTI (ej. {"E/I": 0.8, "S/N": 0.6, ...})
+        mi_scores: Puntuaciones de inteligencias múltiples (ej. {"Lin": 0.7, "LogMath": 0.9, ...})
+
+    Returns:
+        Matriz numpy de 1 x 16 (4 MBTI + 4 pesos MBTI + 8 MI)
+    """
+    # Convertir mbti_weights a vector (mismas dimensiones que mbti_vector pero con intensidades)
+    mbti_weight_vector = [mbti_weights[dim] for dim in MBTI_DIMENSIONS]
+
+    # Convertir mi_scores a vector (asegurando orden consistente)
+    mi_vector = [mi_scores.get(mi_type, 0.0) for mi_type in MI_TYPES]
+
+    # Combinar todos los vectores en uno solo
+    combined_vector = np.array(list(mbti_vector) + mbti_weight_vector + mi_vector)
+
+    return combined_vector.reshape(1, -1)  # Formato para predicción (batch_size=1)
+
+def prepare_feature_matrix(profiles: List[Tuple[List[int], Dict[str, float], Dict[str, float]]]) -> np.ndarray:
+    """
+    Construye la matriz de características de varios perfiles de una vez.
+
+    Args:
+        profiles: Lista de tuplas (mbti_vector, mbti_weights, mi_scores)
+
+    Returns:
+        Matriz numpy de N x 16, con cada fila igual a prepare_input_features del perfil
+    """
+    X = np.zeros((len(profiles), len(FEATURE_NAMES)))
+    if not profiles:
+        return X
+    vectors, weights, scores = zip(*profiles)
+    X[:, :4] = vectors
+    X[:, 4:8] = [[w[dim] for dim in MBTI_DIMENSIONS] for w in weights]
+    X[:, 8:] = [[s.get(mi_type, 0.0) for mi_type in MI_TYPES] for s in scores]
+    return X
+
+def quantize_profile(mbti_vector: List[int], mbti_weights: Dict[str, float],
+                     mi_scores: Dict[str, float], step: float = 0.01) -> Tuple[int, ...]:
+    """
+    Representación discreta de un perfil, para usarla como clave de caché.
+
+    Los pesos MBTI y los scores MI se redondean al múltiplo de `step` más cercano, de modo
+    que perfiles casi idénticos comparten clave. Sigue el mismo orden que FEATURE_NAMES.
+    """
+    weights = [mbti_weights[dim] for dim in MBTI_DIMENSIONS]
+    scores = [mi_scores.get(mi_type, 0.0) for mi_type in MI_TYPES]
+    return tuple(int(v) for v in mbti_vector) + tuple(int(round(x / step)) for x in weights + scores)
@@ -0,0 +1,198 @@
+"""
+Evaluador en NumPy del RandomForest de recomendación de carreras.
+
+`FlatForest.from_sklearn` concatena los nodos de todos los árboles en arrays contiguos
+(característica, umbral, hijos y valores de las hojas) y `predict_proba` recorre todos
+los árboles a la vez, nivel por nivel, para una fila o un batch. Reproduce exactamente
+el `predict_proba` de scikit-learn (misma conversión a float32, misma comparación con
+el umbral y misma acumulación por árbol) sin su validación ni su despacho por árbol,
+que dominan el tiempo de una predicción de una sola fila.
+
+`save_arrays` guarda cada array como un `.npy` sin comprimir para que `load(..., mmap=True)`
+los abra con memory-map: los workers de un mismo nodo comparten una sola copia en la
+caché de páginas del sistema en lugar de tener cada uno la suya en el heap.
+"""
+
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+_ARRAYS = ("feature", "threshold", "children", "leaf_index", "leaf_values", "roots", "classes")
+
+class FlatForest:
+    """RandomForestClassifier aplanado en arrays de nodos."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], max_depth: int):
+        """
+        Args:
+            arrays: feature y threshold por nodo, children (N x 2: hijo izquierdo y derecho;
+                las hojas apuntan a sí mismas), leaf_index (fila de leaf_values de cada
+                hoja, -1 en nodos internos), leaf_values (probabilidades por hoja), roots
+                (nodo raíz de cada árbol) y classes (etiquetas en el orden de las columnas)
+            max_depth: Profundidad máxima de los árboles (número de pasos del recorrido)
+        """
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.children = arrays["children"]
+        # Vista plana: el hijo de `node` es _next[2 * node + va_a_la_derecha]
+        self._next = self.children.reshape(-1)
+        self.leaf_index = arrays["leaf_index"]
+        self.leaf_values = arrays["leaf_values"]
+        self.roots = arrays["roots"]
+        self.classes_ = arrays["classes"]
+        self.max_depth = int(max_depth)
+
+    @classmethod
+    def from_sklearn(cls, forest) -> "FlatForest":
+        """
+        Aplana un RandomForestClassifier entrenado (una sola salida).
+
+        Raises:
+            ValueError: si el modelo no está entrenado o tiene varias salidas
+        """
+        if not hasattr(forest, "estimators_"):
+            raise ValueError("El RandomForest no está entrenado")
+        if forest.n_outputs_ != 1:
+            raise ValueError("Solo se soportan RandomForest de una salida")
+
+        features, thresholds, children, leaf_indices, leaf_values, roots = [], [], [], [], [], []
+        offset = 0
+        leaves = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            nodes = np.arange(n)
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            # Las hojas apuntan a sí mismas: el recorrido puede dar max_depth pasos sin máscaras
+            children.append(np.stack([
+                np.where(is_leaf, nodes, tree.children_left),
+                np.where(is_leaf, nodes, tree.children_right)
+            ], axis=1).astype(np.int32) + offset)
+
+            leaf_index = np.full(n, -1, dtype=np.int32)
+            leaf_index[is_leaf] = np.arange(leaves, leaves + is_leaf.sum())
+            leaf_indices.append(leaf_index)
+
+            # Misma normalización que DecisionTreeClassifier.predict_proba
+            proba = tree.value[is_leaf, 0, :forest.n_classes_].astype(np.float64)
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            leaf_values.append(proba / normalizer)
+
+            roots.append(offset)
+            offset += n
+            leaves += int(is_leaf.sum())
+
+        arrays = {
+            "feature": np.concatenate(features),
+            "threshold": np.concatenate(thresholds).astype(np.float64),
+            "children": np.concatenate(children),
+            "leaf_index": np.concatenate(leaf_indices),
+            "leaf_values": np.concatenate(leaf_values),
+            "roots": np.array(roots, dtype=np.int32),
+            "classes": np.asarray(forest.classes_)
+        }
+        max_depth = max(estimator.tree_.max_depth for estimator in forest.estimators_)
+        return cls(arrays, max_depth)
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {name: getattr(self, name if name != "classes" else "classes_") for name in _ARRAYS}
+        arrays["max_depth"] = np.array(self.max_depth)
+        return arrays
+
+    def save(self, path: Path) -> None:
+        """Guarda los arrays en un `.npz` comprimido (se carga sin pickle)."""
+        np.savez_compressed(str(path), **self._arrays())
+
+    def save_arrays(self, directory: Path) -> None:
+        """Guarda cada array en `<directory>/<nombre>.npy`, sin comprimir, para abrirlos con memory-map."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, array in self._arrays().items():
+            np.save(str(directory / f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = False) -> "FlatForest":
+        """
+        Carga un bosque guardado con `save` (`.npz`) o con `save_arrays` (directorio).
+
+        Args:
+            path: Archivo `.npz` o directorio de arrays `.npy`
+            mmap: Abrir los `.npy` con memory-map de solo lectura en lugar de copiarlos al heap
+                (solo aplica a directorios)
+        """
+        path = Path(path)
+        if path.is_dir():
+            mmap_mode = "r" if mmap else None
+            arrays = {
+                name: np.load(str(path / f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+                for name in _ARRAYS
+            }
+            max_depth = int(np.load(str(path / "max_depth.npy")))
+        else:
+            with np.load(str(path), allow_pickle=False) as data:
+                arrays = {name: data[name] for name in _ARRAYS}
+                max_depth = int(data["max_depth"])
+        return cls(arrays, max_depth)
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.feature)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Hoja alcanzada en cada árbol.
+
+        Args:
+            X: Matriz N x 16 (o vector de 16)
+
+        Returns:
+            Matriz N x árboles con la fila de leaf_values de cada hoja
+        """
+        # scikit-learn convierte la entrada a float32 y la compara con umbrales float64
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        values = X.reshape(-1)
+        row_offset = (np.arange(X.shape[0], dtype=np.int32) * X.shape[1])[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.max_depth):
+            # Como scikit-learn: a la izquierda si x <= umbral
+            go_right = values[row_offset + self.feature[node]] > self.threshold[node]
+            node = self._next[2 * node + go_right]
+        return self.leaf_index[node]
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Probabilidades por clase, iguales a las de RandomForestClassifier.predict_proba.
+
+        Returns:
+            Matriz N x clases en float64, en el orden de classes_
+        """
+        # La suma sobre el eje de los árboles acumula árbol por árbol, en el mismo orden
+        # que scikit-learn
+        proba = self.leaf_values[self.apply(X)].sum(axis=1)
+        proba /= len(self.roots)
+        return proba
+
+def verify_forest(forest, flat: FlatForest, samples: int = 1000, seed: int = 0) -> float:
+    """
+    Compara el evaluador aplanado con scikit-learn sobre perfiles aleatorios.
+
+    Returns:
+        Máxima diferencia absoluta entre las probabilidades de ambos
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.random((samples, forest.n_features_in_))
+    X[:, :4] = np.round(X[:, :4])  # El vector MBTI es binario
+    if not np.array_equal(flat.classes_, forest.classes_):
+        return float("inf")
+    return float(np.max(np.abs(flat.predict_proba(X) - forest.predict_proba(X))))
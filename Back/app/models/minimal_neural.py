@@ -5,16 +5,34 @@ import joblib
 import os
 from pathlib import Path
 
+from app.core.config import settings
+from app.models.artifacts import ArtifactError, ArtifactStore, training_data_hash
+from app.models import features
+from app.models.flat_forest import FlatForest, verify_forest
+
 class MinimalNeuralCareerModel:
     """Versión simplificada del modelo neural usando scikit-learn en lugar de TensorFlow.
     Esta clase sirve como fallback en caso de que TensorFlow no funcione correctamente."""
     
+    # Bosque aplanado para el evaluador NumPy dentro de cada versión publicada: directorio de
+    # arrays .npy (se abre con memory-map) o, en versiones anteriores, un .npz comprimido
+    FLAT_FOREST_DIR = "rf_flat"
+    FLAT_FOREST_FILE = "rf_flat.npz"
+    
     def __init__(self):
         """Inicializa el modelo de recomendación de carreras basado en RandomForest."""
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
         self.model_trained = False
+        # Evaluador aplanado que sirve las predicciones con RF_ENGINE="flat" y su nombre
+        self.forest = None
+        self.engine_name = None
+        # Ruta legacy (rf_model.pkl sin manifiesto); los modelos nuevos se publican en el registro
         self.model_path = Path(os.path.dirname(os.path.abspath(__file__))) / ".." / "data" / "minimal_models"
         os.makedirs(self.model_path, exist_ok=True)
+        self.store = ArtifactStore("minimal")
+        self.version = None
+        # Nombres de las carreras en el orden de las columnas de predict_proba
+        self.class_names: List[str] = []
         
         # Intentar cargar el modelo si existe
         self.load_model()
@@ -24,49 +42,59 @@ class MinimalNeuralCareerModel:
         """
         Prepara las características de entrada combinando el vector MBTI y los scores MI.
         
-        Args:
-            mbti_vector: Vector binario de MBTI (ej. [0, 1, 0, 1])
-            mbti_weights: Pesos de las dimensiones MBTI (ej. {"E/I": 0.8, "S/N": 0.6, ...})
-            mi_scores: Puntuaciones de inteligencias múltiples (ej. {"Lin": 0.7, "LogMath": 0.9, ...})
-            
         Returns:
-            Vector numpy de 16 dimensiones (4 MBTI + 4 pesos MBTI + 8 MI)
+            Vector numpy de 16 dimensiones (4 MBTI + 4 pesos MBTI + 8 MI), ver features.FEATURE_NAMES
         """
-        # Convertir mbti_weights a vector (mismas dimensiones que mbti_vector pero con intensidades)
-        mbti_dimensions = ["E/I", "S/N", "T/F", "J/P"]
-        mbti_weight_vector = [mbti_weights[dim] for dim in mbti_dimensions]
-        
-        # Convertir mi_scores a vector (asegurando orden consistente)
-        mi_types = ["Lin", "LogMath", "Spa", "BodKin", "Mus", "Inter", "Intra", "Nat"]
-        mi_vector = [mi_scores.get(mi_type, 0.0) for mi_type in mi_types]
-        
-        # Combinar todos los vectores en uno solo
-        combined_vector = np.array(mbti_vector + mbti_weight_vector + mi_vector)
-        
-        return combined_vector.reshape(1, -1)  # Formato para predicción (batch_size=1)
+        return features.prepare_input_features(mbti_vector, mbti_weights, mi_scores)
     
-    def train_model(self, X: np.ndarray, y: np.ndarray):
+    def train_model(self, X: np.ndarray, y: np.ndarray, class_names: List[str] = None):
         """
         Entrena un modelo RandomForest para predecir carreras.
         
         Args:
-            X: Matriz de características (N x 12) - MBTI + MI
+            X: Matriz de características (N x 16) - MBTI + pesos MBTI + MI
             y: Etiquetas de carreras (no one-hot, índices enteros)
+            class_names: Nombre de la carrera de cada índice de etiqueta
         """
         # Entrenar el modelo
         self.model.fit(X, y)
+        self._use_sklearn_model()
+        accuracy = self.model.score(X, y)
+        
+        # Alinear los nombres con las columnas de predict_proba (solo las etiquetas vistas);
+        # antes de marcar el modelo como entrenado para no predecir con nombres viejos
+        if class_names:
+            self.class_names = [class_names[int(label)] for label in self.model.classes_]
+        else:
+            self.class_names = [str(label) for label in self.model.classes_]
         self.model_trained = True
         
-        # Guardar el modelo entrenado
-        self.save_model()
+        # Publicar el modelo entrenado como una versión nueva
+        self.save_model(training_hash=training_data_hash(X, y), metrics={"train_accuracy": float(accuracy)})
         
         return {
             "message": "Modelo entrenado exitosamente",
-            "accuracy": self.model.score(X, y)
+            "accuracy": accuracy
         }
     
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Probabilidades por carrera para una matriz de perfiles.
+        
+        Args:
+            X: Matriz N x 16 (ver prepare_input_features)
+            
+        Returns:
+            Matriz N x carreras, en el orden de class_names
+        """
+        if not self.model_trained:
+            raise ValueError("El modelo no está entrenado. Entrena el modelo primero.")
+        if self.forest is not None:
+            return self.forest.predict_proba(X)
+        return self.model.predict_proba(X)
+    
     def predict_career(self, mbti_vector: List[int], mbti_weights: Dict[str, float], 
-                       mi_scores: Dict[str, float], career_names: List[str]) -> List[Tuple[str, float]]:
+                       mi_scores: Dict[str, float], career_names: List[str] = None) -> List[Tuple[str, float]]:
         """
         Predice carreras recomendadas basado en el perfil MBTI y MI del usuario.
         
@@ -74,22 +102,19 @@ class MinimalNeuralCareerModel:
             mbti_vector: Vector binario de MBTI (ej. [0, 1, 0, 1])
             mbti_weights: Pesos de las dimensiones MBTI 
             mi_scores: Puntuaciones de inteligencias múltiples
-            career_names: Lista de nombres de carreras disponibles
+            career_names: Nombres de las carreras por columna; por defecto los del manifiesto
             
         Returns:
             Lista de tuplas (nombre_carrera, probabilidad) ordenadas por probabilidad
         """
-        # Verificar si el modelo está entrenado
-        if not self.model_trained:
-            raise ValueError("El modelo no está entrenado. Entrena el modelo primero.")
-            
         # Preparar datos de entrada
         X = self.prepare_input_features(mbti_vector, mbti_weights, mi_scores)
         
         # Hacer predicción
-        probas = self.model.predict_proba(X)[0]
+        probas = self.predict_proba(X)[0]
         
         # Combinar resultados con nombres de carreras
+        career_names = career_names or self.class_names
         results = [(career, float(prob)) for career, prob in zip(career_names, probas)]
         
         # Ordenar por probabilidad de mayor a menor
@@ -97,19 +122,88 @@ class MinimalNeuralCareerModel:
         
         return results
         
-    def save_model(self):
-        """Guarda el modelo entrenado y el codificador de etiquetas."""
+    def _use_sklearn_model(self):
+        """Sirve con el RandomForest en memoria, aplanándolo si RF_ENGINE lo pide."""
+        self.forest, self.engine_name = None, "sklearn"
+        if settings.RF_ENGINE == "flat":
+            try:
+                self.forest, self.engine_name = FlatForest.from_sklearn(self.model), "flat"
+            except ValueError as e:
+                print(f"No se pudo aplanar el RandomForest, se usa scikit-learn: {e}")
+    
+    def save_model(self, training_hash: str = None, metrics: Dict = None):
+        """
+        Publica el modelo entrenado como una versión nueva en el registro de artefactos.
+        
+        La versión incluye el bosque aplanado solo si sus predicciones son idénticas a
+        las de scikit-learn.
+        """
         if self.model_trained:
-            joblib.dump(self.model, str(self.model_path / "rf_model.pkl"))
+            metrics = dict(metrics or {})
+            flat_forest = None
+            try:
+                flat_forest = FlatForest.from_sklearn(self.model)
+                max_diff = verify_forest(self.model, flat_forest)
+                metrics["flat_forest_max_abs_diff"] = max_diff
+                if max_diff != 0.0:
+                    print(f"El bosque aplanado difiere de scikit-learn en {max_diff:.2e}; la versión se publica sin él")
+                    flat_forest = None
+            except ValueError as e:
+                print(f"No se pudo aplanar el RandomForest: {e}")
+            
+            def write(directory: Path):
+                joblib.dump(self.model, str(directory / "rf_model.pkl"))
+                if flat_forest is not None:
+                    flat_forest.save_arrays(directory / self.FLAT_FOREST_DIR)
+            
+            self.version = self.store.publish(
+                write,
+                classes=self.class_names,
+                training_hash=training_hash,
+                metrics=metrics
+            )
             
     def load_model(self):
-        """Carga el modelo entrenado si existe."""
+        """
+        Carga el modelo entrenado si existe.
+        
+        Se usa la versión fijada en MINIMAL_MODEL_VERSION o la publicada en el registro,
+        tras verificar su manifiesto. Si el registro está vacío, se usa el rf_model.pkl legacy.
+        
+        Con RF_ENGINE="flat" (por defecto) y una versión que incluye el bosque aplanado, no
+        se deserializa el pickle de scikit-learn: se leen solo los arrays del bosque. Con
+        RF_MMAP (por defecto) los arrays de rf_flat/ se abren con memory-map y todos los
+        workers del nodo comparten la misma copia en la caché de páginas.
+        """
         try:
+            version = self.store.resolve(settings.MINIMAL_MODEL_VERSION or None)
+            if version:
+                manifest = self.store.verify(version)
+                version_dir = self.store.version_dir(version)
+                flat_dir = version_dir / self.FLAT_FOREST_DIR
+                flat_file = version_dir / self.FLAT_FOREST_FILE
+                if settings.RF_ENGINE == "flat" and flat_dir.is_dir():
+                    self.forest = FlatForest.load(flat_dir, mmap=settings.RF_MMAP)
+                    self.engine_name = "flat-mmap" if settings.RF_MMAP else "flat"
+                elif settings.RF_ENGINE == "flat" and flat_file.exists():
+                    self.forest, self.engine_name = FlatForest.load(flat_file), "flat"
+                else:
+                    self.model = joblib.load(str(version_dir / "rf_model.pkl"))
+                    self._use_sklearn_model()
+                self.class_names = manifest["classes"]
+                self.version = version
+                self.model_trained = True
+                return
+            
             model_file = self.model_path / "rf_model.pkl"
             if model_file.exists():
                 self.model = joblib.load(str(model_file))
+                self._use_sklearn_model()
                 self.model_trained = True
                 
+        except ArtifactError as e:
+            print(f"Artefacto del modelo inválido: {e}")
+            self.model_trained = False
         except Exception as e:
             print(f"Error al cargar el modelo: {e}")
             self.model_trained = False 
\ No newline at end of file
@@ -1,24 +1,41 @@
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, Dropout, Conv1D, MaxPooling1D, Flatten, BatchNormalization
-from tensorflow.keras.utils import to_categorical
 from sklearn.preprocessing import LabelEncoder
-from sklearn.manifold import TSNE
-import matplotlib.pyplot as plt
 import joblib
 from typing import Dict, List, Tuple, Union
 import os
 from pathlib import Path
 import json
 
+from app.core.config import settings
+from app.models.artifacts import ArtifactError, ArtifactStore, training_data_hash
+from app.models import features
+from app.models.numpy_cnn import NumpyCNN, parity_check
+from app.models.prediction_lattice import PredictionLattice, lattice_paths
+from app.utils.lazy_imports import lazy_import
+
+# TensorFlow, t-SNE y matplotlib se importan solo cuando se usan por primera vez
+# (con CNN_ENGINE="numpy" TensorFlow solo hace falta para entrenar)
+tf = lazy_import("tensorflow")
+manifold = lazy_import("sklearn.manifold")
+plt = lazy_import("matplotlib.pyplot")
+
 class NeuralCareerModel:
+    # Archivo con los pesos para el motor NumPy dentro de cada versión publicada
+    NUMPY_WEIGHTS_FILE = "cnn_weights.npz"
+    
     def __init__(self):
         """Inicializa el modelo de red neuronal para recomendación de carreras."""
+        # Modelo Keras: solo se carga para entrenar o si CNN_ENGINE="tensorflow"
         self.cnn_model = None
+        # Motor que sirve las predicciones (PredictionLattice, NumpyCNN o el modelo Keras) y su nombre
+        self.engine = None
+        self.engine_name = None
         self.label_encoder = LabelEncoder()
+        # Ruta legacy (cnn_model y label_encoder.pkl sin manifiesto); los modelos nuevos se publican en el registro
         self.model_path = Path(os.path.dirname(os.path.abspath(__file__))) / ".." / "data" / "neural_models"
         os.makedirs(self.model_path, exist_ok=True)
+        self.store = ArtifactStore("neural")
+        self.version = None
         self.load_models()
         
     def prepare_input_features(self, mbti_vector: List[int], mbti_weights: Dict[str, float], 
@@ -32,20 +49,9 @@ class NeuralCareerModel:
             mi_scores: Puntuaciones de inteligencias múltiples (ej. {"Lin": 0.7, "LogMath": 0.9, ...})
             
         Returns:
-            Vector numpy de 16 dimensiones (4 MBTI + 4 pesos MBTI + 8 MI)
+            Vector numpy de 16 dimensiones (4 MBTI + 4 pesos MBTI + 8 MI), ver features.FEATURE_NAMES
         """
-        # Convertir mbti_weights a vector (mismas dimensiones que mbti_vector pero con intensidades)
-        mbti_dimensions = ["E/I", "S/N", "T/F", "J/P"]
-        mbti_weight_vector = [mbti_weights[dim] for dim in mbti_dimensions]
-        
-        # Convertir mi_scores a vector (asegurando orden consistente)
-        mi_types = ["Lin", "LogMath", "Spa", "BodKin", "Mus", "Inter", "Intra", "Nat"]
-        mi_vector = [mi_scores.get(mi_type, 0.0) for mi_type in mi_types]
-        
-        # Combinar ambos vectores
-        combined_vector = np.array(mbti_vector + mbti_weight_vector + mi_vector)
-        
-        return combined_vector.reshape(1, -1)  # Formato para predicción (batch_size=1)
+        return features.prepare_input_features(mbti_vector, mbti_weights, mi_scores)
     
     def train_cnn_model(self, X: np.ndarray, y: np.ndarray, epochs: int = 50, batch_size: int = 32):
         """
@@ -57,6 +63,9 @@ class NeuralCareerModel:
             epochs: Número de epochs para entrenamiento
             batch_size: Tamaño del batch
         """
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import Dense, Dropout, Conv1D, MaxPooling1D, Flatten, BatchNormalization
+
         num_classes = y.shape[1]
         
         # Reestructurar datos para CNN (samples, timesteps, features)
@@ -114,31 +123,55 @@ class NeuralCareerModel:
             monitor='val_loss', factor=0.2, patience=5, min_lr=0.00001
         )
         
-        # Entrenar el modelo con más epochs y callbacks
+        # Entrenar el modelo con callbacks (early stopping puede cortar antes de `epochs`)
         history = self.cnn_model.fit(
             X_reshaped, y, 
-            epochs=200,  # 4x más epochs
+            epochs=epochs,
             batch_size=batch_size, 
             validation_split=0.2,
             callbacks=[early_stopping, reduce_lr],
             verbose=1
         )
         
-        # Guardar el modelo entrenado
-        self.save_models()
+        # Publicar el modelo entrenado como una versión nueva
+        metrics = {
+            name: float(values[-1]) for name, values in history.history.items()
+            if name in ("accuracy", "val_accuracy", "loss", "val_loss") and values
+        }
+        metrics["epochs_run"] = len(history.history.get("loss", []))
+        self._use_keras_model()
+        self.save_models(training_hash=training_data_hash(X, y), metrics=metrics)
         
         return history
     
+    @property
+    def is_trained(self) -> bool:
+        return self.engine is not None
+    
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Probabilidades por carrera para una matriz de perfiles.
+        
+        Args:
+            X: Matriz N x 16 (ver prepare_input_features)
+            
+        Returns:
+            Matriz N x carreras, en el orden de label_encoder.classes_
+        """
+        if self.engine is None:
+            raise ValueError("El modelo CNN no está entrenado. Entrena el modelo primero.")
+        if self.engine_name != "tensorflow":
+            return self.engine.predict(X)
+        X = X.reshape(X.shape[0], X.shape[1], 1)
+        return self.engine.predict(X, verbose=0)
+    
     def predict_career(self, mbti_vector: List[int], mbti_weights: Dict[str, float], 
                       mi_scores: Dict[str, float], career_names: List[str]) -> List[Tuple[str, float]]:
         """
         Predice carreras recomendadas basado en el perfil MBTI y MI del usuario usando solo CNN.
         """
-        if self.cnn_model is None:
-            raise ValueError("El modelo CNN no está entrenado. Entrena el modelo primero.")
         X = self.prepare_input_features(mbti_vector, mbti_weights, mi_scores)
-        X = X.reshape(X.shape[0], X.shape[1], 1)
-        probs = self.cnn_model.predict(X)[0]
+        probs = self.predict_proba(X)[0]
         results = [(career, float(prob)) for career, prob in zip(career_names, probs)]
         results.sort(key=lambda x: x[1], reverse=True)
         return results
@@ -153,7 +186,7 @@ class NeuralCareerModel:
             perplexity: Parámetro de perplexity para t-SNE
         """
         # Aplicar t-SNE para reducir dimensionalidad a 2D
-        tsne = TSNE(n_components=2, random_state=42, perplexity=perplexity)
+        tsne = manifold.TSNE(n_components=2, random_state=42, perplexity=perplexity)
         X_2d = tsne.fit_transform(X)
         
         # Visualizar los puntos
@@ -175,22 +208,119 @@ class NeuralCareerModel:
         plt.savefig(str(self.model_path / "tsne_visualization.png"))
         plt.close()
     
-    def save_models(self):
-        """Guarda el modelo CNN entrenado y el codificador de etiquetas."""
-        if self.cnn_model:
-            self.cnn_model.save(str(self.model_path / "cnn_model"))
-        if hasattr(self, 'label_encoder') and self.label_encoder.classes_.size > 0:
-            joblib.dump(self.label_encoder, str(self.model_path / "label_encoder.pkl"))
+    def _use_keras_model(self):
+        """Sirve con el modelo Keras cargado, exportándolo al motor NumPy si CNN_ENGINE lo pide."""
+        self.engine, self.engine_name = self.cnn_model, "tensorflow"
+        if settings.CNN_ENGINE in ("numpy", "lattice"):
+            try:
+                self.engine, self.engine_name = NumpyCNN.from_keras(self.cnn_model), "numpy"
+            except ValueError as e:
+                print(f"No se pudo exportar la CNN al motor NumPy, se usa TensorFlow: {e}")
+    
+    def _load_lattice(self, version: str, classes: List[str]):
+        """
+        Carga la retícula precalculada de `version` si CNN_ENGINE="lattice" y es válida.
+        
+        Returns:
+            PredictionLattice, o None si no existe, no corresponde a las clases del modelo
+            o su error medido supera LATTICE_MAX_ERROR
+        """
+        if settings.CNN_ENGINE != "lattice":
+            return None
+        array_path, metadata_path = lattice_paths(Path(settings.LATTICE_DIR), version)
+        if not (array_path.exists() and metadata_path.exists()):
+            print(f"No hay retícula para neural/{version or 'legacy'}; se usa el motor NumPy")
+            return None
+        lattice = PredictionLattice.load(array_path, metadata_path, settings.LATTICE_MODE)
+        if lattice.class_names != classes:
+            print(f"La retícula de neural/{version or 'legacy'} no coincide con las clases del modelo")
+            return None
+        error = lattice.metadata.get("error", {})
+        if error.get("mode") != lattice.mode or error.get("max_abs_error", float("inf")) > settings.LATTICE_MAX_ERROR:
+            print(f"La retícula de neural/{version or 'legacy'} no cumple LATTICE_MAX_ERROR "
+                  f"({error.get('mode')}: {error.get('max_abs_error')}); se usa el motor NumPy")
+            return None
+        return lattice
+    
+    def save_models(self, training_hash: str = None, metrics: Dict = None):
+        """
+        Publica el modelo CNN entrenado y el codificador de etiquetas como una versión nueva.
+        
+        La versión incluye los pesos para el motor NumPy solo si sus predicciones coinciden
+        con las de TensorFlow dentro de CNN_PARITY_ATOL.
+        """
+        if not self.cnn_model or not hasattr(self.label_encoder, "classes_"):
+            return
+        
+        metrics = dict(metrics or {})
+        numpy_engine = None
+        try:
+            numpy_engine = NumpyCNN.from_keras(self.cnn_model)
+            max_diff = parity_check(self.cnn_model, numpy_engine)
+            metrics["numpy_parity_max_abs_diff"] = max_diff
+            if max_diff > settings.CNN_PARITY_ATOL:
+                print(f"El motor NumPy difiere de TensorFlow en {max_diff:.2e}; la versión se publica sin él")
+                numpy_engine = None
+        except ValueError as e:
+            print(f"No se pudo exportar la CNN al motor NumPy: {e}")
+        
+        def write(directory: Path):
+            self.cnn_model.save(str(directory / "cnn_model"))
+            joblib.dump(self.label_encoder, str(directory / "label_encoder.pkl"))
+            if numpy_engine is not None:
+                numpy_engine.save(directory / self.NUMPY_WEIGHTS_FILE)
+        
+        self.version = self.store.publish(
+            write,
+            classes=list(self.label_encoder.classes_),
+            training_hash=training_hash,
+            metrics=metrics
+        )
     
     def load_models(self):
-        """Carga el modelo CNN entrenado si existe."""
+        """
+        Carga el modelo CNN entrenado si existe.
+        
+        Se usa la versión fijada en NEURAL_MODEL_VERSION o la publicada en el registro,
+        tras verificar su manifiesto. Si el registro está vacío, se usan los archivos legacy.
+        
+        Con CNN_ENGINE="numpy" (por defecto) y una versión que incluye cnn_weights.npz,
+        no se carga TensorFlow: se leen solo los pesos. Con CNN_ENGINE="lattice" y una
+        retícula válida para la versión, no se carga ningún modelo.
+        """
         try:
-            cnn_path = self.model_path / "cnn_model"
-            if cnn_path.exists():
-                self.cnn_model = tf.keras.models.load_model(str(cnn_path))
+            version = self.store.resolve(settings.NEURAL_MODEL_VERSION or None)
+            if version:
+                manifest = self.store.verify(version)
+                version_dir = self.store.version_dir(version)
+                self.label_encoder = joblib.load(str(version_dir / "label_encoder.pkl"))
+                if [str(c) for c in self.label_encoder.classes_] != manifest["classes"]:
+                    raise ArtifactError(f"neural/{version}: las clases no coinciden con el manifiesto")
+                weights_path = version_dir / self.NUMPY_WEIGHTS_FILE
+                lattice = self._load_lattice(version, manifest["classes"])
+                if lattice is not None:
+                    self.engine, self.engine_name = lattice, "lattice"
+                elif settings.CNN_ENGINE in ("numpy", "lattice") and weights_path.exists():
+                    self.engine, self.engine_name = NumpyCNN.load(weights_path), "numpy"
+                else:
+                    self.cnn_model = tf.keras.models.load_model(str(version_dir / "cnn_model"))
+                    self._use_keras_model()
+                self.version = version
+                return
+            
             encoder_path = self.model_path / "label_encoder.pkl"
             if encoder_path.exists():
                 self.label_encoder = joblib.load(str(encoder_path))
+                lattice = self._load_lattice(None, [str(c) for c in self.label_encoder.classes_])
+                if lattice is not None:
+                    self.engine, self.engine_name = lattice, "lattice"
+                    return
+            cnn_path = self.model_path / "cnn_model"
+            if cnn_path.exists():
+                self.cnn_model = tf.keras.models.load_model(str(cnn_path))
+                self._use_keras_model()
         except Exception as e:
             print(f"Error al cargar el modelo CNN: {e}")
-            self.cnn_model = None 
\ No newline at end of file
+            self.cnn_model = None
+            self.engine = None
+            self.engine_name = None 
\ No newline at end of file
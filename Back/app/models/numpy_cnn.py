@@ -0,0 +1,215 @@
+"""
+Motor de inferencia en NumPy para la CNN de recomendación de carreras.
+
+`NumpyCNN.from_keras` extrae los pesos de las capas Conv1D, BatchNormalization,
+MaxPooling1D, Flatten y Dense de un modelo Keras (Dropout se omite: en inferencia es la
+identidad) y `save` los guarda en un `.npz` compacto. `predict` reproduce el forward
+pass de TensorFlow en float32 sin importar TensorFlow, así que servir una predicción
+no paga el costo fijo de `model.predict` ni la memoria del runtime de TF.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+ARCHITECTURE_KEY = "__architecture__"
+
+_ACTIVATIONS = ("linear", "relu", "sigmoid", "tanh", "softmax")
+
+def _activation(x: np.ndarray, name: str) -> np.ndarray:
+    if name == "linear":
+        return x
+    if name == "relu":
+        return np.maximum(x, 0)
+    if name == "sigmoid":
+        return 1 / (1 + np.exp(-x))
+    if name == "tanh":
+        return np.tanh(x)
+    if name == "softmax":
+        exp = np.exp(x - x.max(axis=-1, keepdims=True))
+        return exp / exp.sum(axis=-1, keepdims=True)
+    raise ValueError(f"Activación no soportada: {name}")
+
+def _same_padding(length: int, window: int, stride: int) -> tuple:
+    """Relleno (izquierda, derecha) de padding='same', con la misma fórmula que TensorFlow."""
+    out_length = -(-length // stride)
+    total = max((out_length - 1) * stride + window - length, 0)
+    return total // 2, total - total // 2
+
+def _windows(x: np.ndarray, window: int, stride: int, dilation: int, padding: str,
+             pad_value: float) -> np.ndarray:
+    """Ventanas deslizantes sobre el eje temporal: (N, L, C) -> (N, L_out, C, k)."""
+    span = (window - 1) * dilation + 1
+    if padding == "same":
+        left, right = _same_padding(x.shape[1], span, stride)
+        if left or right:
+            x = np.pad(x, ((0, 0), (left, right), (0, 0)), constant_values=pad_value)
+    windows = sliding_window_view(x, span, axis=1)
+    return windows[:, ::stride, :, ::dilation]
+
+def _config_int(value: Any) -> int:
+    """Keras guarda pool_size, strides y dilation_rate como tuplas de un elemento."""
+    return int(value[0] if isinstance(value, (list, tuple)) else value)
+
+class NumpyCNN:
+    """Forward pass en NumPy de una CNN secuencial exportada de Keras."""
+
+    def __init__(self, layers: List[Dict[str, Any]], weights: Dict[str, np.ndarray]):
+        """
+        Args:
+            layers: Descripción de cada capa, en orden (tipo y configuración)
+            weights: Pesos por nombre "<índice>.<parámetro>", en float32
+        """
+        self.layers = layers
+        self.weights = {name: np.asarray(array, dtype=np.float32) for name, array in weights.items()}
+
+    @classmethod
+    def from_keras(cls, model) -> "NumpyCNN":
+        """
+        Extrae la arquitectura y los pesos de un modelo Keras secuencial.
+
+        Raises:
+            ValueError: si el modelo tiene una capa o activación no soportada
+        """
+        layers = []
+        weights = {}
+        for layer in model.layers:
+            kind = layer.__class__.__name__
+            config = layer.get_config()
+            index = len(layers)
+            if kind in ("InputLayer", "Dropout"):
+                continue
+            elif kind == "Conv1D":
+                if config.get("data_format", "channels_last") != "channels_last" or config.get("groups", 1) != 1:
+                    raise ValueError(f"Conv1D '{layer.name}': solo se soporta channels_last sin grupos")
+                if config["padding"] not in ("valid", "same"):
+                    raise ValueError(f"Conv1D '{layer.name}': padding '{config['padding']}' no soportado")
+                spec = {
+                    "type": "conv1d",
+                    "activation": config["activation"],
+                    "padding": config["padding"],
+                    "strides": _config_int(config["strides"]),
+                    "dilation": _config_int(config["dilation_rate"]),
+                    "use_bias": config["use_bias"]
+                }
+                weights[f"{index}.kernel"] = layer.kernel.numpy()
+                if config["use_bias"]:
+                    weights[f"{index}.bias"] = layer.bias.numpy()
+            elif kind == "BatchNormalization":
+                spec = {
+                    "type": "batch_norm",
+                    "epsilon": float(config["epsilon"]),
+                    "center": config["center"],
+                    "scale": config["scale"]
+                }
+                weights[f"{index}.moving_mean"] = layer.moving_mean.numpy()
+                weights[f"{index}.moving_variance"] = layer.moving_variance.numpy()
+                if config["scale"]:
+                    weights[f"{index}.gamma"] = layer.gamma.numpy()
+                if config["center"]:
+                    weights[f"{index}.beta"] = layer.beta.numpy()
+            elif kind == "MaxPooling1D":
+                pool_size = _config_int(config["pool_size"])
+                spec = {
+                    "type": "max_pool1d",
+                    "pool_size": pool_size,
+                    "strides": _config_int(config["strides"] or pool_size),
+                    "padding": config["padding"]
+                }
+            elif kind == "Flatten":
+                spec = {"type": "flatten"}
+            elif kind == "Dense":
+                spec = {
+                    "type": "dense",
+                    "activation": config["activation"],
+                    "use_bias": config["use_bias"]
+                }
+                weights[f"{index}.kernel"] = layer.kernel.numpy()
+                if config["use_bias"]:
+                    weights[f"{index}.bias"] = layer.bias.numpy()
+            else:
+                raise ValueError(f"Capa no soportada por el motor NumPy: {kind} ('{layer.name}')")
+
+            if spec.get("activation", "linear") not in _ACTIVATIONS:
+                raise ValueError(f"Capa '{layer.name}': activación '{spec['activation']}' no soportada")
+            layers.append(spec)
+        return cls(layers, weights)
+
+    def save(self, path: Path) -> None:
+        """Guarda la arquitectura y los pesos en un `.npz` (se carga sin pickle)."""
+        np.savez(
+            str(path),
+            **{ARCHITECTURE_KEY: np.array(json.dumps(self.layers))},
+            **self.weights
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "NumpyCNN":
+        with np.load(str(path), allow_pickle=False) as data:
+            layers = json.loads(str(data[ARCHITECTURE_KEY]))
+            weights = {name: data[name] for name in data.files if name != ARCHITECTURE_KEY}
+        return cls(layers, weights)
+
+    @property
+    def num_classes(self) -> int:
+        last_dense = max(i for i, spec in enumerate(self.layers) if spec["type"] == "dense")
+        return self.weights[f"{last_dense}.kernel"].shape[1]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Probabilidades por clase, con la misma entrada que el modelo Keras.
+
+        Args:
+            X: Matriz N x 16 o tensor N x 16 x 1
+
+        Returns:
+            Matriz N x clases en float32
+        """
+        x = np.asarray(X, dtype=np.float32)
+        if x.ndim == 2:
+            x = x[:, :, np.newaxis]
+
+        for index, spec in enumerate(self.layers):
+            kind = spec["type"]
+            if kind == "conv1d":
+                kernel = self.weights[f"{index}.kernel"]
+                windows = _windows(x, kernel.shape[0], spec["strides"], spec["dilation"], spec["padding"], 0.0)
+                # (N, L, C, k) x (k, C, F) -> (N, L, F)
+                x = np.tensordot(windows, kernel, axes=([2, 3], [1, 0]))
+                if spec["use_bias"]:
+                    x = x + self.weights[f"{index}.bias"]
+                x = _activation(x, spec["activation"])
+            elif kind == "batch_norm":
+                inv = 1 / np.sqrt(self.weights[f"{index}.moving_variance"] + np.float32(spec["epsilon"]))
+                if spec["scale"]:
+                    inv = inv * self.weights[f"{index}.gamma"]
+                x = (x - self.weights[f"{index}.moving_mean"]) * inv
+                if spec["center"]:
+                    x = x + self.weights[f"{index}.beta"]
+            elif kind == "max_pool1d":
+                windows = _windows(x, spec["pool_size"], spec["strides"], 1, spec["padding"], -np.inf)
+                x = windows.max(axis=-1)
+            elif kind == "flatten":
+                x = x.reshape(x.shape[0], -1)
+            elif kind == "dense":
+                x = x @ self.weights[f"{index}.kernel"]
+                if spec["use_bias"]:
+                    x = x + self.weights[f"{index}.bias"]
+                x = _activation(x, spec["activation"])
+        return x.astype(np.float32, copy=False)
+
+def parity_check(keras_model, engine: NumpyCNN, samples: int = 256, seed: int = 0) -> float:
+    """
+    Compara el motor NumPy con el modelo Keras sobre perfiles aleatorios.
+
+    Returns:
+        Máxima diferencia absoluta entre las probabilidades de ambos
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.random((samples, 16), dtype=np.float32)
+    X[:, :4] = np.round(X[:, :4])  # El vector MBTI es binario
+    expected = keras_model.predict(X[:, :, np.newaxis], verbose=0)
+    return float(np.max(np.abs(engine.predict(X) - expected)))
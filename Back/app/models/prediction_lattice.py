@@ -0,0 +1,236 @@
+"""
+Retícula precalculada de predicciones de la CNN.
+
+El espacio de entrada es pequeño y acotado: 4 bits MBTI, 4 pesos MBTI en [0, 1] y 8
+scores MI en [0, 1]. `build_lattice` evalúa el modelo en todos los puntos de una
+retícula (las 16 combinaciones MBTI por una rejilla regular en las 12 dimensiones
+continuas) y guarda las probabilidades en un `.npy` float16. `PredictionLattice`
+responde con una búsqueda en ese array (memory-mapped, sin el modelo en memoria):
+
+    "snap"         punto más cercano de la retícula (1 lectura por fila, el más rápido)
+    "simplex"      interpolación lineal en el símplice de la celda que contiene el punto
+                   (triangulación de Freudenthal: 13 vértices por fila)
+    "interpolate"  interpolación multilineal entre los 2^12 vértices de la celda; el
+                   más suave, pero más lento por fila que el propio motor NumPy
+
+Cada retícula guarda en su `.json` el error medido frente al modelo real sobre perfiles
+aleatorios; el loader solo la usa si ese error está por debajo de LATTICE_MAX_ERROR.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+# Dimensiones continuas: 4 pesos MBTI + 8 scores MI (columnas 4..15 de FEATURE_NAMES)
+NUM_MBTI_BITS = 4
+NUM_CONTINUOUS = 12
+_BIT_WEIGHTS = np.array([8, 4, 2, 1])
+
+LATTICE_MODES = ("snap", "simplex", "interpolate")
+
+# Elementos máximos del bloque (filas x vértices x clases) que se reúnen a la vez al interpolar
+_INTERPOLATION_BLOCK = 4_000_000
+
+def lattice_paths(directory: Path, model_version: Optional[str]) -> tuple:
+    """Rutas del array y de los metadatos de la retícula de una versión del modelo."""
+    name = f"neural-{model_version or 'legacy'}"
+    return Path(directory) / f"{name}.npy", Path(directory) / f"{name}.json"
+
+def _grid_features(flat_index: np.ndarray, shape: tuple) -> np.ndarray:
+    """Características (N x 16) de los puntos de la retícula con índices planos `flat_index`."""
+    coords = np.unravel_index(flat_index, shape)
+    X = np.empty((len(flat_index), NUM_MBTI_BITS + NUM_CONTINUOUS))
+    bits = coords[0]
+    for b in range(NUM_MBTI_BITS):
+        X[:, b] = (bits >> (NUM_MBTI_BITS - 1 - b)) & 1
+    for d in range(NUM_CONTINUOUS):
+        points = shape[1 + d]
+        X[:, NUM_MBTI_BITS + d] = coords[1 + d] / (points - 1) if points > 1 else 0.5
+    return X
+
+def random_profiles(samples: int, seed: int = 0) -> np.ndarray:
+    """Perfiles aleatorios (N x 16) dentro del dominio de la retícula, para medir el error."""
+    rng = np.random.default_rng(seed)
+    X = rng.random((samples, NUM_MBTI_BITS + NUM_CONTINUOUS))
+    X[:, :NUM_MBTI_BITS] = np.round(X[:, :NUM_MBTI_BITS])
+    return X
+
+class PredictionLattice:
+    """Búsqueda de probabilidades por carrera en una retícula precalculada."""
+
+    def __init__(self, values: np.ndarray, metadata: Dict[str, Any], mode: str = "snap"):
+        """
+        Args:
+            values: Array (16, p_1, ..., p_12, clases) con las probabilidades
+            metadata: Metadatos de la retícula (puntos por dimensión, clases, error medido)
+            mode: "snap", "simplex" o "interpolate" (ver LATTICE_MODES)
+        """
+        if mode not in LATTICE_MODES:
+            raise ValueError(f"Modo de retícula no soportado: {mode}")
+        self.values = values
+        self.metadata = metadata
+        self.mode = mode
+        self.points = np.array(values.shape[1:-1])
+        self.num_classes = values.shape[-1]
+        # Vértices de una celda: 2^12 combinaciones de (inferior, superior) por dimensión
+        self._corners = ((np.arange(2 ** NUM_CONTINUOUS)[:, None] >> np.arange(NUM_CONTINUOUS)[::-1]) & 1)
+        # Pasos acumulados del símplice: el vértice k suma 1 en las k dimensiones con mayor fracción
+        self._steps = np.tril(np.ones((NUM_CONTINUOUS + 1, NUM_CONTINUOUS), dtype=int), -1)
+
+    @classmethod
+    def load(cls, array_path: Path, metadata_path: Path, mode: str = "snap") -> "PredictionLattice":
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        return cls(np.load(str(array_path), mmap_mode="r"), metadata, mode)
+
+    @property
+    def class_names(self) -> List[str]:
+        return self.metadata["classes"]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Probabilidades por clase, con la misma entrada que el motor de la CNN.
+
+        Args:
+            X: Matriz N x 16 (o tensor N x 16 x 1)
+
+        Returns:
+            Matriz N x clases en float32
+        """
+        X = np.asarray(X, dtype=np.float64).reshape(len(X), -1)
+        bits = (np.round(X[:, :NUM_MBTI_BITS]).astype(int) & 1) @ _BIT_WEIGHTS
+        position = np.clip(X[:, NUM_MBTI_BITS:], 0.0, 1.0) * (self.points - 1)
+
+        if self.mode == "snap":
+            index = np.round(position).astype(int)
+            probs = self.values[(bits, *index.T)].astype(np.float32)
+        elif self.mode == "simplex":
+            probs = self._simplex(bits, position)
+        else:
+            probs = self._interpolate(bits, position)
+        # Renormalizar: float16 e interpolación no garantizan suma exacta 1
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def _cell(self, position: np.ndarray) -> tuple:
+        """Celda inferior y fracción dentro de ella; las dimensiones de un solo punto no interpolan."""
+        lower = np.minimum(np.floor(position), np.maximum(self.points - 2, 0)).astype(int)
+        frac = np.where(self.points > 1, position - lower, 0.0)
+        return lower, frac
+
+    def _simplex(self, bits: np.ndarray, position: np.ndarray) -> np.ndarray:
+        lower, frac = self._cell(position)
+        out = np.empty((len(bits), self.num_classes), dtype=np.float32)
+        num_vertices = NUM_CONTINUOUS + 1
+
+        block = max(1, _INTERPOLATION_BLOCK // (num_vertices * self.num_classes))
+        for start in range(0, len(bits), block):
+            rows = slice(start, start + block)
+            # Dimensiones de mayor a menor fracción: el símplice que contiene al punto
+            order = np.argsort(-frac[rows], axis=1, kind="stable")
+            sorted_frac = np.take_along_axis(frac[rows], order, axis=1)
+            # (n, vértices, dims): se recorre la celda sumando 1 en cada dimensión, en ese orden
+            offsets = np.empty((len(order), num_vertices, NUM_CONTINUOUS), dtype=int)
+            np.put_along_axis(offsets, np.broadcast_to(order[:, None, :], offsets.shape), self._steps[None], axis=2)
+            index = np.minimum(lower[rows, None, :] + offsets, self.points - 1)
+            # Coordenadas baricéntricas: diferencias entre fracciones consecutivas
+            weights = -np.diff(sorted_frac, axis=1, prepend=1.0, append=0.0)
+            gathered = self.values[(bits[rows, None], *np.moveaxis(index, 2, 0))].astype(np.float32)
+            out[rows] = np.einsum("nv,nvc->nc", weights.astype(np.float32), gathered)
+        return out
+
+    def _interpolate(self, bits: np.ndarray, position: np.ndarray) -> np.ndarray:
+        lower, frac = self._cell(position)
+        corners = self._corners
+        out = np.empty((len(bits), self.num_classes), dtype=np.float32)
+
+        block = max(1, _INTERPOLATION_BLOCK // (len(corners) * self.num_classes))
+        for start in range(0, len(bits), block):
+            rows = slice(start, start + block)
+            # (n, vértices, dims): índice de cada vértice y peso multilineal de cada uno
+            index = np.minimum(lower[rows, None, :] + corners[None], self.points - 1)
+            weights = np.prod(np.where(corners[None], frac[rows, None, :], 1 - frac[rows, None, :]), axis=2)
+            gathered = self.values[(bits[rows, None], *np.moveaxis(index, 2, 0))].astype(np.float32)
+            out[rows] = np.einsum("nv,nvc->nc", weights.astype(np.float32), gathered)
+        return out
+
+def measure_error(lattice: PredictionLattice, predict_proba: Callable[[np.ndarray], np.ndarray],
+                  samples: int = 2000, seed: int = 0) -> Dict[str, float]:
+    """
+    Error de la retícula frente al modelo real sobre perfiles aleatorios.
+
+    Returns:
+        Error absoluto de probabilidad (máximo, p99 y medio) y coincidencia del top-1 y
+        del conjunto top-3
+    """
+    X = random_profiles(samples, seed)
+    expected = np.asarray(predict_proba(X), dtype=np.float32)
+    approx = lattice.predict(X)
+    error = np.abs(approx - expected)
+    top3_expected = np.argsort(-expected, axis=1)[:, :3]
+    top3_approx = np.argsort(-approx, axis=1)[:, :3]
+    return {
+        "samples": samples,
+        "max_abs_error": float(error.max()),
+        "p99_abs_error": float(np.percentile(error.max(axis=1), 99)),
+        "mean_abs_error": float(error.mean()),
+        "top1_agreement": float(np.mean(top3_expected[:, 0] == top3_approx[:, 0])),
+        "top3_agreement": float(np.mean([set(a) == set(b) for a, b in zip(top3_expected, top3_approx)]))
+    }
+
+def build_lattice(predict_proba: Callable[[np.ndarray], np.ndarray], class_names: List[str],
+                  weight_points: int, mi_points: int, directory: Path,
+                  model_version: Optional[str] = None, batch_size: int = 8192,
+                  error_samples: int = 2000, mode: str = "snap") -> Dict[str, Any]:
+    """
+    Evalúa el modelo en toda la retícula y guarda el array y sus metadatos.
+
+    Args:
+        predict_proba: Función del modelo real (matriz N x 16 -> N x clases)
+        class_names: Nombres de las clases, en el orden de las columnas
+        weight_points: Puntos de la rejilla para cada peso MBTI
+        mi_points: Puntos de la rejilla para cada score MI
+        directory: Directorio donde se guarda la retícula
+        model_version: Versión del modelo evaluado (forma parte del nombre del archivo)
+        batch_size: Puntos evaluados por llamada al modelo
+        error_samples: Perfiles aleatorios para medir el error de la retícula
+        mode: Modo de búsqueda con el que se mide el error
+
+    Returns:
+        Metadatos guardados (incluye el error medido)
+    """
+    shape = (2 ** NUM_MBTI_BITS,) + (weight_points,) * 4 + (mi_points,) * 8
+    total = int(np.prod(shape))
+    array_path, metadata_path = lattice_paths(directory, model_version)
+    os.makedirs(directory, exist_ok=True)
+
+    tmp_array = array_path.with_name(f".{array_path.name}.{os.getpid()}.tmp")
+    values = np.lib.format.open_memmap(str(tmp_array), mode="w+", dtype=np.float16,
+                                       shape=shape + (len(class_names),))
+    flat = values.reshape(total, len(class_names))
+    for start in range(0, total, batch_size):
+        index = np.arange(start, min(start + batch_size, total))
+        flat[index] = predict_proba(_grid_features(index, shape))
+    values.flush()
+    del values, flat
+
+    metadata = {
+        "model_version": model_version,
+        "classes": [str(c) for c in class_names],
+        "shape": list(shape),
+        "weight_points": weight_points,
+        "mi_points": mi_points,
+        "dtype": "float16"
+    }
+    lattice = PredictionLattice(np.load(str(tmp_array), mmap_mode="r"), metadata, mode)
+    metadata["error"] = {"mode": mode, **measure_error(lattice, predict_proba, error_samples)}
+    del lattice
+
+    os.replace(tmp_array, array_path)
+    tmp_metadata = metadata_path.with_name(f".{metadata_path.name}.{os.getpid()}.tmp")
+    with open(tmp_metadata, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_metadata, metadata_path)
+    return metadata
@@ -0,0 +1,82 @@
+from typing import Optional
+
+import numpy as np
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Normaliza cada fila a norma L2 unitaria, en float32 contiguo.
+
+    Las filas de norma cero se dejan en cero, como `sklearn.preprocessing.normalize`,
+    así que su similitud coseno con cualquier consulta es 0.
+
+    Args:
+        matrix: Matriz N x D (o vector de D)
+
+    Returns:
+        Matriz N x D (o vector) en float32, C-contigua
+    """
+    matrix = np.array(matrix, dtype=np.float32, order="C", ndmin=1)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    matrix /= norms
+    return matrix
+
+def cosine_scores(queries: np.ndarray, normalized_matrix: np.ndarray) -> np.ndarray:
+    """
+    Similitud coseno de las consultas contra una matriz ya normalizada con `normalize_rows`.
+
+    Solo se normalizan las consultas; el catálogo se puntúa con un único producto
+    matriz-vector (o matriz-matriz para un batch).
+
+    Args:
+        queries: Vector de D o matriz Q x D de embeddings sin normalizar
+        normalized_matrix: Matriz N x D normalizada
+
+    Returns:
+        Vector de N (o matriz Q x N) de similitudes en float32
+    """
+    return normalize_rows(queries) @ normalized_matrix.T
+
+def top_k_indices(scores: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Índices de los k mayores puntajes de cada fila, ordenados de mayor a menor.
+
+    Usa argpartition (O(n) por fila) y ordena solo los k elegidos, en lugar de
+    ordenar todo el catálogo. Los empates se resuelven como un sort estable (primero
+    el de menor índice).
+
+    Args:
+        scores: Matriz N x M de puntajes (o vector de M)
+        k: Número de índices por fila
+        mask: Vector booleano de M; las columnas en False nunca se eligen
+
+    Returns:
+        Matriz N x min(k, columnas válidas) de índices (o vector si `scores` es 1-D)
+    """
+    scores = np.asarray(scores)
+    single = scores.ndim == 1
+    if single:
+        scores = scores[np.newaxis, :]
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+        k = min(k, int(np.count_nonzero(mask)))
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        top = np.empty((scores.shape[0], 0), dtype=np.intp)
+        return top[0] if single else top
+
+    if k < scores.shape[1]:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        # Con empates en el límite, argpartition elige cualquiera de ellos: esas filas se
+        # ordenan completas para quedarse, como un sort estable, con los de menor índice
+        kth = np.take_along_axis(scores, top, axis=1).min(axis=1, keepdims=True)
+        ties = (scores == kth).sum(axis=1) > (np.take_along_axis(scores, top, axis=1) == kth).sum(axis=1)
+        for row in np.flatnonzero(ties):
+            top[row] = np.argsort(-scores[row], kind="stable")[:k]
+    else:
+        top = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    # Orden estable: a igual puntaje, primero el de menor índice
+    top.sort(axis=1)
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    return top[0] if single else top
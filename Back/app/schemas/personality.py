@@ -15,6 +15,13 @@ class MBTIResult(BaseModel):
 class MIResult(BaseModel):
     MI_scores: Dict[str, float]  # e.g., {"Lin": 0.7, "LogMath": 0.9, ...}
 
+class ProfileInput(BaseModel):
+    mbti_result: MBTIResult
+    mi_result: MIResult
+
+class BatchProfilesRequest(BaseModel):
+    profiles: List[ProfileInput]  # one entry per student; results keep the same order
+
 class CareerPrediction(BaseModel):
     top_predictions: List[str]
     confidence: List[float]
@@ -30,6 +37,8 @@ class CareerMatch(BaseModel):
     universidad: str
     ciudad: str
     match_score: float
+    # Motor que generó la recomendación: "cnn", "random_forest", "embedding" o "rules"
+    engine: Optional[str] = None
 
 class UserProfile(BaseModel):
     mbti_result: Optional[MBTIResult] = None
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Script para construir el índice ANN del catálogo y medir su recall@k y latencia frente
+a la búsqueda exacta, para varios valores de nprobe.
+
+Por defecto usa los embeddings del catálogo real (requiere sentence-transformers) y
+guarda el índice donde lo carga el recomendador. Con --synthetic N mide sobre un
+catálogo sintético agrupado de N carreras, útil para dimensionar ANN_LISTS y
+ANN_NPROBE antes de cargar un catálogo grande.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Añadir directorio raíz a la ruta de Python
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import numpy as np
+
+from app.models.ann_index import IVFIndex
+from app.models.retrieval import cosine_scores, normalize_rows, top_k_indices
+
+def synthetic_catalog(size, dim=384, clusters=200, seed=0):
+    """Embeddings agrupados alrededor de `clusters` temas, como un catálogo de programas."""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size)
+    return topics[labels] + 1.2 * rng.standard_normal((size, dim)).astype(np.float32)
+
+def _latency_us(search, queries):
+    """Mediana en microsegundos de una búsqueda de una consulta."""
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1e6)
+
+def benchmark(matrix, queries, k, n_lists, nprobes, output=None):
+    """
+    Construye el índice y muestra recall@k y latencia por nprobe.
+
+    Args:
+        matrix: Embeddings del catálogo
+        queries: Embeddings de consulta
+        k: Vecinos por consulta
+        n_lists: Listas del índice (0 = automático)
+        nprobes: Valores de nprobe a medir
+        output: Directorio donde guardar el índice (None para no guardarlo)
+    """
+    start = time.perf_counter()
+    index = IVFIndex.build(matrix, n_lists)
+    print(f"Índice construido en {time.perf_counter() - start:.1f}s: {index.size} carreras, "
+          f"{index.n_lists} listas (media {index.stats()['mean_list_size']} por lista)")
+    if output:
+        index.save(output)
+        print(f"Índice guardado en {output}")
+
+    normalized = normalize_rows(matrix)
+    exact_us = _latency_us(lambda q: top_k_indices(cosine_scores(q, normalized), k), queries)
+    print(f"Búsqueda exacta: {exact_us:.0f} µs por consulta")
+    print(f"{'nprobe':>8}{'recall@' + str(k):>12}{'µs':>10}{'speedup':>10}")
+    for nprobe in nprobes:
+        nprobe = min(nprobe, index.n_lists)
+        recall = index.recall(matrix, queries, k, nprobe)
+        ann_us = _latency_us(lambda q: index.search(q, k, nprobe=nprobe), queries)
+        print(f"{nprobe:>8}{recall:>12.3f}{ann_us:>10.0f}{exact_us / ann_us:>9.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Recall y latencia del índice ANN de carreras')
+    parser.add_argument('--synthetic', type=int, default=0, help='Tamaño de un catálogo sintético (0 = catálogo real)')
+    parser.add_argument('--queries', type=int, default=200, help='Número de consultas')
+    parser.add_argument('--k', type=int, default=10, help='Vecinos por consulta')
+    parser.add_argument('--lists', type=int, default=0, help='Listas del índice (0 = automático)')
+    parser.add_argument('--nprobe', default="1,2,4,8,16,32", help='Valores de nprobe, separados por comas')
+
+    args = parser.parse_args()
+    nprobes = [int(value) for value in args.nprobe.split(",")]
+    rng = np.random.default_rng(1)
+    if args.synthetic:
+        matrix = synthetic_catalog(args.synthetic)
+        # Consultas cercanas al catálogo, como perfiles que se parecen a alguna carrera
+        queries = matrix[rng.choice(len(matrix), args.queries)] + \
+            1.0 * rng.standard_normal((args.queries, matrix.shape[1])).astype(np.float32)
+        benchmark(matrix, queries, args.k, args.lists, nprobes)
+    else:
+        from app.models.career_model import CareerRecommender
+        from app.models.embedding_cache import cache_stem
+
+        recommender = CareerRecommender()
+        if not recommender.model:
+            raise SystemExit("No se pudo cargar el modelo de embeddings")
+        matrix = recommender.career_embeddings
+        profiles = [recommender.careers[i]["descripcion"] for i in rng.choice(len(matrix), args.queries)]
+        queries = recommender.model.encode(profiles)
+        output = recommender.data_path.parent / "embeddings" / cache_stem("ann_index", recommender.encoder_name)
+        benchmark(matrix, queries, args.k, args.lists, nprobes, output)
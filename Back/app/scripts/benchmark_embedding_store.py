@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Script para comparar los formatos de la matriz de embeddings del catálogo (float32,
+float16 y float16 con PCA): tamaño, acuerdo del ranking con la matriz float32 completa
+y latencia de puntuar una consulta contra todo el catálogo.
+
+Por defecto usa los embeddings del catálogo real (requiere sentence-transformers) y
+perfiles aleatorios como consultas. Con --synthetic N mide sobre un catálogo sintético
+agrupado de N carreras. Termina con error si el formato configurado
+(EMBEDDING_STORE_DTYPE / EMBEDDING_STORE_PCA_DIMS) queda por debajo de --min-overlap.
+
+Uso:
+    python app/scripts/benchmark_embedding_store.py --pca 64,128,192
+    python app/scripts/benchmark_embedding_store.py --synthetic 50000
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Añadir directorio raíz a la ruta de Python
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.embedding_store import EmbeddingStore
+
+def _latency_us(store, queries):
+    """Mediana en microsegundos de puntuar una consulta contra todo el catálogo."""
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        store.scores(query)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1e6)
+
+def benchmark(matrix, queries, k, pca_dims):
+    """
+    Muestra tamaño, acuerdo del top-k y latencia de cada formato.
+
+    Returns:
+        Acuerdo del top-k del formato configurado
+    """
+    formats = [("float32", 0), ("float16", 0)] + [("float16", dims) for dims in pca_dims]
+    configured = (settings.EMBEDDING_STORE_DTYPE, settings.EMBEDDING_STORE_PCA_DIMS)
+    if configured not in formats:
+        formats.append(configured)
+
+    print(f"Catálogo: {matrix.shape[0]} carreras x {matrix.shape[1]} dimensiones, {len(queries)} consultas")
+    print(f"{'formato':<16}{'MB':>8}{'top-' + str(k):>9}{'top-1':>8}{'máx |Δ|':>10}{'µs':>10}")
+    result = None
+    for dtype, dims in formats:
+        store = EmbeddingStore.from_embeddings(matrix, dtype, dims)
+        quality = store.ranking_agreement(matrix, queries, k)
+        label = f"{dtype}" + (f"/pca{dims}" if dims else "")
+        print(f"{label:<16}{store.nbytes / (1024 * 1024):>8.1f}{quality['topk_overlap']:>9.3f}"
+              f"{quality['top1_agreement']:>8.3f}{quality['max_abs_score_diff']:>10.4f}"
+              f"{_latency_us(store, queries[:200]):>10.0f}")
+        if (dtype, dims) == configured:
+            result = quality["topk_overlap"]
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Tamaño, calidad y latencia de los formatos de la matriz de embeddings')
+    parser.add_argument('--synthetic', type=int, default=0, help='Tamaño de un catálogo sintético (0 = catálogo real)')
+    parser.add_argument('--queries', type=int, default=500, help='Número de consultas')
+    parser.add_argument('--k', type=int, default=10, help='Tamaño del top-k comparado')
+    parser.add_argument('--pca', default="128", help='Dimensiones PCA a medir, separadas por comas')
+    parser.add_argument('--min-overlap', type=float, default=settings.EMBEDDING_STORE_MIN_AGREEMENT,
+                        help='Solapamiento mínimo aceptado del top-k para el formato configurado')
+
+    args = parser.parse_args()
+    pca_dims = [int(value) for value in args.pca.split(",") if value]
+    rng = np.random.default_rng(1)
+    if args.synthetic:
+        from app.scripts.benchmark_ann_index import synthetic_catalog
+
+        matrix = synthetic_catalog(args.synthetic)
+        # Consultas cercanas al catálogo, como perfiles que se parecen a alguna carrera
+        queries = matrix[rng.choice(len(matrix), args.queries)] + \
+            1.0 * rng.standard_normal((args.queries, matrix.shape[1])).astype(np.float32)
+    else:
+        from app.models.career_model import CareerRecommender
+        from app.scripts.benchmark_encoder_quantization import random_profiles
+
+        recommender = CareerRecommender()
+        if not recommender.model:
+            raise SystemExit("No se pudo cargar el modelo de embeddings")
+        matrix = np.asarray(recommender.career_embeddings, dtype=np.float32)
+        queries = recommender.model.encode(random_profiles(recommender, args.queries))
+
+    overlap = benchmark(matrix, queries, args.k, pca_dims)
+    if overlap < args.min_overlap:
+        raise SystemExit(f"El solapamiento del top-{args.k} del formato configurado ({overlap:.3f}) "
+                         f"está por debajo de {args.min_overlap}")
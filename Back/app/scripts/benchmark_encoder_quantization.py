@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Script para validar y medir el encoder cuantizado en int8 frente al de fp32.
+
+1. Paridad: codifica el catálogo y perfiles aleatorios con ambos encoders y compara
+   el coseno entre embeddings y el top-k de recomendaciones (cada encoder contra su
+   propio catálogo). Termina con error si el solapamiento del top-k queda por debajo
+   de --min-overlap.
+2. Latencia y memoria: en un proceso nuevo por variante, mide la memoria que añade el
+   encoder y la latencia de codificar un perfil (el camino de cada petición) y un batch.
+
+Uso:
+    python app/scripts/benchmark_encoder_quantization.py --profiles 500
+    ENCODER_QUANTIZATION=int8 uvicorn main:app   # si la paridad es aceptable
+"""
+
+import sys
+import time
+import argparse
+import multiprocessing
+from pathlib import Path
+
+# Añadir directorio raíz a la ruta de Python
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.encoder import ENCODER_VARIANTS, encoder_parity, load_encoder
+
+MBTI_DIMENSIONS = ["E/I", "S/N", "T/F", "J/P"]
+MI_TYPES = ["Lin", "LogMath", "Spa", "BodKin", "Mus", "Inter", "Intra", "Nat"]
+
+def random_profiles(recommender, count, seed=0):
+    """Textos de perfil aleatorios, construidos como los del recomendador."""
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(count):
+        vector = rng.integers(0, 2, 4)
+        code = "".join(pair[bit] for pair, bit in zip(["EI", "SN", "TF", "JP"], vector))
+        weights = {dim: float(rng.random()) for dim in MBTI_DIMENSIONS}
+        scores = {mi: float(rng.random()) for mi in MI_TYPES}
+        texts.append(recommender._profile_text(code, weights, scores))
+    return texts
+
+def _worker(variant, model_name, texts, results):
+    """Carga el encoder en `variant` y reporta memoria y latencias."""
+    import sentence_transformers  # noqa: F401
+    import torch  # noqa: F401
+    from app.utils.memory import memory_breakdown
+
+    before = memory_breakdown()
+    start = time.perf_counter()
+    encoder, loaded = load_encoder(model_name, variant)
+    load_seconds = time.perf_counter() - start
+    encoder.encode(texts[:8])
+    after = memory_breakdown()
+
+    single = []
+    for text in texts[:200]:
+        start = time.perf_counter()
+        encoder.encode([text])
+        single.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    encoder.encode(texts, batch_size=64)
+    batch_seconds = time.perf_counter() - start
+
+    results.put({
+        "variant": loaded,
+        "load_seconds": load_seconds,
+        "rss_delta_mb": after.get("rss_mb", 0.0) - before.get("rss_mb", 0.0),
+        "private_delta_mb": after.get("private_mb", 0.0) - before.get("private_mb", 0.0),
+        "single_ms": float(np.median(single) * 1e3),
+        "batch_ms_per_text": batch_seconds / len(texts) * 1e3
+    })
+
+def measure(variant, model_name, texts):
+    """Ejecuta `_worker` en un proceso nuevo para que las variantes no compartan memoria."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_worker, args=(variant, model_name, texts, results))
+    process.start()
+    stats = results.get(timeout=600)
+    process.join()
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Paridad, latencia y memoria del encoder cuantizado en int8')
+    parser.add_argument('--profiles', type=int, default=500, help='Perfiles aleatorios para la paridad y la latencia')
+    parser.add_argument('--k', type=int, default=3, help='Tamaño del top-k de recomendaciones comparado')
+    parser.add_argument('--min-overlap', type=float, default=0.9, help='Solapamiento mínimo aceptado del top-k')
+
+    args = parser.parse_args()
+
+    from app.models.career_model import CareerRecommender
+
+    # El recomendador de referencia usa el encoder en fp32
+    settings.ENCODER_QUANTIZATION = "fp32"
+    recommender = CareerRecommender()
+    if not recommender.model:
+        raise SystemExit("No se pudo cargar el modelo de embeddings")
+    texts = random_profiles(recommender, args.profiles)
+    catalog = [career["descripcion"] for career in recommender.careers]
+
+    quantized, variant = load_encoder(recommender.MODEL_NAME, "int8")
+    if variant != "int8":
+        raise SystemExit("La cuantización int8 no está disponible en este entorno")
+    parity = encoder_parity(recommender.model, quantized, catalog, texts, args.k)
+    print(f"Paridad int8 vs fp32 ({len(catalog)} carreras, {len(texts)} perfiles):")
+    print(f"  coseno medio {parity['mean_cosine']:.4f}, mínimo {parity['min_cosine']:.4f}")
+    print(f"  solapamiento top-{args.k} {parity['topk_overlap']:.3f}, "
+          f"misma primera recomendación {parity['top1_agreement']:.3f}")
+    del quantized
+
+    print(f"{'variante':<10}{'carga s':>9}{'RSS MB':>9}{'privada MB':>12}{'1 perfil ms':>13}{'batch ms/texto':>16}")
+    for name in ENCODER_VARIANTS:
+        stats = measure(name, recommender.MODEL_NAME, texts)
+        print(f"{stats['variant']:<10}{stats['load_seconds']:>9.1f}{stats['rss_delta_mb']:>9.0f}"
+              f"{stats['private_delta_mb']:>12.0f}{stats['single_ms']:>13.2f}{stats['batch_ms_per_text']:>16.2f}")
+
+    if parity["topk_overlap"] < args.min_overlap:
+        raise SystemExit(f"El solapamiento del top-{args.k} ({parity['topk_overlap']:.3f}) "
+                         f"está por debajo de {args.min_overlap}")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Script para medir la memoria por worker del RandomForest según cómo se carga.
+
+Lanza N procesos independientes (como `uvicorn --workers N`, que no comparte memoria
+por copy-on-write) para cada modo de carga y mide, con todos los procesos vivos a la
+vez, cuánta memoria añade el modelo a cada uno:
+
+- pickle: joblib.load de rf_model.pkl (copia privada en el heap de cada worker)
+- npz: bosque aplanado desde rf_flat.npz (copia privada, más pequeña)
+- mmap: bosque aplanado desde rf_flat/ con memory-map (una copia compartida en la caché
+  de páginas del nodo)
+
+El PSS reparte las páginas compartidas entre los procesos que las mapean, así que es la
+medida que refleja el coste real por worker.
+"""
+
+import sys
+import argparse
+import tempfile
+import multiprocessing
+from pathlib import Path
+
+# Añadir directorio raíz a la ruta de Python
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+MODES = ("pickle", "npz", "mmap")
+
+def _worker(mode, paths, loaded, done, results):
+    """Carga el modelo en `mode`, predice y reporta la memoria añadida por el modelo."""
+    import joblib
+    import numpy as np
+    # La aplicación importa scikit-learn en todos los modos; no se cuenta como memoria del modelo
+    import sklearn.ensemble  # noqa: F401
+    from app.models.flat_forest import FlatForest
+    from app.utils.memory import memory_breakdown
+
+    X = np.random.default_rng(0).random((256, 16))
+    before = memory_breakdown()
+    if mode == "pickle":
+        model = joblib.load(str(paths["pickle"]))
+    elif mode == "npz":
+        model = FlatForest.load(paths["npz"])
+    else:
+        model = FlatForest.load(paths["mmap"], mmap=True)
+    # Recorrer todas las filas toca las páginas del modelo, como lo haría el tráfico real
+    model.predict_proba(X)
+
+    # Medir con todos los workers del modo cargados, para que el PSS reparta lo compartido
+    loaded.wait()
+    after = memory_breakdown()
+    results.put({key: after.get(key, 0.0) - before.get(key, 0.0) for key in after})
+    done.wait()
+
+def measure(mode, paths, workers):
+    """
+    Lanza `workers` procesos que cargan el modelo en `mode`.
+
+    Returns:
+        Diccionario con el incremento medio de rss/pss/compartida/privada (MB) por worker
+    """
+    context = multiprocessing.get_context("spawn")
+    loaded = context.Barrier(workers)
+    done = context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(mode, paths, loaded, done, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    samples = [results.get(timeout=120) for _ in processes]
+    done.wait()
+    for process in processes:
+        process.join()
+    keys = ("rss_mb", "pss_mb", "shared_mb", "private_mb")
+    return {key: sum(sample.get(key, 0.0) for sample in samples) / workers for key in keys}
+
+def prepare_paths(directory):
+    """
+    Localiza rf_model.pkl de la versión publicada (o el legacy) y genera al lado, en un
+    directorio temporal, el bosque aplanado en ambos formatos.
+    """
+    import joblib
+    from app.models.artifacts import ArtifactStore
+    from app.models.flat_forest import FlatForest
+    from app.models.minimal_neural import MinimalNeuralCareerModel
+
+    store = ArtifactStore("minimal")
+    version = store.resolve(None)
+    if version:
+        pickle_path = store.version_dir(version) / "rf_model.pkl"
+    else:
+        pickle_path = MinimalNeuralCareerModel().model_path / "rf_model.pkl"
+    if not pickle_path.exists():
+        raise SystemExit("No hay ningún RandomForest entrenado")
+
+    flat = FlatForest.from_sklearn(joblib.load(str(pickle_path)))
+    paths = {
+        "pickle": pickle_path,
+        "npz": Path(directory) / "rf_flat.npz",
+        "mmap": Path(directory) / "rf_flat"
+    }
+    flat.save(paths["npz"])
+    flat.save_arrays(paths["mmap"])
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Medir la memoria por worker del RandomForest')
+    parser.add_argument('--workers', type=int, default=4, help='Número de workers por modo')
+    parser.add_argument('--modes', default=",".join(MODES), help='Modos a medir, separados por comas')
+
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        paths = prepare_paths(directory)
+        print(f"Modelo: {paths['pickle']} ({args.workers} workers por modo)")
+        print(f"{'modo':<8}{'RSS MB':>10}{'PSS MB':>10}{'compartida':>12}{'privada':>10}")
+        for mode in args.modes.split(","):
+            usage = measure(mode, paths, args.workers)
+            print(f"{mode:<8}{usage['rss_mb']:>10.1f}{usage['pss_mb']:>10.1f}"
+                  f"{usage['shared_mb']:>12.1f}{usage['private_mb']:>10.1f}")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Script para precalcular la retícula de predicciones de la CNN publicada.
+
+Evalúa el modelo en todos los puntos de la rejilla (16 combinaciones MBTI por los puntos
+de cada peso MBTI y score MI), guarda las probabilidades en LATTICE_DIR y mide su error
+frente al modelo sobre perfiles aleatorios. Con CNN_ENGINE="lattice" los workers sirven
+desde esa retícula sin cargar el modelo.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Añadir directorio raíz a la ruta de Python
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from app.core.config import settings
+
+def build_prediction_lattice(weight_points=None, mi_points=None, mode=None, samples=2000, batch_size=8192):
+    """
+    Construye la retícula de la versión del modelo CNN configurada.
+
+    Args:
+        weight_points: Puntos de la rejilla por peso MBTI (por defecto LATTICE_WEIGHT_POINTS)
+        mi_points: Puntos de la rejilla por score MI (por defecto LATTICE_MI_POINTS)
+        mode: Modo de búsqueda con el que se mide el error (por defecto LATTICE_MODE)
+        samples: Perfiles aleatorios para medir el error
+        batch_size: Puntos evaluados por llamada al modelo
+
+    Returns:
+        Metadatos de la retícula, con el error medido
+    """
+    weight_points = weight_points or settings.LATTICE_WEIGHT_POINTS
+    mi_points = mi_points or settings.LATTICE_MI_POINTS
+    mode = mode or settings.LATTICE_MODE
+
+    # La retícula se evalúa con el modelo real, nunca con una retícula anterior
+    if settings.CNN_ENGINE == "lattice":
+        settings.CNN_ENGINE = "numpy"
+    from app.models.neural_model import NeuralCareerModel
+    from app.models.prediction_lattice import build_lattice
+
+    model = NeuralCareerModel()
+    if not model.is_trained:
+        raise SystemExit("No hay ningún modelo CNN entrenado")
+
+    total = 16 * weight_points ** 4 * mi_points ** 8
+    classes = list(model.label_encoder.classes_)
+    print(f"neural/{model.version or 'legacy'} ({model.engine_name}): {total} puntos x {len(classes)} clases "
+          f"(~{total * len(classes) * 2 / 1024 ** 2:.1f} MB en float16)")
+
+    start = time.perf_counter()
+    metadata = build_lattice(
+        model.predict_proba,
+        classes,
+        weight_points,
+        mi_points,
+        Path(settings.LATTICE_DIR),
+        model_version=model.version,
+        batch_size=batch_size,
+        error_samples=samples,
+        mode=mode
+    )
+    error = metadata["error"]
+    print(f"Retícula construida en {time.perf_counter() - start:.1f} s en {settings.LATTICE_DIR}")
+    print(f"Error ({mode}, {samples} perfiles): máx {error['max_abs_error']:.4f}, "
+          f"p99 {error['p99_abs_error']:.4f}, medio {error['mean_abs_error']:.5f}; "
+          f"top-1 igual {error['top1_agreement']:.1%}, top-3 igual {error['top3_agreement']:.1%}")
+    if error["max_abs_error"] > settings.LATTICE_MAX_ERROR:
+        print(f"El error supera LATTICE_MAX_ERROR ({settings.LATTICE_MAX_ERROR}): la retícula no se usará. "
+              f"Aumenta los puntos de la rejilla o la tolerancia.")
+    return metadata
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Precalcular la retícula de predicciones de la CNN')
+    parser.add_argument('--weight-points', type=int, default=None, help='Puntos de la rejilla por peso MBTI')
+    parser.add_argument('--mi-points', type=int, default=None, help='Puntos de la rejilla por score MI')
+    parser.add_argument('--mode', choices=['snap', 'simplex', 'interpolate'], default=None, help='Modo de búsqueda a evaluar')
+    parser.add_argument('--samples', type=int, default=2000, help='Perfiles aleatorios para medir el error')
+    parser.add_argument('--batch-size', type=int, default=8192, help='Puntos por llamada al modelo')
+
+    args = parser.parse_args()
+    build_prediction_lattice(
+        weight_points=args.weight_points,
+        mi_points=args.mi_points,
+        mode=args.mode,
+        samples=args.samples,
+        batch_size=args.batch_size
+    )
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Script para añadir el bosque aplanado a una versión del RandomForest ya publicada.
+
+Las versiones son inmutables, así que se publica una versión nueva con los mismos
+archivos más rf_flat/ (un .npy por array, que los workers abren con memory-map), tras
+comprobar que el evaluador aplanado da exactamente las mismas probabilidades que
+scikit-learn. También compara el tamaño en disco y la latencia de una predicción de una
+fila con ambos motores.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+from pathlib import Path
+
+# Añadir directorio raíz a la ruta de Python
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import joblib
+import numpy as np
+
+from app.models.artifacts import ArtifactStore
+from app.models.flat_forest import FlatForest, verify_forest
+from app.models.minimal_neural import MinimalNeuralCareerModel
+
+def _latency_us(predict, X, repeats=200):
+    """Mediana en microsegundos de `predict(X)`."""
+    predict(X)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1e6)
+
+def export_flat_forest(version=None, make_current=True):
+    """
+    Aplana el RandomForest de una versión publicada.
+
+    Args:
+        version: Versión de origen (None para la publicada en CURRENT)
+        make_current: Si la versión nueva pasa a ser la publicada
+
+    Returns:
+        Nombre de la versión creada
+    """
+    store = ArtifactStore("minimal")
+    source = store.resolve(version)
+    if not source:
+        raise SystemExit("No hay ninguna versión publicada del RandomForest")
+
+    manifest = store.verify(source)
+    source_dir = store.version_dir(source)
+    pickle_path = source_dir / "rf_model.pkl"
+
+    forest = joblib.load(str(pickle_path))
+    flat = FlatForest.from_sklearn(forest)
+    max_diff = verify_forest(forest, flat, samples=5000)
+    print(f"Diferencia máxima con scikit-learn: {max_diff:.2e} ({flat.n_estimators} árboles, {flat.node_count} nodos)")
+    if max_diff != 0.0:
+        raise SystemExit("El bosque aplanado no coincide con scikit-learn; no se publica")
+
+    X = np.random.default_rng(0).random((1, forest.n_features_in_))
+    sklearn_us = _latency_us(forest.predict_proba, X)
+    flat_us = _latency_us(flat.predict_proba, X)
+    print(f"Latencia de una fila: scikit-learn {sklearn_us:.0f} µs, aplanado {flat_us:.0f} µs "
+          f"({sklearn_us / flat_us:.1f}x)")
+
+    def write(directory: Path):
+        for item in source_dir.iterdir():
+            if item.name in ("manifest.json", MinimalNeuralCareerModel.FLAT_FOREST_FILE,
+                             MinimalNeuralCareerModel.FLAT_FOREST_DIR):
+                continue
+            if item.is_dir():
+                shutil.copytree(item, directory / item.name)
+            else:
+                shutil.copy2(item, directory / item.name)
+        flat.save_arrays(directory / MinimalNeuralCareerModel.FLAT_FOREST_DIR)
+
+    metrics = dict(manifest.get("metrics", {}), flat_forest_max_abs_diff=max_diff)
+    new_version = store.publish(
+        write,
+        classes=manifest["classes"],
+        training_hash=manifest.get("training_data_hash"),
+        metrics=metrics,
+        make_current=make_current
+    )
+    flat_path = store.version_dir(new_version) / MinimalNeuralCareerModel.FLAT_FOREST_DIR
+    flat_size = sum(os.path.getsize(item) for item in flat_path.iterdir())
+    print(f"Tamaño en disco: rf_model.pkl {os.path.getsize(pickle_path) / 1024:.0f} KB, "
+          f"{flat_path.name}/ {flat_size / 1024:.0f} KB")
+    print(f"Publicada minimal/{new_version} (desde {source}) con {flat_path.name}")
+    return new_version
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Exportar el RandomForest publicado al evaluador aplanado')
+    parser.add_argument('--version', default=None, help='Versión de origen (por defecto la publicada)')
+    parser.add_argument('--no-current', action='store_true', help='No marcar la versión nueva como publicada')
+
+    args = parser.parse_args()
+    export_flat_forest(version=args.version, make_current=not args.no_current)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Script para añadir los pesos del motor NumPy a una versión del modelo CNN ya publicada.
+
+Las versiones son inmutables, así que se publica una versión nueva con los mismos
+archivos más cnn_weights.npz, tras comprobar que las predicciones del motor NumPy
+coinciden con las de TensorFlow.
+"""
+
+import sys
+import shutil
+import argparse
+from pathlib import Path
+
+# Añadir directorio raíz a la ruta de Python
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from app.core.config import settings
+from app.models.artifacts import ArtifactStore
+from app.models.neural_model import NeuralCareerModel
+from app.models.numpy_cnn import NumpyCNN, parity_check
+from app.utils.lazy_imports import lazy_import
+
+tf = lazy_import("tensorflow")
+
+def export_numpy_cnn(version=None, atol=None, make_current=True):
+    """
+    Exporta la CNN de una versión publicada al motor NumPy.
+    
+    Args:
+        version: Versión de origen (None para la publicada en CURRENT)
+        atol: Máxima diferencia absoluta permitida frente a TensorFlow
+        make_current: Si la versión nueva pasa a ser la publicada
+    
+    Returns:
+        Nombre de la versión creada
+    """
+    atol = settings.CNN_PARITY_ATOL if atol is None else atol
+    store = ArtifactStore("neural")
+    source = store.resolve(version)
+    if not source:
+        raise SystemExit("No hay ninguna versión publicada del modelo CNN")
+    
+    manifest = store.verify(source)
+    source_dir = store.version_dir(source)
+    
+    keras_model = tf.keras.models.load_model(str(source_dir / "cnn_model"))
+    engine = NumpyCNN.from_keras(keras_model)
+    max_diff = parity_check(keras_model, engine)
+    print(f"Diferencia máxima NumPy vs TensorFlow: {max_diff:.2e} (tolerancia {atol:.0e})")
+    if max_diff > atol:
+        raise SystemExit("El motor NumPy no coincide con TensorFlow; no se publica")
+    
+    def write(directory: Path):
+        for item in source_dir.iterdir():
+            if item.name == "manifest.json":
+                continue
+            if item.is_dir():
+                shutil.copytree(item, directory / item.name)
+            else:
+                shutil.copy2(item, directory / item.name)
+        engine.save(directory / NeuralCareerModel.NUMPY_WEIGHTS_FILE)
+    
+    metrics = dict(manifest.get("metrics", {}), numpy_parity_max_abs_diff=max_diff)
+    new_version = store.publish(
+        write,
+        classes=manifest["classes"],
+        training_hash=manifest.get("training_data_hash"),
+        metrics=metrics,
+        make_current=make_current
+    )
+    print(f"Publicada neural/{new_version} (desde {source}) con {NeuralCareerModel.NUMPY_WEIGHTS_FILE}")
+    return new_version
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Exportar la CNN publicada al motor de inferencia NumPy')
+    parser.add_argument('--version', default=None, help='Versión de origen (por defecto la publicada)')
+    parser.add_argument('--atol', type=float, default=None, help='Diferencia máxima permitida frente a TensorFlow')
+    parser.add_argument('--no-current', action='store_true', help='No marcar la versión nueva como publicada')
+    
+    args = parser.parse_args()
+    export_numpy_cnn(version=args.version, atol=args.atol, make_current=not args.no_current)
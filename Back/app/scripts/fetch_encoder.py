@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Script para llenar (una sola vez, con red) el bundle local del encoder de frases.
+
+El servidor carga el encoder solo desde este bundle (ENCODER_OFFLINE), así que el
+arranque nunca depende del hub de Hugging Face. El bundle se puede generar al construir
+la imagen o copiarse desde una máquina con red.
+
+Uso:
+    python app/scripts/fetch_encoder.py              # descarga si no existe
+    python app/scripts/fetch_encoder.py --force      # vuelve a descargar
+    python app/scripts/fetch_encoder.py --verify     # solo verifica los checksums
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+# Este script es el único paso que necesita red
+os.environ["ENCODER_OFFLINE"] = "false"
+os.environ["HF_HUB_OFFLINE"] = "0"
+os.environ["TRANSFORMERS_OFFLINE"] = "0"
+
+# Añadir directorio raíz a la ruta de Python
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from app.models.artifacts import ArtifactError
+from app.models.career_model import CareerRecommender
+from app.models.encoder import bundle_path, fetch_bundle, verify_bundle
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Descargar el encoder de frases a su bundle local')
+    parser.add_argument('--model', default=CareerRecommender.MODEL_NAME, help='Modelo de sentence-transformers')
+    parser.add_argument('--dir', default=None, help='Directorio de bundles (por defecto ENCODER_BUNDLE_DIR)')
+    parser.add_argument('--force', action='store_true', help='Reemplazar el bundle existente')
+    parser.add_argument('--verify', action='store_true', help='Solo verificar el bundle existente')
+
+    args = parser.parse_args()
+    try:
+        if args.verify:
+            manifest = verify_bundle(bundle_path(args.model, args.dir))
+            print(f"Bundle de {args.model} válido ({len(manifest['files'])} archivos, {manifest['created_at']})")
+        else:
+            print(f"Bundle de {args.model} listo en {fetch_bundle(args.model, args.dir, args.force)}")
+    except ArtifactError as e:
+        raise SystemExit(f"Bundle inválido: {e}")
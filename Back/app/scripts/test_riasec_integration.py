@@ -203,12 +203,12 @@ def test_riasec_integration(sample_size: int = 1000):
             print(", ".join([f"{name} ({score:.1f})" for name, score in top_mi]))
             
             # Realizar predicción
-            predictions = service.predict(profile['mbti'], profile['mi'])
+            predictions = service.predict(profile['mbti'], profile['mi'], top_n=5)
             
             # Mostrar resultados
             print("\n   Carreras recomendadas:")
             for i, pred in enumerate(predictions[:5]):  # Top 5
-                print(f"   {i+1}. {pred['carrera']} - Puntuación: {pred['puntuacion']:.4f}")
+                print(f"   {i+1}. {pred['nombre']} - Puntuación: {pred['match_score']:.4f}")
     
     except Exception as e:
         print(f"ERROR en predicción: {str(e)}")
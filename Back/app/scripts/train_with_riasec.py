@@ -92,7 +92,7 @@ def train_model_with_riasec(sample_size=5000, save_training_data=False, verbose=
     X_train_array = np.vstack(X_train)
     y_train_array = np.array(y_train)
     
-    result = model.train_model(X_train_array, y_train_array)
+    result = model.train_model(X_train_array, y_train_array, class_names=career_names)
     
     if verbose:
         print(f"   - {result['message']}")
@@ -112,8 +112,7 @@ def train_model_with_riasec(sample_size=5000, save_training_data=False, verbose=
             predictions = model.predict_career(
                 sample["mbti_vector"],
                 sample["mbti_weights"],
-                sample["mi_scores"],
-                career_names
+                sample["mi_scores"]
             )
             
             # Mostrar resultado
@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("background_trainer")
+
+class BackgroundTrainer:
+    """
+    Entrenamiento de un modelo en un hilo de fondo, uno a la vez.
+
+    Las peticiones que encuentran el modelo sin entrenar llaman a `request()` y se
+    sirven con un motor de respaldo; solo la primera lanza el entrenamiento y las demás
+    ven que ya está en curso. Si el entrenamiento falla, no se reintenta hasta que pasen
+    `retry_seconds`, para que un error persistente no dispare un entrenamiento por petición.
+    """
+
+    def __init__(self, name: str, train: Callable[[], Any], retry_seconds: float = 600.0):
+        """
+        Args:
+            name: Nombre del modelo, para logs y reportes
+            train: Función sin argumentos que entrena, publica y activa el modelo;
+                lanza una excepción si falla
+            retry_seconds: Espera mínima tras un fallo antes de volver a intentarlo
+        """
+        self.name = name
+        self._train = train
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._state = "idle"
+        self._runs = 0
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._last_duration: Optional[float] = None
+        self._last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._state == "training"
+
+    def request(self) -> bool:
+        """
+        Lanza el entrenamiento si no está en curso ni falló hace menos de `retry_seconds`.
+
+        Returns:
+            True si hay un entrenamiento en curso tras la llamada
+        """
+        with self._lock:
+            if self._state == "training":
+                return True
+            if (self._state == "failed" and self._finished_at is not None
+                    and time.time() - self._finished_at < self.retry_seconds):
+                return False
+            self._state = "training"
+            self._runs += 1
+            self._started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name=f"train-{self.name}", daemon=True)
+            self._thread.start()
+            logger.info(f"Entrenamiento de '{self.name}' lanzado en segundo plano")
+            return True
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        try:
+            self._train()
+            state, error = "succeeded", None
+            logger.info(f"Entrenamiento de '{self.name}' completado en {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            state, error = "failed", str(e)
+            logger.error(f"Error entrenando '{self.name}' en segundo plano: {e}", exc_info=True)
+        with self._lock:
+            self._state = state
+            self._last_error = error
+            self._finished_at = time.time()
+            self._last_duration = round(time.perf_counter() - start, 1)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que termine el entrenamiento en curso; True si terminó."""
+        thread = self._thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def status(self) -> Dict[str, Any]:
+        """Estado del entrenamiento: idle, training, succeeded o failed."""
+        with self._lock:
+            return {
+                "state": self._state,
+                "runs": self._runs,
+                "started_at": self._started_at,
+                "finished_at": self._finished_at,
+                "last_duration_seconds": self._last_duration,
+                "last_error": self._last_error
+            }
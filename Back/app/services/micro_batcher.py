@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger("micro_batcher")
+
+# Límites superiores de los buckets del histograma de tamaños de batch
+_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+class MicroBatcher:
+    """
+    Agrupa en un solo forward pass las predicciones concurrentes de un modelo.
+
+    Cada llamada a `submit` deja su fila de características en la cola y espera. La cola
+    se vacía cuando pasa `window_ms` desde la primera fila pendiente o cuando se juntan
+    `max_batch` filas: se ejecuta `predict_batch` una vez (en el threadpool, fuera del
+    event loop) y cada llamada recibe su fila de probabilidades.
+    """
+
+    def __init__(self, name: str, predict_batch: Callable[[np.ndarray], np.ndarray],
+                 window_ms: float = 3.0, max_batch: int = 32):
+        """
+        Args:
+            name: Nombre del modelo, para logs y métricas
+            predict_batch: Función que recibe una matriz N x F y devuelve N filas de salida
+            window_ms: Tiempo máximo que una petición espera a que se llene el batch
+            max_batch: Tamaño de batch que dispara la ejecución sin esperar la ventana
+        """
+        self.name = name
+        self._predict_batch = predict_batch
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self._pending: List[Tuple[np.ndarray, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # El event loop solo guarda referencias débiles a las tareas
+        self._tasks: set = set()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "errors": 0,
+            "max_batch_size": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "forward_ms_total": 0.0
+        }
+        self._histogram = {bucket: 0 for bucket in _BATCH_BUCKETS}
+
+    async def submit(self, features: np.ndarray) -> np.ndarray:
+        """
+        Encola una fila de características y espera su predicción.
+
+        Args:
+            features: Vector de 1 x F (o F) con las características de una petición
+
+        Returns:
+            Fila de salida del modelo para esa petición
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._pending:
+                # Otro event loop (ej. TestClient) con peticiones pendientes: no mezclar
+                # futures de loops distintos, se predice sin agrupar
+                result = await run_in_threadpool(self._predict_batch, np.asarray(features).reshape(1, -1))
+                return result[0]
+            self._loop = loop
+
+        future = loop.create_future()
+        self._pending.append((np.asarray(features).reshape(-1), future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[np.ndarray, asyncio.Future, float]]) -> None:
+        start = time.perf_counter()
+        waits = [(start - enqueued) * 1000 for _, _, enqueued in batch]
+        try:
+            X = np.stack([features for features, _, _ in batch])
+            outputs = await run_in_threadpool(self._predict_batch, X)
+        except Exception as e:
+            logger.error(f"Error en el batch de '{self.name}' ({len(batch)} peticiones): {e}")
+            self._record(len(batch), waits, (time.perf_counter() - start) * 1000, error=True)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self._record(len(batch), waits, (time.perf_counter() - start) * 1000)
+        for (_, future, _), output in zip(batch, outputs):
+            # La petición pudo cancelarse (cliente desconectado) mientras esperaba
+            if not future.done():
+                future.set_result(output)
+
+    def _record(self, size: int, waits: List[float], forward_ms: float, error: bool = False) -> None:
+        with self._stats_lock:
+            stats = self._stats
+            stats["requests"] += size
+            stats["batches"] += 1
+            stats["errors"] += int(error)
+            stats["max_batch_size"] = max(stats["max_batch_size"], size)
+            stats["wait_ms_total"] += sum(waits)
+            stats["wait_ms_max"] = max(stats["wait_ms_max"], max(waits))
+            stats["forward_ms_total"] += forward_ms
+            bucket = next((b for b in _BATCH_BUCKETS if size <= b), _BATCH_BUCKETS[-1])
+            self._histogram[bucket] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Tamaño de los batches, espera en cola y duración de los forward passes."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            histogram = {f"<={bucket}": count for bucket, count in self._histogram.items()}
+        requests, batches = stats["requests"], stats["batches"]
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "requests": requests,
+            "batches": batches,
+            "errors": stats["errors"],
+            "avg_batch_size": round(requests / batches, 2) if batches else 0.0,
+            "max_batch_size": stats["max_batch_size"],
+            "batch_size_histogram": histogram,
+            "avg_queue_wait_ms": round(stats["wait_ms_total"] / requests, 3) if requests else 0.0,
+            "max_queue_wait_ms": round(stats["wait_ms_max"], 3),
+            "avg_forward_ms": round(stats["forward_ms_total"] / batches, 3) if batches else 0.0
+        }
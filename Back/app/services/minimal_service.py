@@ -1,19 +1,48 @@
-from typing import Dict, List, Tuple, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import numpy as np
 from app.models.minimal_neural import MinimalNeuralCareerModel
 from app.models.career_model import CareerRecommender
+from app.core.config import settings
+from app.models.features import prepare_feature_matrix, quantize_profile
+from app.models.retrieval import top_k_indices
+from app.utils.cache import LRUCache
 from sklearn.preprocessing import LabelEncoder
 import random
-from app.utils.riasec_processor import RIASECProcessor
-from app.scripts.train_with_riasec import train_model_with_riasec
+
+def career_match(career_recommender: Optional[CareerRecommender], career_name: str, score: float) -> Dict:
+    """Añade la universidad y la ciudad del catálogo a una predicción del RandomForest."""
+    career_info = career_recommender.get_career(career_name) if career_recommender is not None else None
+    if career_info:
+        return {
+            "nombre": career_name,
+            "universidad": career_info["universidad"],
+            "ciudad": career_info["ubicacion"],
+            "match_score": score,
+            "engine": "random_forest"
+        }
+    # Si no se encuentra la información, usar solo el nombre y puntaje
+    return {
+        "nombre": career_name,
+        "universidad": "Universidad no especificada",
+        "ciudad": "Ciudad no especificada",
+        "match_score": score,
+        "engine": "random_forest"
+    }
 
 class MinimalNeuralService:
     """Servicio de recomendación de carreras usando el modelo RandomForest como alternativa a TensorFlow"""
     
-    def __init__(self):
-        self.neural_model = MinimalNeuralCareerModel()
-        self.career_recommender = CareerRecommender()
+    def __init__(self, neural_model: MinimalNeuralCareerModel = None,
+                 career_recommender: CareerRecommender = None,
+                 request_training: Optional[Callable[[], bool]] = None):
+        # Los modelos se reciben del registro compartido; solo se crean si no se inyectan
+        self.neural_model = neural_model or MinimalNeuralCareerModel()
+        self.career_recommender = career_recommender or CareerRecommender()
+        # Lanza el entrenamiento en segundo plano cuando no hay modelo (ver ModelRegistry)
+        self.request_training = request_training
         self.label_encoder = LabelEncoder()
+        # Resultados por perfil cuantizado; se vacía al cambiar la versión del modelo
+        self.cache = LRUCache(settings.PREDICTION_CACHE_SIZE, settings.PREDICTION_CACHE_TTL)
         
     def generate_training_data(self, num_samples: int = 1000) -> Tuple[np.ndarray, np.ndarray, List[str]]:
         """
@@ -32,7 +61,7 @@ class MinimalNeuralService:
         mi_types = ["Lin", "LogMath", "Spa", "BodKin", "Mus", "Inter", "Intra", "Nat"]
         
         # Usar las carreras disponibles en nuestro recomendador
-        careers = [career["nombre"] for career in self.career_recommender.careers]
+        careers = self.career_recommender.catalog.names
         
         # Inicializar matrices de características y etiquetas
         X = np.zeros((num_samples, 16))  # 4 MBTI + 4 pesos MBTI + 8 MI
@@ -103,7 +132,7 @@ class MinimalNeuralService:
         X, y, career_names = self.generate_training_data(num_samples)
         
         # Entrenar modelo
-        result = self.neural_model.train_model(X, y)
+        result = self.neural_model.train_model(X, y, class_names=list(self.label_encoder.classes_))
         
         return {
             "message": "Modelo entrenado exitosamente",
@@ -129,46 +158,37 @@ class MinimalNeuralService:
             Lista de recomendaciones de carrera con puntajes de coincidencia
         """
         try:
-            # Si el modelo no está entrenado, entrenar con datos sintéticos
+            # Sin modelo entrenado se responde con el recomendador de similitud coseno
+            # mientras el RandomForest se entrena en segundo plano
             if not self.neural_model.model_trained:
-                self.train_model(num_samples=1000)
+                self._request_training()
+                return self.career_recommender.recommend_careers(
+                    mbti_code, mbti_vector, mbti_weights, mi_scores, top_n
+                )
+            
+            # Perfiles repetidos o casi idénticos no vuelven a pasar por el modelo
+            self.cache.bind_version(self.neural_model.version)
+            cache_key = (
+                mbti_code,
+                quantize_profile(mbti_vector, mbti_weights, mi_scores, settings.PREDICTION_CACHE_STEP),
+                top_n
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return [dict(match) for match in cached]
                 
-            # Obtener los nombres de las carreras
-            careers = [career["nombre"] for career in self.career_recommender.careers]
-            self.label_encoder.fit(careers)
+            # Nombres de las carreras, precalculados en el catálogo
+            careers = self.career_recommender.catalog.names
                 
-            # Obtener predicciones del modelo
+            # Obtener predicciones del modelo (con los nombres del manifiesto si existen)
             predictions = self.neural_model.predict_career(
-                mbti_vector, mbti_weights, mi_scores, careers
+                mbti_vector, mbti_weights, mi_scores, self.neural_model.class_names or careers
             )
             
             # Formatear resultados
-            results = []
-            for career_name, score in predictions[:top_n]:
-                # Buscar información adicional sobre la carrera
-                career_info = next(
-                    (career for career in self.career_recommender.careers 
-                    if career["nombre"] == career_name),
-                    None
-                )
-                
-                if career_info:
-                    results.append({
-                        "nombre": career_name,
-                        "universidad": career_info["universidad"],
-                        "ciudad": career_info["ubicacion"],
-                        "match_score": score
-                    })
-                else:
-                    # Si no se encuentra la información, usar solo el nombre y puntaje
-                    results.append({
-                        "nombre": career_name,
-                        "universidad": "Universidad no especificada",
-                        "ciudad": "Ciudad no especificada",
-                        "match_score": score
-                    })
-            
-            return results
+            results = [self._career_match(career_name, score) for career_name, score in predictions[:top_n]]
+            self.cache.set(cache_key, results)
+            return [dict(match) for match in results]
         except Exception as e:
             # Si hay un error, usar el recomendador de similitud de coseno como fallback
             print(f"Error en la predicción con RandomForest: {e}. Usando fallback.")
@@ -176,6 +196,54 @@ class MinimalNeuralService:
                 mbti_code, mbti_vector, mbti_weights, mi_scores, top_n
             )
     
+    def predict_careers_batch(self, profiles: List[Dict[str, Any]], top_n: int = 3) -> List[List[Dict]]:
+        """
+        Predice carreras para varios perfiles con un solo predict_proba del RandomForest.
+        
+        Args:
+            profiles: Lista de diccionarios con mbti_code, mbti_vector, mbti_weights y mi_scores
+            top_n: Número de recomendaciones por perfil
+            
+        Returns:
+            Una lista de recomendaciones por perfil, en el orden recibido
+        """
+        if not profiles:
+            return []
+        try:
+            if not self.neural_model.model_trained:
+                self._request_training()
+                return self.career_recommender.recommend_careers_batch(
+                    [(p["mbti_code"], p["mbti_vector"], p["mbti_weights"], p["mi_scores"]) for p in profiles],
+                    top_n
+                )
+            
+            career_names = self.neural_model.class_names or self.career_recommender.catalog.names
+            X = prepare_feature_matrix([
+                (p["mbti_vector"], p["mbti_weights"], p["mi_scores"]) for p in profiles
+            ])
+            probs = self.neural_model.predict_proba(X)
+            top = top_k_indices(probs, top_n)
+            return [
+                [self._career_match(career_names[i], float(row[i])) for i in indices]
+                for row, indices in zip(probs, top)
+            ]
+        except Exception as e:
+            # Si hay un error, usar el recomendador de similitud de coseno como fallback
+            print(f"Error en la predicción en batch con RandomForest: {e}. Usando fallback.")
+            return self.career_recommender.recommend_careers_batch(
+                [(p["mbti_code"], p["mbti_vector"], p["mbti_weights"], p["mi_scores"]) for p in profiles],
+                top_n
+            )
+    
+    def _request_training(self) -> None:
+        """Pide el entrenamiento del RandomForest en segundo plano."""
+        if self.request_training is None or not self.request_training():
+            print("No hay modelo RandomForest entrenado ni entrenamiento en curso. Usando fallback.")
+    
+    def _career_match(self, career_name: str, score: float) -> Dict:
+        """Añade la universidad y la ciudad del catálogo a una predicción."""
+        return career_match(self.career_recommender, career_name, score)
+    
     def _vector_to_mbti_code(self, mbti_vector: List[int]) -> str:
         """Convierte un vector MBTI binario en su código de letras correspondiente"""
         letter_mapping = [
@@ -190,30 +258,47 @@ class MinimalNeuralService:
 class MinimalRecommendationService:
     """Servicio para generar recomendaciones de carreras usando el modelo minimal_neural"""
     
-    def __init__(self):
-        """Inicializa el servicio de recomendaciones"""
-        self.model = MinimalNeuralCareerModel()
+    def __init__(self, model: MinimalNeuralCareerModel = None,
+                 career_recommender: CareerRecommender = None,
+                 request_training: Optional[Callable[[], bool]] = None):
+        """
+        Inicializa el servicio de recomendaciones
+        
+        Args:
+            model: Modelo RandomForest compartido
+            career_recommender: Recomendador de respaldo mientras el modelo no está entrenado;
+                sin él, predict entrena el modelo antes de responder (uso en scripts)
+            request_training: Lanza el entrenamiento del modelo en segundo plano
+        """
+        self.model = model or MinimalNeuralCareerModel()
+        self.career_recommender = career_recommender
+        self.request_training = request_training
         self.career_names = []
         
     def train_model(self, training_data: List[Dict[str, Any]], career_names: List[str]) -> Dict[str, Any]:
         """
-        Entrena el modelo con datos proporcionados externamente.
+        Entrena un modelo nuevo con datos proporcionados externamente y lo publica.
+        
+        El modelo que sirve el servicio no se modifica: el registro carga la versión
+        publicada con un reemplazo en caliente (ver ModelRegistry.train_minimal_model).
         
         Args:
             training_data: Lista de diccionarios con mbti_vector, mbti_weights, mi_scores y career_label
             career_names: Lista de nombres de las carreras
             
         Returns:
-            Diccionario con mensaje y precisión del modelo
+            Diccionario con mensaje, precisión y versión publicada del modelo
         """
         try:
+            model = MinimalNeuralCareerModel()
+            
             # Preparar datos para el formato esperado por el modelo
             X_train = []
             y_train = []
             
             for item in training_data:
                 # Crear vector de características
-                features = self.model.prepare_input_features(
+                features = model.prepare_input_features(
                     item["mbti_vector"],
                     item["mbti_weights"],
                     item["mi_scores"]
@@ -225,11 +310,9 @@ class MinimalRecommendationService:
             X_train_array = np.vstack(X_train)
             y_train_array = np.array(y_train)
             
-            # Entrenar modelo
-            result = self.model.train_model(X_train_array, y_train_array)
-            
-            # Guardar nombres de carreras
-            self.career_names = career_names
+            # Entrenar y publicar el modelo nuevo
+            result = model.train_model(X_train_array, y_train_array, class_names=career_names)
+            result["model_version"] = model.version
             
             return result
         except Exception as e:
@@ -237,7 +320,9 @@ class MinimalRecommendationService:
         
     def train_with_riasec(self, sample_size: int = 5000, save_training_data: bool = False, verbose: bool = True) -> Dict[str, Any]:
         """
-        Entrena el modelo utilizando datos del dataset RIASEC procesados.
+        Entrena un modelo nuevo utilizando datos del dataset RIASEC procesados y lo publica.
+        
+        Como train_model, no modifica el modelo que sirve el servicio.
         
         Args:
             sample_size: Número de muestras a utilizar (None para usar todas)
@@ -245,23 +330,26 @@ class MinimalRecommendationService:
             verbose: Si se debe mostrar información detallada
             
         Returns:
-            Diccionario con mensaje y precisión del modelo
+            Diccionario con mensaje, precisión y versión publicada del modelo
         """
+        # pandas y el procesador RIASEC solo se importan al entrenar con RIASEC
+        from app.scripts.train_with_riasec import train_model_with_riasec
+
         try:
             # Usar la función del script 
-            self.model = train_model_with_riasec(
+            model = train_model_with_riasec(
                 sample_size=sample_size, 
                 save_training_data=save_training_data, 
                 verbose=verbose
             )
             
-            # Obtener los nombres de carreras
-            processor = RIASECProcessor()
-            _, self.career_names = processor.prepare_training_data(sample_size=10)  # Solo necesitamos los nombres
+            # La precisión de entrenamiento queda en el manifiesto de la versión publicada
+            metrics = model.store.load_manifest(model.version).get("metrics", {})
             
             return {
                 "message": f"Modelo entrenado exitosamente con {sample_size if sample_size else 'todas las'} muestras de RIASEC",
-                "accuracy": self.model.model.score(X=None, y=None)  # Calcular precisión
+                "accuracy": metrics.get("train_accuracy", 0.0),
+                "model_version": model.version
             }
         except Exception as e:
             raise Exception(f"Error al entrenar con datos RIASEC: {str(e)}")
@@ -422,7 +510,7 @@ class MinimalRecommendationService:
             X_train, y_train, careers = self.generate_training_data(num_samples)
             
             # Entrenar modelo
-            result = self.model.train_model(X_train, y_train)
+            result = self.model.train_model(X_train, y_train, class_names=careers)
             
             # Actualizar lista de carreras
             self.career_names = careers
@@ -431,23 +519,30 @@ class MinimalRecommendationService:
         except Exception as e:
             raise Exception(f"Error entrenando modelo: {str(e)}")
     
-    def predict(self, mbti_result, mi_result) -> List[Dict[str, Any]]:
+    def predict(self, mbti_result, mi_result, top_n: int = 3) -> List[Dict[str, Any]]:
         """
         Realiza predicciones con el modelo entrenado.
         
         Args:
             mbti_result: Resultado del test MBTI
             mi_result: Resultado del test de inteligencias múltiples
+            top_n: Número de recomendaciones a devolver
             
         Returns:
-            Lista de carreras recomendadas con sus puntuaciones
+            Lista de carreras recomendadas (formato CareerMatch) con sus puntuaciones
         """
         try:
             # Verificar si hay un modelo entrenado y con carreras
             if not self.model.model_trained:
-                # Entrenar con datos sintéticos si no hay modelo
+                if self.career_recommender is not None:
+                    return self._fallback_predict(mbti_result, mi_result, top_n)
+                # Sin recomendador de respaldo (scripts): entrenar con datos sintéticos
                 self.train()
             
+            # Los nombres del manifiesto del modelo sobreviven a los reinicios
+            if self.model.class_names:
+                self.career_names = self.model.class_names
+            
             if not self.career_names:
                 # Usar nombres de carreras por defecto si no se establecieron
                 self.career_names = [
@@ -456,52 +551,34 @@ class MinimalRecommendationService:
                     "Ciencias Sociales", "Comunicación"
                 ]
             
-            # Convertir vector MBTI
-            mbti_vector = [
-                1 if mbti_result.ei == "I" else 0,
-                1 if mbti_result.sn == "N" else 0,
-                1 if mbti_result.tf == "F" else 0,
-                1 if mbti_result.jp == "P" else 0
-            ]
-            
-            # Extraer pesos MBTI
-            mbti_weights = {
-                "E/I": mbti_result.ei_score,
-                "S/N": mbti_result.sn_score,
-                "T/F": mbti_result.tf_score,
-                "J/P": mbti_result.jp_score
-            }
-            
-            # Transformar resultados MI
-            mi_scores = {
-                "Lin": mi_result.linguistic,
-                "LogMath": mi_result.logical_mathematical,
-                "Spa": mi_result.spatial,
-                "BodKin": mi_result.bodily_kinesthetic,
-                "Mus": mi_result.musical,
-                "Inter": mi_result.interpersonal,
-                "Intra": mi_result.intrapersonal,
-                "Nat": mi_result.naturalistic
-            }
-            
             # Realizar predicción
             predictions = self.model.predict_career(
-                mbti_vector, 
-                mbti_weights, 
-                mi_scores, 
+                mbti_result.MBTI_vector,
+                mbti_result.MBTI_weights,
+                mi_result.MI_scores,
                 self.career_names
             )
             
             # Convertir a formato esperado
-            results = []
-            for career, score in predictions:
-                results.append({
-                    "carrera": career,
-                    "puntuacion": float(score),
-                    "descripcion": f"Basado en tu perfil, {career} parece ser una buena opción para ti."
-                })
-            
-            return results
+            return [career_match(self.career_recommender, career, float(score))
+                    for career, score in predictions[:top_n]]
             
         except Exception as e:
-            raise Exception(f"Error realizando predicción: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Error realizando predicción: {str(e)}")
+    
+    def _fallback_predict(self, mbti_result, mi_result, top_n: int) -> List[Dict[str, Any]]:
+        """
+        Responde con el recomendador de respaldo y pide el entrenamiento en segundo plano.
+        
+        Returns:
+            Lista de carreras en el mismo formato que predict, con el motor que las generó
+        """
+        if self.request_training is not None:
+            self.request_training()
+        return self.career_recommender.recommend_careers(
+            mbti_result.MBTI_code,
+            mbti_result.MBTI_vector,
+            mbti_result.MBTI_weights,
+            mi_result.MI_scores,
+            top_n
+        )
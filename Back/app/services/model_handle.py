@@ -0,0 +1,107 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger("model_handle")
+
+T = TypeVar("T")
+
+class ModelVersion(Generic[T]):
+    """Una versión inmutable de un modelo: el objeto servido y su número de versión."""
+
+    __slots__ = ("version", "value", "loaded_at", "load_seconds")
+
+    def __init__(self, version: int, value: T, load_seconds: float):
+        self.version = version
+        self.value = value
+        self.loaded_at = time.time()
+        self.load_seconds = load_seconds
+
+class ModelHandle(Generic[T]):
+    """
+    Referencia versionada a un modelo que se puede reemplazar en caliente.
+
+    `get()` devuelve siempre una versión completa: cada petición toma la versión vigente
+    al empezar y termina con ella aunque mientras tanto se publique otra. `swap()`
+    construye la nueva versión fuera del lock, la valida con `validate` y solo entonces
+    la publica con una única asignación atómica.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T],
+                 validate: Optional[Callable[[T], None]] = None):
+        """
+        Args:
+            name: Nombre del modelo, para logs y reportes
+            factory: Función sin argumentos que construye una versión nueva
+            validate: Función que lanza una excepción si la versión nueva no sirve
+        """
+        self.name = name
+        self._factory = factory
+        self._validate = validate
+        self._current: Optional[ModelVersion[T]] = None
+        self._load_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._next_version = 1
+
+    def _build(self) -> ModelVersion[T]:
+        start = time.perf_counter()
+        value = self._factory()
+        elapsed = time.perf_counter() - start
+        version = ModelVersion(self._next_version, value, elapsed)
+        self._next_version += 1
+        return version
+
+    def current(self) -> ModelVersion[T]:
+        """Devuelve la versión vigente, construyendo la primera si hace falta."""
+        current = self._current
+        if current is not None:
+            return current
+        with self._load_lock:
+            if self._current is None:
+                self._current = self._build()
+                logger.info(f"'{self.name}' v{self._current.version} cargado en {self._current.load_seconds:.2f}s")
+            return self._current
+
+    def get(self) -> T:
+        return self.current().value
+
+    @property
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    @property
+    def version(self) -> int:
+        return self._current.version if self._current is not None else 0
+
+    def swap(self) -> ModelVersion[T]:
+        """
+        Construye, valida y publica una versión nueva.
+
+        Es bloqueante: debe llamarse desde un hilo (ej. `run_in_threadpool`), nunca desde
+        el event loop. Si la validación falla, se lanza la excepción y la versión
+        vigente sigue sirviendo.
+        """
+        with self._swap_lock:
+            with self._load_lock:
+                candidate = self._build()
+            if self._validate is not None:
+                self._validate(candidate.value)
+            previous = self._current
+            self._current = candidate
+            logger.info(
+                f"'{self.name}' v{candidate.version} publicado en {candidate.load_seconds:.2f}s"
+                + (f" (reemplaza v{previous.version})" if previous is not None else "")
+            )
+            return candidate
+
+    def report(self) -> Dict[str, Any]:
+        current = self._current
+        if current is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "version": current.version,
+            "loaded_at": current.loaded_at,
+            "load_seconds": round(current.load_seconds, 3)
+        }
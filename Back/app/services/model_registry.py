@@ -0,0 +1,570 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.models.artifacts import ArtifactStore
+from app.models.career_model import CareerRecommender
+from app.models.neural_model import NeuralCareerModel
+from app.models.minimal_neural import MinimalNeuralCareerModel
+from app.services.background_trainer import BackgroundTrainer
+from app.services.model_handle import ModelHandle, ModelVersion
+from app.services.neural_service import NeuralCareerService
+from app.services.minimal_service import MinimalNeuralService, MinimalRecommendationService
+from app.services.recommendation_service import RecommendationService
+from app.utils.lazy_imports import import_report, preload
+from app.utils.memory import current_rss_mb, memory_breakdown
+from app.utils.startup_profiler import startup_profiler
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("model_registry")
+
+# Perfil neutro usado para las inferencias de warmup
+_WARMUP_PROFILE = {
+    "mbti_vector": [0, 0, 0, 0],
+    "mbti_weights": {"E/I": 0.5, "S/N": 0.5, "T/F": 0.5, "J/P": 0.5},
+    "mi_scores": {mi: 0.5 for mi in ["Lin", "LogMath", "Spa", "BodKin", "Mus", "Inter", "Intra", "Nat"]}
+}
+
+# Motores que se calientan al arrancar
+ENGINES = ("embedding", "cnn", "random_forest")
+
+class ModelRegistry:
+    """
+    Registro de modelos compartido por todo el proceso.
+
+    Cada modelo (SentenceTransformer dentro de CareerRecommender, CNN y RandomForest)
+    se carga una sola vez por worker, en el primer uso, y todos los servicios
+    reciben la misma instancia.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._instances: Dict[str, Any] = {}
+        self._load_stats: Dict[str, Dict[str, float]] = {}
+        self._engines: Dict[str, Dict[str, Any]] = {name: {"status": "pending"} for name in ENGINES}
+        self._warmup_thread: Optional[threading.Thread] = None
+        self._warmup_done = threading.Event()
+        # False si el warmup está desactivado: los motores se cargan en la primera petición
+        self._warm_on_startup = settings.WARMUP_ON_STARTUP
+        # El servicio neural (y su CNN) y el RandomForest se pueden reemplazar en caliente
+        self._neural = ModelHandle("neural_service", self._build_neural_service, self._validate_neural_service)
+        self._minimal = ModelHandle("minimal_model", self._build_minimal_model, self._validate_minimal_model)
+        # Entrenamiento en segundo plano de los modelos que no están publicados
+        self._trainers = {
+            "cnn": BackgroundTrainer("cnn", self._train_cnn, settings.TRAINING_RETRY_SECONDS),
+            "random_forest": BackgroundTrainer("random_forest", self._train_random_forest, settings.TRAINING_RETRY_SECONDS)
+        }
+        # Revisión periódica de CURRENT para cargar las versiones publicadas por otros workers
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+        self._failed_versions: Dict[str, set] = {"cnn": set(), "random_forest": set()}
+
+    def _get_or_load(self, name: str, factory: Callable[[], Any], track: bool = True) -> Any:
+        """
+        Devuelve la instancia registrada con `name`, creándola con `factory` si aún no existe.
+
+        Args:
+            name: Nombre de la instancia dentro del registro
+            factory: Función sin argumentos que construye la instancia
+            track: Si se debe registrar el tiempo de carga y la memoria consumida
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                rss_before = current_rss_mb()
+                start = time.perf_counter()
+                instance = factory()
+                elapsed = time.perf_counter() - start
+                if track:
+                    rss_delta = current_rss_mb() - rss_before
+                    self._load_stats[name] = {
+                        "load_seconds": round(elapsed, 3),
+                        "rss_delta_mb": round(rss_delta, 1)
+                    }
+                    startup_profiler.record(f"model.{name}", "model", start, elapsed,
+                                            rss_delta_mb=round(rss_delta, 1))
+                    logger.info(f"Modelo '{name}' cargado en {elapsed:.2f}s (+{rss_delta:.1f} MB RSS)")
+                self._instances[name] = instance
+        return instance
+
+    # Modelos compartidos
+
+    def career_recommender(self) -> CareerRecommender:
+        return self._get_or_load("career_recommender", CareerRecommender)
+
+    def neural_model(self) -> NeuralCareerModel:
+        return self.neural_service().neural_model
+
+    def minimal_model(self) -> MinimalNeuralCareerModel:
+        return self._minimal.get()
+
+    # Servicios construidos sobre los modelos compartidos
+
+    def _build_neural_service(self) -> NeuralCareerService:
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        neural_model = NeuralCareerModel()
+        elapsed = time.perf_counter() - start
+        rss_delta = current_rss_mb() - rss_before
+        self._load_stats["neural_model"] = {
+            "load_seconds": round(elapsed, 3),
+            "rss_delta_mb": round(rss_delta, 1)
+        }
+        startup_profiler.record("model.neural_model", "model", start, elapsed,
+                                rss_delta_mb=round(rss_delta, 1), version=neural_model.version)
+        return NeuralCareerService(
+            neural_model=neural_model,
+            career_recommender=self.career_recommender(),
+            request_training=lambda: self.request_training("cnn")
+        )
+
+    def _validate_neural_service(self, service: NeuralCareerService) -> None:
+        """Predicción de humo sobre la versión nueva antes de publicarla."""
+        model = service.neural_model
+        if not model.is_trained:
+            if self._neural.loaded and self._neural.get().neural_model.is_trained:
+                raise ValueError("No hay un modelo CNN en disco para reemplazar al actual")
+            return
+        career_names = list(model.label_encoder.classes_)
+        predictions = model.predict_career(
+            _WARMUP_PROFILE["mbti_vector"], _WARMUP_PROFILE["mbti_weights"], _WARMUP_PROFILE["mi_scores"],
+            career_names
+        )
+        total = sum(score for _, score in predictions)
+        if len(predictions) != len(career_names) or not 0.99 <= total <= 1.01:
+            raise ValueError(f"Predicción de validación inválida: {len(predictions)} clases, suma {total:.3f}")
+
+    def neural_service(self) -> NeuralCareerService:
+        return self._neural.get()
+
+    def _build_minimal_model(self) -> MinimalNeuralCareerModel:
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        model = MinimalNeuralCareerModel()
+        elapsed = time.perf_counter() - start
+        rss_delta = current_rss_mb() - rss_before
+        self._load_stats["minimal_model"] = {
+            "load_seconds": round(elapsed, 3),
+            "rss_delta_mb": round(rss_delta, 1)
+        }
+        startup_profiler.record("model.minimal_model", "model", start, elapsed,
+                                rss_delta_mb=round(rss_delta, 1), version=model.version)
+        logger.info(f"Modelo 'minimal_model' cargado en {elapsed:.2f}s (+{rss_delta:.1f} MB RSS)")
+        return model
+
+    def _validate_minimal_model(self, model: MinimalNeuralCareerModel) -> None:
+        """Predicción de humo sobre el RandomForest nuevo antes de publicarlo."""
+        if not model.model_trained:
+            raise ValueError("No hay un RandomForest en disco para reemplazar al actual")
+        predictions = model.predict_career(
+            _WARMUP_PROFILE["mbti_vector"], _WARMUP_PROFILE["mbti_weights"], _WARMUP_PROFILE["mi_scores"],
+            model.class_names or None
+        )
+        total = sum(score for _, score in predictions)
+        if len(predictions) != len(model.class_names) or not 0.99 <= total <= 1.01:
+            raise ValueError(f"Predicción de validación inválida: {len(predictions)} clases, suma {total:.3f}")
+
+    def neural_version(self) -> int:
+        return self._neural.version
+
+    def minimal_neural_service(self) -> MinimalNeuralService:
+        return self._get_or_load(
+            "minimal_neural_service",
+            lambda: MinimalNeuralService(
+                neural_model=self.minimal_model(),
+                career_recommender=self.career_recommender(),
+                request_training=lambda: self.request_training("random_forest")
+            ),
+            track=False
+        )
+
+    def minimal_recommendation_service(self) -> MinimalRecommendationService:
+        return self._get_or_load(
+            "minimal_recommendation_service",
+            lambda: MinimalRecommendationService(
+                model=self.minimal_model(),
+                career_recommender=self.career_recommender(),
+                request_training=lambda: self.request_training("random_forest")
+            ),
+            track=False
+        )
+
+    def recommendation_service(self) -> RecommendationService:
+        return self._get_or_load(
+            "recommendation_service",
+            lambda: RecommendationService(career_recommender=self.career_recommender()),
+            track=False
+        )
+
+    def load_all(self) -> None:
+        """Carga todos los modelos y servicios sin ejecutar inferencias (usado antes del fork)."""
+        self.neural_service()
+        self.minimal_neural_service()
+        self.minimal_recommendation_service()
+        self.recommendation_service()
+
+    def reload_neural_model(self) -> ModelVersion:
+        """
+        Carga desde disco una versión nueva del modelo CNN, la valida y la publica para
+        todos los routers a la vez. Las peticiones en curso terminan con la versión anterior.
+
+        Es bloqueante: llamarla desde un hilo, no desde el event loop.
+        """
+        return self._neural.swap()
+
+    def reload_minimal_model(self) -> ModelVersion:
+        """
+        Carga desde disco la versión publicada del RandomForest en un objeto nuevo, la
+        valida y la publica. Los servicios que lo usan se reconstruyen en la siguiente
+        petición; las peticiones en curso terminan con el modelo anterior.
+
+        Es bloqueante: llamarla desde un hilo, no desde el event loop.
+        """
+        version = self._minimal.swap()
+        with self._lock:
+            self._instances.pop("minimal_neural_service", None)
+            self._instances.pop("minimal_recommendation_service", None)
+        return version
+
+    # Entrenamiento en segundo plano
+
+    def request_training(self, engine: str) -> bool:
+        """
+        Lanza el entrenamiento de `engine` ("cnn" o "random_forest") en un hilo de fondo,
+        si BACKGROUND_TRAINING está activo y no hay otro en curso.
+
+        Returns:
+            True si hay un entrenamiento de ese motor en curso
+        """
+        if not settings.BACKGROUND_TRAINING:
+            return False
+        return self._trainers[engine].request()
+
+    def _train_once_per_node(self, store: ArtifactStore, loaded_version: Optional[str],
+                             train: Callable[[], None], reload: Callable[[], Any]) -> None:
+        """
+        Entrena y publica un modelo en un solo worker del nodo y carga el resultado.
+
+        El worker que obtiene el lock de entrenamiento del registro llama a `train`; los
+        demás esperan a que CURRENT cambie respecto a `loaded_version` (la versión que
+        sirven) y solo recargan. Si otro worker ya publicó una versión nueva, se recarga
+        sin entrenar.
+        """
+        while True:
+            with store.training_lock() as leader:
+                if store.current_version() != loaded_version:
+                    break
+                if leader:
+                    train()
+                    break
+            time.sleep(settings.TRAINING_POLL_SECONDS)
+        reload()
+
+    def _fit_neural_model(self, num_samples: int, epochs: int, batch_size: int = 32,
+                          validation: bool = True) -> Dict[str, Any]:
+        """Entrena y publica una CNN nueva en un servicio aparte; el servicio en uso no se toca."""
+        trainer_service = NeuralCareerService(
+            neural_model=NeuralCareerModel(),
+            career_recommender=self.career_recommender()
+        )
+        result = trainer_service.train_models(
+            num_samples=num_samples,
+            epochs=epochs,
+            batch_size=batch_size,
+            validation=validation
+        )
+        if "error" not in result:
+            result["model_version"] = trainer_service.neural_model.version
+        return result
+
+    def train_neural_model(self, num_samples: int, epochs: int, batch_size: int = 32,
+                           validation: bool = True) -> Dict[str, Any]:
+        """
+        Entrena una CNN nueva, la publica en el registro de artefactos y la activa con un
+        reemplazo en caliente validado (ver reload_neural_model). Los demás workers la
+        cargan al ver el cambio de CURRENT.
+
+        Es bloqueante: llamarla desde un hilo, no desde el event loop.
+
+        Returns:
+            Resultado del entrenamiento con la versión publicada, o con "error" si falló
+        """
+        result = self._fit_neural_model(num_samples, epochs, batch_size, validation)
+        if "error" not in result:
+            result["version"] = self.reload_neural_model().version
+        return result
+
+    def _minimal_trainer(self) -> MinimalRecommendationService:
+        """Servicio aparte para entrenar el RandomForest; el modelo en uso no se toca."""
+        return MinimalRecommendationService(career_recommender=self.career_recommender())
+
+    def train_minimal_model(self, training_data: List[Dict[str, Any]], career_names: List[str]) -> Dict[str, Any]:
+        """
+        Entrena un RandomForest nuevo con datos externos, lo publica en el registro de
+        artefactos y lo activa con un reemplazo en caliente (ver reload_minimal_model).
+
+        Es bloqueante: llamarla desde un hilo, no desde el event loop.
+
+        Returns:
+            Resultado del entrenamiento con la versión publicada
+        """
+        result = self._minimal_trainer().train_model(training_data, career_names)
+        result["version"] = self.reload_minimal_model().version
+        return result
+
+    def train_minimal_with_riasec(self, sample_size: Optional[int] = 5000, save_training_data: bool = False,
+                                  verbose: bool = False) -> Dict[str, Any]:
+        """
+        Como train_minimal_model, con datos del dataset RIASEC.
+
+        Es bloqueante: llamarla desde un hilo, no desde el event loop.
+        """
+        result = self._minimal_trainer().train_with_riasec(
+            sample_size=sample_size,
+            save_training_data=save_training_data,
+            verbose=verbose
+        )
+        result["version"] = self.reload_minimal_model().version
+        return result
+
+    def _train_cnn(self) -> None:
+        """Entrena una CNN nueva fuera del servicio en uso y la publica con un reemplazo en caliente."""
+        def train():
+            result = self._fit_neural_model(settings.CNN_TRAINING_SAMPLES, settings.CNN_TRAINING_EPOCHS)
+            if "error" in result:
+                raise RuntimeError(result["error"])
+
+        neural_model = self.neural_model()
+        self._train_once_per_node(neural_model.store, neural_model.version, train, self.reload_neural_model)
+        self._engines["cnn"] = {"status": "ready", "trained_in_background": True}
+
+    def _train_random_forest(self) -> None:
+        """Entrena un RandomForest nuevo fuera del modelo en uso y lo publica con un reemplazo en caliente."""
+        def train():
+            trainer_service = MinimalNeuralService(
+                neural_model=MinimalNeuralCareerModel(),
+                career_recommender=self.career_recommender()
+            )
+            trainer_service.train_model(num_samples=settings.RF_TRAINING_SAMPLES)
+
+        minimal_model = self.minimal_model()
+        self._train_once_per_node(minimal_model.store, minimal_model.version, train, self.reload_minimal_model)
+        self._engines["random_forest"] = {"status": "ready", "trained_in_background": True}
+
+    # Versiones publicadas por otros workers
+
+    def sync_published_models(self) -> None:
+        """
+        Recarga la CNN o el RandomForest si CURRENT publica una versión distinta de la que
+        sirve este worker (ej. la entrenó otro worker). Solo revisa los modelos ya cargados
+        y no fijados con NEURAL_MODEL_VERSION / MINIMAL_MODEL_VERSION; una versión que no
+        pasa la validación no se reintenta.
+        """
+        engines = (
+            ("cnn", self._neural, settings.NEURAL_MODEL_VERSION, self.reload_neural_model),
+            ("random_forest", self._minimal, settings.MINIMAL_MODEL_VERSION, self.reload_minimal_model)
+        )
+        for name, handle, pinned, reload in engines:
+            if pinned or not handle.loaded or self._trainers[name].running:
+                continue
+            model = self.neural_model() if name == "cnn" else self.minimal_model()
+            published = model.store.current_version()
+            if published is None or published == model.version or published in self._failed_versions[name]:
+                continue
+            try:
+                reload()
+                logger.info(f"Motor '{name}': versión {published} publicada por otro proceso cargada")
+            except Exception as e:
+                self._failed_versions[name].add(published)
+                logger.warning(f"Motor '{name}': no se pudo cargar la versión publicada {published}: {e}")
+
+    def _watch_published_models(self) -> None:
+        while not self._watch_stop.wait(settings.MODEL_WATCH_SECONDS):
+            try:
+                self.sync_published_models()
+            except Exception as e:
+                logger.error(f"Error revisando las versiones publicadas: {e}", exc_info=True)
+
+    # Warmup en segundo plano
+
+    def _warm_embedding(self) -> bool:
+        recommender = self.career_recommender()
+        if not recommender.model:
+            return False
+        recommender.model.encode(["warmup"])
+        return True
+
+    def _warm_cnn(self) -> bool:
+        model = self.neural_model()
+        if not model.is_trained:
+            return False
+        model.predict_career(
+            _WARMUP_PROFILE["mbti_vector"], _WARMUP_PROFILE["mbti_weights"], _WARMUP_PROFILE["mi_scores"],
+            list(model.label_encoder.classes_)
+        )
+        return True
+
+    def _warm_random_forest(self) -> bool:
+        model = self.minimal_model()
+        if not model.model_trained:
+            return False
+        model.predict_career(
+            _WARMUP_PROFILE["mbti_vector"], _WARMUP_PROFILE["mbti_weights"], _WARMUP_PROFILE["mi_scores"],
+            model.class_names or None
+        )
+        return True
+
+    def warmup(self) -> None:
+        """
+        Carga y calienta todos los motores: una llamada al encoder, una inferencia
+        de la CNN y un `predict_proba` del RandomForest.
+
+        Un motor sin modelo disponible queda como "unavailable" (se servirá con su
+        fallback mientras se entrena en segundo plano) y uno que falla queda como "failed";
+        ninguno bloquea la disponibilidad.
+        """
+        warmers = {
+            "embedding": self._warm_embedding,
+            "cnn": self._warm_cnn,
+            "random_forest": self._warm_random_forest
+        }
+        for name, warm in warmers.items():
+            self._engines[name] = {"status": "warming"}
+            start = time.perf_counter()
+            try:
+                with startup_profiler.span(f"warmup.{name}", category="warmup"):
+                    available = warm()
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                self._engines[name] = {
+                    "status": "ready" if available else "unavailable",
+                    "warmup_ms": round(elapsed_ms, 1)
+                }
+                logger.info(f"Motor '{name}' {self._engines[name]['status']} tras {elapsed_ms:.0f} ms de warmup")
+                if not available and name in self._trainers:
+                    self.request_training(name)
+            except Exception as e:
+                logger.error(f"Error calentando el motor '{name}': {e}", exc_info=True)
+                self._engines[name] = {"status": "failed", "error": str(e)}
+        self._warmup_done.set()
+        startup_profiler.finish("models_ready", settings.STARTUP_REPORT_PATH)
+
+        memory = memory_breakdown()
+        logger.info(f"Warmup completo (pid {os.getpid()}): {memory.get('rss_mb')} MB RSS, "
+                    f"{memory.get('shared_mb', 0)} MB compartidos, {memory.get('private_mb', 0)} MB privados")
+
+    def _startup_tasks(self, warm_models: bool) -> None:
+        if settings.PRELOAD_ML_MODULES:
+            with startup_profiler.span("warmup.preload_modules", category="warmup"):
+                preload()
+        if warm_models:
+            self.warmup()
+
+    def start_warmup(self, warm_models: bool = True) -> None:
+        """
+        Lanza en un hilo de fondo (una sola vez por proceso) la importación de los módulos
+        de ML (PRELOAD_ML_MODULES) y, si `warm_models`, el warmup de los motores.
+
+        Con `warm_models=False` los motores se cargan bajo demanda en la primera petición
+        y el proceso se reporta listo de inmediato.
+        """
+        with self._lock:
+            if self._warmup_thread is not None:
+                return
+            self._warm_on_startup = warm_models
+            self._warmup_thread = threading.Thread(
+                target=self._startup_tasks, args=(warm_models,), name="model-warmup", daemon=True
+            )
+            self._warmup_thread.start()
+            if settings.MODEL_WATCH_SECONDS > 0:
+                self._watch_thread = threading.Thread(
+                    target=self._watch_published_models, name="model-watch", daemon=True
+                )
+                self._watch_thread.start()
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Estado de cada motor. El proceso está listo cuando terminó el warmup o, si el
+        warmup está desactivado, desde el arranque (los motores se cargan bajo demanda).
+        """
+        engines = {name: dict(state) for name, state in self._engines.items()}
+        if engines["embedding"]["status"] == "pending" and "career_recommender" in self._instances:
+            engines["embedding"] = {"status": "loaded"}
+        if engines["random_forest"]["status"] == "pending" and self._minimal.loaded:
+            engines["random_forest"] = {"status": "loaded"}
+        if engines["cnn"]["status"] == "pending" and self._neural.loaded:
+            engines["cnn"] = {"status": "loaded"}
+        return {
+            "ready": self._warmup_done.is_set() or not self._warm_on_startup,
+            "warmup": "enabled" if self._warm_on_startup else "on_demand",
+            "degraded": any(state["status"] in ("unavailable", "failed") for state in engines.values()),
+            "engines": engines,
+            "training": {name: trainer.status() for name, trainer in self._trainers.items()}
+        }
+
+    def shutdown(self) -> None:
+        """Persiste la caché de embeddings de perfiles al apagar el proceso."""
+        self._watch_stop.set()
+        if "career_recommender" in self._instances:
+            saved = self._instances["career_recommender"].profile_cache.save()
+            if saved:
+                logger.info(f"{saved} embeddings de perfiles guardados")
+
+    def _cache_report(self) -> Dict[str, Any]:
+        caches = {}
+        if self._neural.loaded:
+            caches["cnn"] = self._neural.get().cache.stats()
+        if "minimal_neural_service" in self._instances:
+            caches["random_forest"] = self._instances["minimal_neural_service"].cache.stats()
+        if "career_recommender" in self._instances:
+            caches["profile_embeddings"] = self._instances["career_recommender"].profile_cache.stats()
+        return caches
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Devuelve el tiempo de carga y la memoria de cada modelo, las métricas del
+        micro-batching y de la caché de predicciones, el costo de las importaciones diferidas y el RSS actual.
+        """
+        models = {}
+        for name in ("career_recommender", "neural_model", "minimal_model"):
+            stats = self._load_stats.get(name)
+            handle = {"neural_model": self._neural, "minimal_model": self._minimal}.get(name)
+            loaded = handle.loaded if handle is not None else name in self._instances
+            models[name] = {"loaded": loaded, **(stats or {})}
+        models["neural_model"]["version"] = self._neural.version
+        models["minimal_model"]["version"] = self._minimal.version
+        if self._neural.loaded:
+            neural_model = self._neural.get().neural_model
+            models["neural_model"]["engine"] = neural_model.engine_name
+            if neural_model.engine_name == "lattice":
+                models["neural_model"]["lattice"] = {
+                    "mode": neural_model.engine.mode,
+                    "shape": neural_model.engine.metadata["shape"],
+                    "error": neural_model.engine.metadata.get("error")
+                }
+        if self._minimal.loaded:
+            models["minimal_model"]["engine"] = self._minimal.get().engine_name
+        recommender = self._instances.get("career_recommender")
+        if recommender is not None:
+            models["career_recommender"]["encoder"] = recommender.encoder_name if recommender.model else None
+        if recommender is not None and recommender.model:
+            models["career_recommender"]["career_store"] = recommender.career_store.stats()
+        if recommender is not None and recommender.ann_index is not None:
+            models["career_recommender"]["ann_index"] = recommender.ann_index.stats()
+        return {
+            "models": models,
+            "batching": {"cnn": self._neural.get().batcher.stats()} if self._neural.loaded else {},
+            "prediction_cache": self._cache_report(),
+            "imports": import_report(),
+            "rss_mb": round(current_rss_mb(), 1)
+        }
+
+# Instancia única por proceso
+model_registry = ModelRegistry()
@@ -1,11 +1,17 @@
-from typing import Dict, List, Tuple, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import numpy as np
 from app.models.neural_model import NeuralCareerModel
 from app.models.career_model import CareerRecommender
+from app.models.features import prepare_feature_matrix, quantize_profile
+from app.models.retrieval import top_k_indices
 from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score, confusion_matrix
-from tensorflow.keras.utils import to_categorical
+from app.core.config import settings
+from app.services.micro_batcher import MicroBatcher
+from app.utils.cache import LRUCache
+from app.utils.lazy_imports import lazy_import
+from starlette.concurrency import run_in_threadpool
 import logging
 import random
 
@@ -13,10 +19,27 @@ import random
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("neural_service")
 
+# TensorFlow solo se importa al entrenar
+tf = lazy_import("tensorflow")
+
 class NeuralCareerService:
-    def __init__(self):
-        self.neural_model = NeuralCareerModel()
-        self.career_recommender = CareerRecommender()
+    def __init__(self, neural_model: NeuralCareerModel = None,
+                 career_recommender: CareerRecommender = None,
+                 request_training: Optional[Callable[[], bool]] = None):
+        # Los modelos se reciben del registro compartido; solo se crean si no se inyectan
+        self.neural_model = neural_model or NeuralCareerModel()
+        self.career_recommender = career_recommender or CareerRecommender()
+        # Lanza el entrenamiento en segundo plano cuando no hay modelo (ver ModelRegistry)
+        self.request_training = request_training
+        # Agrupa las predicciones concurrentes de predict_careers_async en un solo forward pass
+        self.batcher = MicroBatcher(
+            "cnn",
+            self.neural_model.predict_proba,
+            window_ms=settings.BATCH_WINDOW_MS,
+            max_batch=settings.BATCH_MAX_SIZE
+        )
+        # Resultados por perfil cuantizado; se vacía al cambiar la versión del modelo
+        self.cache = LRUCache(settings.PREDICTION_CACHE_SIZE, settings.PREDICTION_CACHE_TTL)
         logger.info("NeuralCareerService inicializado")
         
     def generate_training_data(self, num_samples: int = 1000) -> Tuple[np.ndarray, np.ndarray, List[str]]:
@@ -36,7 +59,7 @@ class NeuralCareerService:
         mi_types = ["Lin", "LogMath", "Spa", "BodKin", "Mus", "Inter", "Intra", "Nat"]
         
         # Usar todas las carreras disponibles en nuestro recomendador
-        careers = [career["nombre"] for career in self.career_recommender.careers]
+        careers = self.career_recommender.catalog.names
         num_careers = len(careers)
         logger.info(f"Generando datos para {num_careers} carreras")
         
@@ -106,7 +129,7 @@ class NeuralCareerService:
         # Codificar etiquetas
         self.neural_model.label_encoder = LabelEncoder()
         y_encoded = self.neural_model.label_encoder.fit_transform(y_labels)
-        y_categorical = to_categorical(y_encoded)
+        y_categorical = tf.keras.utils.to_categorical(y_encoded)
         
         # Verificar distribución de carreras
         unique_careers, career_counts = np.unique(y_labels, return_counts=True)
@@ -138,8 +161,7 @@ class NeuralCareerService:
                 logger.info(f"Datos divididos: {X_train.shape[0]} muestras de entrenamiento, {X_test.shape[0]} muestras de prueba")
                 logger.info("Entrenando modelo CNN...")
                 self.neural_model.train_cnn_model(X_train, y_train, epochs=epochs, batch_size=batch_size)
-                X_test_reshaped = X_test.reshape(X_test.shape[0], X_test.shape[1], 1)
-                cnn_predictions = self.neural_model.cnn_model.predict(X_test_reshaped)
+                cnn_predictions = self.neural_model.predict_proba(X_test)
                 cnn_pred_classes = np.argmax(cnn_predictions, axis=1)
                 cnn_true_classes = np.argmax(y_test, axis=1)
                 cnn_accuracy = accuracy_score(cnn_true_classes, cnn_pred_classes)
@@ -180,15 +202,14 @@ class NeuralCareerService:
         Evalúa el modelo CNN entrenado con un conjunto de datos de prueba.
         """
         logger.info(f"Evaluando modelo CNN con {num_samples} muestras...")
-        if self.neural_model.cnn_model is None:
+        if not self.neural_model.is_trained:
             logger.warning("No hay modelo CNN entrenado para evaluar")
             return {"error": "No hay modelo CNN entrenado para evaluar"}
         try:
             known_careers = list(self.neural_model.label_encoder.classes_)
             logger.info(f"El modelo conoce {len(known_careers)} carreras")
             X_test, y_test, _ = self.generate_training_data(num_samples)
-            X_test_reshaped = X_test.reshape(X_test.shape[0], X_test.shape[1], 1)
-            cnn_predictions = self.neural_model.cnn_model.predict(X_test_reshaped)
+            cnn_predictions = self.neural_model.predict_proba(X_test)
             cnn_pred_classes = np.argmax(cnn_predictions, axis=1)
             cnn_true_classes = np.argmax(y_test, axis=1)
             cnn_accuracy = accuracy_score(cnn_true_classes, cnn_pred_classes)
@@ -219,17 +240,117 @@ class NeuralCareerService:
                        top_n: int = 3) -> List[Dict]:
         """
         Predice las carreras STEM más adecuadas para el perfil del usuario usando solo CNN.
+        
+        Si no hay modelo CNN entrenado, responde con el recomendador por embeddings (o
+        reglas) y pide el entrenamiento en segundo plano; nunca entrena dentro de la petición.
         """
         logger.info(f"Iniciando predicción de carreras para perfil MBTI: {mbti_code}")
-        if self.neural_model.cnn_model is None:
-            logger.info("No hay modelo CNN entrenado. Entrenando un nuevo modelo...")
-            self.train_models(num_samples=5000, epochs=50, batch_size=32)
+        if not self.neural_model.is_trained:
+            self._request_training()
+            return self.career_recommender.recommend_careers(
+                mbti_code, mbti_vector, mbti_weights, mi_scores, top_n
+            )
+        cache_key = self._cache_key(mbti_code, mbti_vector, mbti_weights, mi_scores, top_n)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return [dict(match) for match in cached]
         career_names = list(self.neural_model.label_encoder.classes_)
         logger.info(f"Prediciendo entre {len(career_names)} carreras disponibles")
         logger.info("Ejecutando predicción con red neuronal CNN...")
         predictions = self.neural_model.predict_career(
             mbti_vector, mbti_weights, mi_scores, career_names
         )
+        results = self._build_recommendations(mbti_code, mi_scores, predictions, top_n)
+        self.cache.set(cache_key, results)
+        return [dict(match) for match in results]
+    
+    def _cache_key(self, mbti_code: str, mbti_vector: List[int], mbti_weights: Dict[str, float],
+                   mi_scores: Dict[str, float], top_n: int) -> Tuple:
+        """Clave de caché del perfil cuantizado; invalida la caché si cambió la versión del modelo."""
+        self.cache.bind_version(self.neural_model.version)
+        return (mbti_code, quantize_profile(mbti_vector, mbti_weights, mi_scores, settings.PREDICTION_CACHE_STEP), top_n)
+    
+    async def predict_careers_async(self, mbti_code: str, mbti_vector: List[int], 
+                                    mbti_weights: Dict[str, float], mi_scores: Dict[str, float], 
+                                    top_n: int = 3) -> List[Dict]:
+        """
+        Igual que predict_careers, pero la inferencia de la CNN pasa por el micro-batcher:
+        las peticiones concurrentes comparten un solo forward pass.
+        
+        Si el perfil está en la caché no se ejecuta inferencia. Si no hay modelo entrenado
+        (se responde con el fallback) o el micro-batching está desactivado, se ejecuta
+        predict_careers en el threadpool.
+        """
+        if not settings.MICRO_BATCHING or not self.neural_model.is_trained:
+            return await run_in_threadpool(
+                self.predict_careers, mbti_code, mbti_vector, mbti_weights, mi_scores, top_n
+            )
+        cache_key = self._cache_key(mbti_code, mbti_vector, mbti_weights, mi_scores, top_n)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return [dict(match) for match in cached]
+        career_names = list(self.neural_model.label_encoder.classes_)
+        X = self.neural_model.prepare_input_features(mbti_vector, mbti_weights, mi_scores)
+        probs = await self.batcher.submit(X)
+        predictions = sorted(
+            ((career, float(prob)) for career, prob in zip(career_names, probs)),
+            key=lambda x: x[1], reverse=True
+        )
+        results = self._build_recommendations(mbti_code, mi_scores, predictions, top_n)
+        self.cache.set(cache_key, results)
+        return [dict(match) for match in results]
+    
+    def predict_careers_batch(self, profiles: List[Dict[str, Any]], top_n: int = 3) -> List[List[Dict]]:
+        """
+        Predice carreras para varios perfiles con un solo forward pass de la CNN.
+        
+        Args:
+            profiles: Lista de diccionarios con mbti_code, mbti_vector, mbti_weights y mi_scores
+            top_n: Número de recomendaciones por perfil
+            
+        Returns:
+            Una lista de recomendaciones por perfil, en el orden recibido
+        """
+        if not profiles:
+            return []
+        if not self.neural_model.is_trained:
+            self._request_training()
+            return self.career_recommender.recommend_careers_batch(
+                [(p["mbti_code"], p["mbti_vector"], p["mbti_weights"], p["mi_scores"]) for p in profiles],
+                top_n
+            )
+        
+        career_names = list(self.neural_model.label_encoder.classes_)
+        X = prepare_feature_matrix([
+            (p["mbti_vector"], p["mbti_weights"], p["mi_scores"]) for p in profiles
+        ])
+        probs = self.neural_model.predict_proba(X)
+        logger.info(f"Predicción en batch de {len(profiles)} perfiles entre {len(career_names)} carreras")
+        
+        # _build_recommendations solo mira las top_n * 5 mejores predicciones de cada perfil
+        top = top_k_indices(probs, top_n * 5)
+        results = []
+        for profile, row, indices in zip(profiles, probs, top):
+            predictions = [(career_names[i], float(row[i])) for i in indices]
+            results.append(self._build_recommendations(profile["mbti_code"], profile["mi_scores"], predictions, top_n))
+        return results
+    
+    def _request_training(self) -> None:
+        """Pide el entrenamiento de la CNN en segundo plano mientras se sirve con el fallback."""
+        if self.request_training is None or not self.request_training():
+            logger.warning("No hay modelo CNN entrenado ni entrenamiento en curso; se sirve con el recomendador de respaldo")
+        else:
+            logger.info("No hay modelo CNN entrenado; se sirve con el recomendador de respaldo mientras se entrena")
+    
+    def _build_recommendations(self, mbti_code: str, mi_scores: Dict[str, float],
+                               predictions: List[Tuple[str, float]], top_n: int) -> List[Dict]:
+        """
+        Filtra las predicciones de la CNN, completa con reglas si faltan y añade
+        la universidad y ciudad de cada carrera.
+        
+        Args:
+            predictions: Lista (carrera, probabilidad) ordenada de mayor a menor
+        """
         top_predictions = predictions[:5]
         logger.info(f"Top 5 predicciones iniciales: {top_predictions}")
         actual_top_n = min(top_n * 5, len(predictions))
@@ -240,14 +361,14 @@ class NeuralCareerService:
         for i, (career_name, score) in enumerate(predictions):
             if i < 3:
                 filtered_predictions.append((career_name, score))
-                logger.info(f"Incluida carrera top {i+1}: {career_name} (score: {score:.4f})")
+                logger.debug(f"Incluida carrera top {i+1}: {career_name} (score: {score:.4f})")
             elif score > 0.03:
                 filtered_predictions.append((career_name, score))
-                logger.info(f"Incluida carrera adicional: {career_name} (score: {score:.4f})")
+                logger.debug(f"Incluida carrera adicional: {career_name} (score: {score:.4f})")
             else:
-                logger.info(f"Descartada carrera: {career_name} (score: {score:.4f} - muy bajo)")
+                logger.debug(f"Descartada carrera: {career_name} (score: {score:.4f} - muy bajo)")
             if len(filtered_predictions) >= top_n:
-                logger.info(f"Alcanzado número objetivo de recomendaciones ({top_n})")
+                logger.debug(f"Alcanzado número objetivo de recomendaciones ({top_n})")
                 break
         if len(filtered_predictions) < top_n and hasattr(self.career_recommender, '_rule_based_recommendations'):
             logger.info(f"Insuficientes recomendaciones ({len(filtered_predictions)}). Añadiendo basadas en reglas...")
@@ -258,36 +379,33 @@ class NeuralCareerService:
                 career_name = rec["nombre"]
                 if career_name not in [c for c, _ in filtered_predictions]:
                     filtered_predictions.append((career_name, 0.05))
-                    logger.info(f"Añadida carrera por reglas: {career_name} (score asignado: 0.05)")
+                    logger.debug(f"Añadida carrera por reglas: {career_name} (score asignado: 0.05)")
                 if len(filtered_predictions) >= top_n:
                     break
         if len(filtered_predictions) < top_n:
             logger.info(f"Aún faltan recomendaciones. Añadiendo carreras menos comunes...")
             recommended_careers = set(career_name for career_name, _ in filtered_predictions)
             less_common_careers = [
-                career for career in self.career_recommender.careers 
+                career for career in self.career_recommender.catalog
                 if career["nombre"] not in recommended_careers
             ]
             random.shuffle(less_common_careers)
             for career in less_common_careers[:top_n - len(filtered_predictions)]:
                 filtered_predictions.append((career["nombre"], 0.01))
-                logger.info(f"Añadida carrera poco común: {career['nombre']} (score asignado: 0.01)")
+                logger.debug(f"Añadida carrera poco común: {career['nombre']} (score asignado: 0.01)")
         logger.info("Iniciando enriquecimiento de resultados con información adicional...")
         results = []
         for career_name, score in filtered_predictions[:top_n]:
-            logger.info(f"Procesando carrera: {career_name} (score: {score:.4f})")
-            career_info = next(
-                (career for career in self.career_recommender.careers 
-                 if career["nombre"] == career_name),
-                None
-            )
+            logger.debug(f"Procesando carrera: {career_name} (score: {score:.4f})")
+            career_info = self.career_recommender.get_career(career_name)
             if career_info:
-                logger.info(f"Información encontrada para {career_name}: universidad={career_info['universidad']}, ciudad={career_info['ubicacion']}")
+                logger.debug(f"Información encontrada para {career_name}: universidad={career_info['universidad']}, ciudad={career_info['ubicacion']}")
                 results.append({
                     "nombre": career_name,
                     "universidad": career_info["universidad"],
                     "ciudad": career_info["ubicacion"],
-                    "match_score": float(score)
+                    "match_score": float(score),
+                    "engine": "cnn"
                 })
             else:
                 logger.warning(f"No se encontró información adicional para la carrera: {career_name}")
@@ -295,7 +413,8 @@ class NeuralCareerService:
                     "nombre": career_name,
                     "universidad": "Universidad no especificada",
                     "ciudad": "Ciudad no especificada",
-                    "match_score": float(score)
+                    "match_score": float(score),
+                    "engine": "cnn"
                 })
         logger.info(f"Recomendaciones finales generadas: {[r['nombre'] for r in results]}")
         return results
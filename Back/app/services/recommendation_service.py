@@ -1,13 +1,13 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from app.models.mbti_model import MBTIProcessor
 from app.models.mi_model import MultipleIntelligenceProcessor
 from app.models.career_model import CareerRecommender
 
 class RecommendationService:
-    def __init__(self):
+    def __init__(self, career_recommender: CareerRecommender = None):
         self.mbti_processor = MBTIProcessor()
         self.mi_processor = MultipleIntelligenceProcessor()
-        self.career_recommender = CareerRecommender()
+        self.career_recommender = career_recommender or CareerRecommender()
     
     def process_mbti_answers(self, mbti_questions: List[Dict]) -> Dict[str, Any]:
         """
@@ -46,7 +46,9 @@ class RecommendationService:
     def get_career_recommendations(self, mbti_result: Dict[str, Any], 
                                   mi_result: Dict[str, float],
                                   top_n: int = 3,
-                                  location_filter: str = None) -> Dict[str, Any]:
+                                  location_filter: str = None,
+                                  filters: Optional[Dict[str, List[str]]] = None,
+                                  filter_mode: str = "and") -> Dict[str, Any]:
         """
         Get career recommendations based on MBTI and MI profiles
         
@@ -55,6 +57,8 @@ class RecommendationService:
             mi_result: Dictionary with MI scores
             top_n: Number of recommendations to return
             location_filter: Optional location to filter results
+            filters: Optional facet filters (facet -> values)
+            filter_mode: "and" to require every facet, "or" to accept any of them
             
         Returns:
             Dictionary with career recommendations and profile description
@@ -66,7 +70,8 @@ class RecommendationService:
         
         # Get career recommendations
         career_recommendations = self.career_recommender.recommend_careers(
-            mbti_code, mbti_vector, mbti_weights, mi_scores, top_n, location_filter
+            mbti_code, mbti_vector, mbti_weights, mi_scores, top_n, location_filter,
+            filters, filter_mode
         )
         
         # Generate profile description
@@ -79,8 +84,33 @@ class RecommendationService:
             "profile_description": profile_description
         }
         
+    def get_career_recommendations_batch(self, profiles: List[Dict[str, Any]],
+                                         top_n: int = 3,
+                                         location_filter: str = None,
+                                         filters: Optional[Dict[str, List[str]]] = None,
+                                         filter_mode: str = "and") -> List[List[Dict]]:
+        """
+        Get career recommendations for many MBTI and MI profiles at once
+        
+        Args:
+            profiles: List of dictionaries with mbti_code, mbti_vector, mbti_weights and mi_scores
+            top_n: Number of recommendations per profile
+            location_filter: Optional location to filter results
+            filters: Optional facet filters (facet -> values)
+            filter_mode: "and" to require every facet, "or" to accept any of them
+            
+        Returns:
+            One list of career recommendations per profile, in input order
+        """
+        return self.career_recommender.recommend_careers_batch(
+            [(p["mbti_code"], p["mbti_vector"], p["mbti_weights"], p["mi_scores"]) for p in profiles],
+            top_n, location_filter, filters, filter_mode
+        )
+        
     def get_full_profile(self, mbti_questions: List[Dict], mi_responses: List[Dict],
-                       top_n: int = 3, location_filter: str = None) -> Dict[str, Any]:
+                       top_n: int = 3, location_filter: str = None,
+                       filters: Optional[Dict[str, List[str]]] = None,
+                       filter_mode: str = "and") -> Dict[str, Any]:
         """
         Process all inputs and return a complete user profile with recommendations
         
@@ -89,6 +119,8 @@ class RecommendationService:
             mi_responses: List of MI question responses
             top_n: Number of recommendations to return
             location_filter: Optional location to filter results
+            filters: Optional facet filters (facet -> values)
+            filter_mode: "and" to require every facet, "or" to accept any of them
             
         Returns:
             Complete user profile with MBTI, MI, recommendations, and description
@@ -101,7 +133,7 @@ class RecommendationService:
         
         # Get recommendations and profile description
         recommendations = self.get_career_recommendations(
-            mbti_result, mi_result, top_n, location_filter
+            mbti_result, mi_result, top_n, location_filter, filters, filter_mode
         )
         
         # Combine all results
@@ -0,0 +1,101 @@
+"""
+Caché LRU con expiración (TTL) para resultados de predicción.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+class LRUCache:
+    """
+    Caché en memoria del proceso, segura entre hilos.
+
+    Las entradas expiran `ttl` segundos después de guardarse y, si se supera `maxsize`,
+    se descarta la usada hace más tiempo. La caché está ligada a una versión de modelo:
+    `bind_version` la vacía cuando la versión cambia, de modo que nunca se sirve un
+    resultado calculado con un modelo anterior.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 3600.0):
+        """
+        Args:
+            maxsize: Número máximo de entradas (0 desactiva la caché)
+            ttl: Segundos que vive cada entrada (0 = sin expiración)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Any = None
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def bind_version(self, version: Any) -> None:
+        """Vacía la caché si `version` no es la versión del modelo con la que se llenó."""
+        with self._lock:
+            if version != self._version:
+                if self._data:
+                    self._counters["invalidations"] += 1
+                self._data.clear()
+                self._version = version
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            value, expires_at = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._data[key]
+                self._counters["expired"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self._counters["hits"] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Copia de las entradas vigentes, de la usada hace más tiempo a la más reciente."""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (value, expires_at) in self._data.items()
+                    if not expires_at or expires_at >= now]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Tamaño, aciertos, fallos y tasa de aciertos."""
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._data)
+            version = self._version
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "size": size,
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "model_version": version,
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0
+        }
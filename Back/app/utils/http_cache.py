@@ -0,0 +1,121 @@
+"""
+Respuestas JSON precalculadas para endpoints de solo lectura respaldados por un archivo.
+
+`FilePayloadCache` serializa el contenido una sola vez (bytes JSON y su variante gzip,
+con un ETag fuerte) y solo lo recalcula cuando cambia el archivo de origen (mtime,
+tamaño o inodo). `payload_response` elige la variante según `Accept-Encoding` y
+responde 304 sin cuerpo si el `If-None-Match` del cliente coincide con el ETag.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import Request, Response
+
+logger = logging.getLogger("http_cache")
+
+class CachedPayload:
+    """Cuerpo JSON serializado, su variante gzip y sus ETags."""
+
+    def __init__(self, content: Any):
+        self.body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        # mtime=0: la misma entrada produce siempre los mismos bytes comprimidos
+        self.gzip_body = gzip.compress(self.body, compresslevel=6, mtime=0)
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        # Cada codificación es una representación distinta, con su propio ETag fuerte
+        self.gzip_etag = f'"{digest}-gz"'
+
+class FilePayloadCache:
+    """Payload de un endpoint, recalculado solo cuando cambia su archivo de origen."""
+
+    def __init__(self, path: Path, build: Callable[[Path], Any]):
+        """
+        Args:
+            path: Archivo del que depende el payload
+            build: Función que recibe `path` y devuelve el contenido JSON de la respuesta
+        """
+        self.path = Path(path)
+        self.build = build
+        self._payload: Optional[CachedPayload] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.Lock()
+
+    def _stat(self) -> Tuple[int, int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def get(self) -> CachedPayload:
+        """
+        Payload vigente (un `stat` por llamada; se recalcula si el archivo cambió).
+
+        Raises:
+            FileNotFoundError: si el archivo de origen no existe
+        """
+        signature = self._stat()
+        payload = self._payload
+        if payload is not None and signature == self._signature:
+            return payload
+        with self._lock:
+            if self._payload is None or signature != self._signature:
+                self._payload = CachedPayload(self.build(self.path))
+                self._signature = signature
+                logger.info(f"Payload de {self.path.name} recalculado ({len(self._payload.body)} bytes, "
+                            f"{len(self._payload.gzip_body)} con gzip)")
+            return self._payload
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """
+    True si `Accept-Encoding` admite gzip (con q distinto de 0).
+
+    Se leen todos los tokens antes de decidir: un `gzip` explícito prevalece sobre `*`
+    sin importar el orden (`*;q=0, gzip` admite gzip; `gzip;q=0, *` no).
+    """
+    qualities = {}
+    for part in accept_encoding.split(","):
+        token, *params = part.split(";")
+        token = token.strip().lower()
+        if token not in ("gzip", "*"):
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[token] = quality
+    quality = qualities.get("gzip", qualities.get("*", 0.0))
+    return quality > 0
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de `If-None-Match` (RFC 9110), como exige el método GET."""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def payload_response(request: Request, payload: CachedPayload, cache_control: str = "no-cache") -> Response:
+    """
+    Respuesta para `payload`: 304 si el ETag del cliente coincide, si no el cuerpo
+    (comprimido si el cliente acepta gzip).
+    """
+    use_gzip = _accepts_gzip(request.headers.get("accept-encoding", ""))
+    etag = payload.gzip_etag if use_gzip else payload.etag
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=payload.gzip_body, media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
@@ -0,0 +1,104 @@
+"""
+Importación diferida de las bibliotecas pesadas de ML (TensorFlow, sentence-transformers,
+matplotlib, ...).
+
+Los módulos se declaran con `lazy_import` y solo se importan realmente cuando se accede
+a uno de sus atributos, o cuando se llama a `preload` durante una fase de warmup.
+Cada importación real queda registrada con su duración y la memoria que añadió.
+"""
+
+import importlib
+import logging
+import threading
+import time
+import types
+from typing import Any, Dict, Iterable, Optional
+
+from app.utils.memory import current_rss_mb
+from app.utils.startup_profiler import startup_profiler
+
+logger = logging.getLogger("lazy_imports")
+
+_registry: Dict[str, "LazyModule"] = {}
+_registry_lock = threading.Lock()
+
+class LazyModule(types.ModuleType):
+    """Proxy de un módulo que se importa en el primer acceso a un atributo."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_name"] = name
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+        self.__dict__["_lazy_stats"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is not None:
+            return module
+
+        with self.__dict__["_lazy_lock"]:
+            module = self.__dict__["_lazy_module"]
+            if module is None:
+                name = self.__dict__["_lazy_name"]
+                rss_before = current_rss_mb()
+                start = time.perf_counter()
+                module = importlib.import_module(name)
+                elapsed = time.perf_counter() - start
+                rss_delta = current_rss_mb() - rss_before
+                self.__dict__["_lazy_stats"] = {
+                    "import_seconds": round(elapsed, 3),
+                    "rss_delta_mb": round(rss_delta, 1)
+                }
+                self.__dict__["_lazy_module"] = module
+                startup_profiler.record(f"lazy_import.{name}", "import", start, elapsed,
+                                        rss_delta_mb=round(rss_delta, 1))
+                logger.info(f"Módulo '{name}' importado en {elapsed:.2f}s (+{rss_delta:.1f} MB RSS)")
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__["_lazy_module"] is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "cargado" if self.is_loaded else "diferido"
+        return f"<LazyModule '{self.__dict__['_lazy_name']}' ({state})>"
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Devuelve un proxy diferido para el módulo `name`.
+
+    Todas las llamadas con el mismo nombre comparten el mismo proxy, de modo que
+    el módulo se importa una sola vez por proceso.
+    """
+    with _registry_lock:
+        module = _registry.get(name)
+        if module is None:
+            module = LazyModule(name)
+            _registry[name] = module
+        return module
+
+def preload(names: Optional[Iterable[str]] = None) -> None:
+    """
+    Importa de forma explícita los módulos diferidos (fase de warmup).
+
+    Args:
+        names: Módulos a importar. Si es None, se importan todos los declarados.
+    """
+    targets = list(names) if names is not None else list(_registry.keys())
+    for name in targets:
+        lazy_import(name)._load()
+
+def import_report() -> Dict[str, Dict[str, Any]]:
+    """Devuelve, por módulo diferido, si ya se importó y cuánto costó importarlo."""
+    report = {}
+    for name, module in sorted(_registry.items()):
+        stats = module.__dict__["_lazy_stats"]
+        report[name] = {"loaded": module.is_loaded, **(stats or {})}
+    return report
@@ -0,0 +1,102 @@
+"""
+Utilidades para medir el uso de memoria del proceso actual.
+"""
+
+import os
+import resource
+import sys
+from typing import Dict
+
+
+def current_rss_mb() -> float:
+    """
+    Devuelve la memoria residente (RSS) actual del proceso en MB.
+
+    En Linux se lee /proc/self/statm; en otros sistemas se usa el pico
+    de RSS reportado por getrusage como aproximación.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS reporta bytes, Linux reporta KB
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return max_rss / divisor
+
+
+def memory_breakdown() -> Dict[str, float]:
+    """
+    Desglose de la memoria del proceso en MB: compartida (páginas que siguen siendo
+    copy-on-write con el proceso maestro u otros workers) frente a privada.
+
+    Solo disponible en Linux (/proc/self/smaps_rollup); en otros sistemas devuelve
+    únicamente el RSS.
+    """
+    fields = {
+        "Rss": "rss_mb",
+        "Pss": "pss_mb",
+        "Shared_Clean": "shared_clean_mb",
+        "Shared_Dirty": "shared_dirty_mb",
+        "Private_Clean": "private_clean_mb",
+        "Private_Dirty": "private_dirty_mb"
+    }
+    try:
+        breakdown = {}
+        with open("/proc/self/smaps_rollup", "r") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    breakdown[fields[key]] = round(int(rest.split()[0]) / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        return {"rss_mb": round(current_rss_mb(), 1)}
+
+    breakdown["shared_mb"] = round(breakdown.get("shared_clean_mb", 0) + breakdown.get("shared_dirty_mb", 0), 1)
+    breakdown["private_mb"] = round(breakdown.get("private_clean_mb", 0) + breakdown.get("private_dirty_mb", 0), 1)
+    return breakdown
+
+
+def _read_cgroup_value(path: str) -> float:
+    """Valor en MB de un archivo de memoria del cgroup; 0 si no existe o no tiene límite."""
+    try:
+        with open(path, "r") as f:
+            raw = f.read().strip()
+    except OSError:
+        return 0.0
+    if not raw.isdigit():
+        return 0.0
+    value = int(raw) / (1024 * 1024)
+    # Los cgroups sin límite reportan un valor enorme
+    return value if value < 1024 * 1024 else 0.0
+
+
+def available_memory_mb() -> float:
+    """
+    Memoria libre para el proceso en MB: MemAvailable del sistema y, si hay un límite
+    de cgroup (contenedores), lo que queda de ese límite (límite - uso actual), lo que sea
+    menor. La memoria que ya ocupa el proceso no cuenta como disponible. Devuelve 0 si
+    no se puede determinar.
+    """
+    available = 0.0
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) / 1024
+                    break
+    except (OSError, ValueError, IndexError):
+        pass
+
+    # cgroup v2 y v1: (límite, uso actual)
+    for limit_path, usage_path in (
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes")
+    ):
+        limit = _read_cgroup_value(limit_path)
+        if limit:
+            free = max(limit - _read_cgroup_value(usage_path), 0.0)
+            if available == 0 or free < available:
+                available = free
+            break
+    return available
@@ -0,0 +1,217 @@
+"""
+Perfilador del tiempo de arranque.
+
+Registra un span con su inicio y duración para cada fase del arranque (importaciones,
+creación de tablas, importación de carreras, carga de modelos, warmup) y, mientras dura
+el arranque, el tiempo de cada módulo importado. El reporte se expone en /debug/startup
+y se escribe en STARTUP_REPORT_PATH si está definido.
+
+Los tiempos son milisegundos desde que se importó este módulo (lo primero que hace
+main.py); `process_start_ms` indica cuánto tardó el intérprete en llegar hasta ahí.
+"""
+
+import builtins
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("startup_profiler")
+
+_T0 = time.perf_counter()
+
+def _ms_since_start(t: float) -> float:
+    return round((t - _T0) * 1000, 1)
+
+def _process_age_ms() -> Optional[float]:
+    """Tiempo desde que arrancó el proceso (solo Linux: /proc/self/stat y /proc/uptime)."""
+    try:
+        with open("/proc/self/stat", "r") as f:
+            # El nombre del proceso va entre paréntesis y puede contener espacios
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+        return round((uptime - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000, 1)
+    except (OSError, ValueError, IndexError):
+        return None
+
+class StartupProfiler:
+    """Spans temporizados del arranque del proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._spans: List[Dict[str, Any]] = []
+        self._imports: List[Dict[str, Any]] = []
+        self._milestones: Dict[str, float] = {}
+        self._original_import = None
+        self._import_min_ms = 1.0
+        self.process_start_ms = _process_age_ms()
+
+    def _stack(self) -> List[Dict[str, Any]]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str, category: str = "phase") -> Iterator[Dict[str, Any]]:
+        """
+        Mide el bloque como un span. Los spans abiertos en el mismo hilo quedan anidados.
+
+        Args:
+            name: Nombre del span (ej. "db.create_tables")
+            category: Tipo de span: "phase", "import", "model" o "warmup"
+        """
+        stack = self._stack()
+        entry = {
+            "name": name,
+            "category": category,
+            "parent": stack[-1]["name"] if stack else None,
+            "thread": threading.current_thread().name
+        }
+        stack.append(entry)
+        start = time.perf_counter()
+        try:
+            yield entry
+        except BaseException as e:
+            entry["error"] = repr(e)
+            raise
+        finally:
+            stack.pop()
+            entry["start_ms"] = _ms_since_start(start)
+            entry["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            with self._lock:
+                self._spans.append(entry)
+
+    def record(self, name: str, category: str, start: float, seconds: float, **extra: Any) -> None:
+        """
+        Registra un span ya medido (ej. la carga de un modelo medida por el registro).
+
+        Args:
+            start: Valor de time.perf_counter() al inicio
+            seconds: Duración en segundos
+        """
+        stack = self._stack()
+        entry = {
+            "name": name,
+            "category": category,
+            "parent": stack[-1]["name"] if stack else None,
+            "thread": threading.current_thread().name,
+            "start_ms": _ms_since_start(start),
+            "duration_ms": round(seconds * 1000, 1),
+            **extra
+        }
+        with self._lock:
+            self._spans.append(entry)
+
+    def mark(self, milestone: str) -> None:
+        """Registra un hito (ej. "startup_complete", "models_ready")."""
+        self._milestones[milestone] = _ms_since_start(time.perf_counter())
+
+    # Importaciones
+
+    def install_import_hook(self, min_ms: float = 1.0) -> None:
+        """
+        Mide cada módulo importado por primera vez hasta que se llame a `finish`.
+
+        Se registran el tiempo acumulado (incluye los módulos que importa) y el propio;
+        los módulos por debajo de `min_ms` acumulados se descartan.
+        """
+        if self._original_import is not None:
+            return
+        self._import_min_ms = min_ms
+        self._original_import = original = builtins.__import__
+        profiler = self
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+
+            stack = profiler._stack()
+            depth = sum(1 for s in stack if "children_s" in s)
+            entry = {"name": name, "category": "import", "children_s": 0.0}
+            stack.append(entry)
+            start = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - start
+                stack.pop()
+                # Descontar este módulo del tiempo propio del módulo que lo importó
+                if stack and "children_s" in stack[-1]:
+                    stack[-1]["children_s"] += elapsed
+                if elapsed * 1000 >= profiler._import_min_ms:
+                    with profiler._lock:
+                        profiler._imports.append({
+                            "module": name,
+                            "start_ms": _ms_since_start(start),
+                            "cumulative_ms": round(elapsed * 1000, 1),
+                            "self_ms": round((elapsed - entry["children_s"]) * 1000, 1),
+                            "depth": depth
+                        })
+
+        builtins.__import__ = timed_import
+
+    def uninstall_import_hook(self) -> None:
+        if self._original_import is None:
+            return
+        builtins.__import__ = self._original_import
+        self._original_import = None
+
+    # Reporte
+
+    def report(self, top_imports: int = 50) -> Dict[str, Any]:
+        """
+        Devuelve los spans ordenados por inicio, los hitos y las importaciones más lentas.
+
+        Args:
+            top_imports: Número de importaciones a incluir, de mayor a menor tiempo acumulado
+        """
+        with self._lock:
+            spans = sorted(self._spans, key=lambda s: s["start_ms"])
+            imports = sorted(self._imports, key=lambda i: i["cumulative_ms"], reverse=True)
+        top_level_ms = sum(i["cumulative_ms"] for i in self._imports if i["depth"] == 0)
+        return {
+            "pid": os.getpid(),
+            "process_start_ms": self.process_start_ms,
+            "milestones": dict(self._milestones),
+            "spans": spans,
+            "imports": {
+                "count": len(imports),
+                "top_level_ms": round(top_level_ms, 1),
+                "slowest": imports[:top_imports]
+            }
+        }
+
+    def write(self, path: str) -> None:
+        """Escribe el reporte en `path` como JSON (escritura atómica)."""
+        target = Path(path)
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.report(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp, target)
+        except OSError as e:
+            logger.warning(f"No se pudo escribir el reporte de arranque en {path}: {e}")
+
+    def finish(self, milestone: str = "startup_complete", report_path: Optional[str] = None) -> None:
+        """
+        Cierra una fase del arranque: registra el hito, deja de medir importaciones y
+        escribe el reporte si se indicó una ruta.
+        """
+        self.mark(milestone)
+        self.uninstall_import_hook()
+        logger.info(f"Arranque: '{milestone}' a los {self._milestones[milestone]:.0f} ms")
+        if report_path:
+            self.write(report_path)
+
+# Instancia única por proceso
+startup_profiler = StartupProfiler()
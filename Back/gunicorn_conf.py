@@ -0,0 +1,35 @@
+"""
+Configuración de gunicorn para el modo de producción pre-fork.
+
+Uso:
+    gunicorn main:app -c gunicorn_conf.py
+
+El maestro importa la aplicación (preload_app) y carga los modelos en `when_ready`,
+antes de crear los workers, que los comparten por copy-on-write.
+"""
+
+import os
+
+from app.core.server import autotune_workers, preload_models
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "app.core.server.FastUvicornWorker"
+preload_app = True
+
+# Valor provisional; se recalcula en when_ready con la memoria libre tras cargar los modelos
+workers = autotune_workers()
+
+# La primera petición de cada worker puede esperar el warmup de los modelos
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+def when_ready(server):
+    """Cargar los modelos en el maestro y ajustar el número de workers antes del fork."""
+    shared_mb = preload_models()
+    # La memoria libre ya descuenta los modelos del maestro: no se restan otra vez
+    server.num_workers = autotune_workers()
+    server.log.info(f"Modelos precargados ({shared_mb:.0f} MB); iniciando {server.num_workers} workers")
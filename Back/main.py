@@ -1,10 +1,18 @@
-import uvicorn
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-
-from app.api.api import api_router
+# El perfilador se importa primero para medir todas las importaciones del arranque
+from app.utils.startup_profiler import startup_profiler
 from app.core.config import settings
-from app.db.init_db import init
+
+if settings.STARTUP_PROFILE_IMPORTS:
+    startup_profiler.install_import_hook(settings.STARTUP_IMPORT_MIN_MS)
+
+with startup_profiler.span("imports.main"):
+    import uvicorn
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+
+    from app.api.api import api_router
+    from app.db.init_db import init
+    from app.services.model_registry import model_registry
 
 # Crear la aplicación FastAPI
 app = FastAPI(
@@ -24,12 +32,23 @@ app.add_middleware(
 
 # Incluir los routers
 app.include_router(api_router)
+startup_profiler.mark("app_created")
 
 # Evento de inicio
 @app.on_event("startup")
 async def startup_event():
-    """Inicializar la base de datos al iniciar la aplicación"""
-    init()
+    """Inicializar la base de datos y lanzar el warmup de los modelos en segundo plano"""
+    with startup_profiler.span("startup.init_db"):
+        init()
+    # PRELOAD_ML_MODULES se aplica siempre; el warmup de los motores solo con WARMUP_ON_STARTUP
+    model_registry.start_warmup(warm_models=settings.WARMUP_ON_STARTUP)
+    startup_profiler.finish("startup_complete", settings.STARTUP_REPORT_PATH)
+
+# Evento de apagado
+@app.on_event("shutdown")
+def shutdown_event():
+    """Persistir las cachés de los modelos"""
+    model_registry.shutdown()
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=settings.DEBUG) 
\ No newline at end of file
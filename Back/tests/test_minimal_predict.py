@@ -0,0 +1,70 @@
+"""
+Pruebas de POST /api/minimal/predict: con el RandomForest entrenado y con el
+recomendador de respaldo mientras el modelo no está entrenado.
+"""
+
+import os
+import tempfile
+
+# La configuración se lee al importar la app: base de datos y registro de modelos temporales
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+os.environ.setdefault("MODEL_REGISTRY_DIR", tempfile.mkdtemp())
+os.environ.setdefault("PROFILE_EMBEDDING_CACHE_PERSIST", "false")
+os.environ.setdefault("BACKGROUND_TRAINING", "false")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_minimal_recommendation_service
+from app.models.minimal_neural import MinimalNeuralCareerModel
+from app.services.minimal_service import MinimalRecommendationService
+from app.services.model_registry import model_registry
+from main import app
+
+PROFILE = {
+    "mbti_result": {
+        "MBTI_code": "INTJ",
+        "MBTI_vector": [1, 1, 0, 0],
+        "MBTI_weights": {"E/I": 0.8, "S/N": 0.7, "T/F": 0.9, "J/P": 0.6}
+    },
+    "mi_result": {
+        "MI_scores": {"Lin": 0.6, "LogMath": 0.9, "Spa": 0.7, "BodKin": 0.3,
+                      "Mus": 0.4, "Inter": 0.5, "Intra": 0.8, "Nat": 0.5}
+    }
+}
+
+CAREER_MATCH_FIELDS = {"nombre", "universidad", "ciudad", "match_score", "engine"}
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+    app.dependency_overrides.clear()
+
+def test_predict_with_trained_model(client):
+    response = client.post("/api/minimal/predict", params={"top_n": 2}, json=PROFILE)
+
+    assert response.status_code == 200, response.text
+    matches = response.json()
+    assert len(matches) == 2
+    assert all(set(match) == CAREER_MATCH_FIELDS for match in matches)
+    assert matches[0]["match_score"] >= matches[1]["match_score"]
+
+def test_predict_falls_back_while_model_is_not_trained(client):
+    model = MinimalNeuralCareerModel()
+    model.model_trained = False
+    training_requests = []
+    app.dependency_overrides[get_minimal_recommendation_service] = lambda: MinimalRecommendationService(
+        model=model,
+        career_recommender=model_registry.career_recommender(),
+        request_training=lambda: training_requests.append("random_forest") or True
+    )
+
+    response = client.post("/api/minimal/predict", params={"top_n": 3}, json=PROFILE)
+
+    assert response.status_code == 200, response.text
+    matches = response.json()
+    assert len(matches) == 3
+    assert all(set(match) == CAREER_MATCH_FIELDS for match in matches)
+    assert all(match["engine"] != "random_forest" for match in matches)
+    assert training_requests == ["random_forest"]